@@ -0,0 +1,64 @@
+"""Measure memory used by parsed conversations, per message.
+
+Builds a synthetic export, parses it fully and reports the traced Python heap
+held by the resulting Conversation objects (excluding the raw JSON).
+
+    python benchmarks/bench_model_memory.py [conversations] [messages]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+
+from chatgpt_to_claude.core.parser import parse_conversations
+
+MODELS = ["gpt-4o", "gpt-4", "o1-preview"]
+
+
+def synthetic_export(conversations: int, messages: int) -> list[dict]:
+    export = []
+    for c in range(conversations):
+        mapping = {"root": {"id": "root", "message": None, "parent": None, "children": ["m0"]}}
+        for m in range(messages):
+            assistant = m % 2 == 1
+            mapping[f"m{m}"] = {
+                "id": f"m{m}",
+                "message": {
+                    "id": f"{c}-{m}",
+                    "author": {"role": "assistant" if assistant else "user"},
+                    "content": {"content_type": "text", "parts": [f"message {m} of {c}"]},
+                    "create_time": 1710000000.0 + c * 3600 + m,
+                    "metadata": {"model_slug": MODELS[c % 3]} if assistant else {},
+                },
+                "parent": "root" if m == 0 else f"m{m - 1}",
+                "children": [f"m{m + 1}"] if m + 1 < messages else [],
+            }
+        export.append({
+            "id": f"conv-{c}",
+            "title": f"Conversation {c}",
+            "create_time": 1710000000.0 + c * 3600,
+            "update_time": 1710000000.0 + c * 3600 + messages,
+            "mapping": mapping,
+        })
+    return export
+
+
+def main(conversations: int = 3000, messages: int = 100) -> None:
+    export = synthetic_export(conversations, messages)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    parsed = list(parse_conversations(export))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    total = sum(len(c.messages) for c in parsed)
+    print(f"{len(parsed)} conversations, {total} messages")
+    print(f"{used / total:.0f} bytes per message ({used / 2**20:.1f} MiB total)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
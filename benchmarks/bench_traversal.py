@@ -0,0 +1,74 @@
+"""Compare branch selection with and without the export's current_node.
+
+Builds deep conversations where every turn was edited or regenerated a few
+times, then times parser._traverse_tree using current_node against the
+last-child fallback.
+
+    python benchmarks/bench_traversal.py [depth] [edits_per_turn]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+
+from chatgpt_to_claude.core.parser import _traverse_tree
+
+
+def edited_conversation(depth: int, edits: int, visible_last: bool = True) -> dict:
+    """A visible path of `depth` messages; each turn has `edits` dead branches.
+
+    With visible_last, the visible child is always the last one, which is
+    the only case the fallback heuristic gets right.
+    """
+    mapping = {"root": {"id": "root", "message": None, "parent": None, "children": []}}
+    parent = "root"
+    for d in range(depth):
+        for e in range(edits):
+            # Abandoned edit: a short branch hanging off the visible path
+            branch_id = f"edit-{d}-{e}"
+            mapping[branch_id] = _node(branch_id, parent, d)
+            mapping[parent]["children"].append(branch_id)
+        node_id = f"m{d}"
+        mapping[node_id] = _node(node_id, parent, d)
+        position = edits if visible_last else d % (edits + 1)
+        mapping[parent]["children"].insert(position, node_id)
+        parent = node_id
+    return {"mapping": mapping, "current_node": parent}
+
+
+def _node(node_id: str, parent: str, d: int) -> dict:
+    return {
+        "id": node_id,
+        "message": {
+            "id": node_id,
+            "author": {"role": "user" if d % 2 == 0 else "assistant"},
+            "content": {"content_type": "text", "parts": [f"turn {d}"]},
+        },
+        "parent": parent,
+        "children": [],
+    }
+
+
+def main(depth: int = 2000, edits: int = 3) -> None:
+    conv = edited_conversation(depth, edits)
+    mapping = conv["mapping"]
+    runs = 50
+
+    with_current = timeit.timeit(lambda: _traverse_tree(mapping, conv["current_node"]), number=runs)
+    fallback = timeit.timeit(lambda: _traverse_tree(mapping), number=runs)
+
+    visible = len(_traverse_tree(mapping, conv["current_node"]))
+    print(f"{len(mapping)} nodes, visible path {visible} messages")
+    print(f"current_node: {with_current / runs * 1e3:.2f} ms per conversation")
+    print(f"fallback:     {fallback / runs * 1e3:.2f} ms per conversation "
+          f"({fallback / with_current:.1f}x slower)")
+
+    # When the visible reply is not the last child, the fallback loses the path
+    mixed = edited_conversation(depth, edits, visible_last=False)
+    picked = len(_traverse_tree(mixed["mapping"]))
+    print(f"visible reply not last: fallback keeps {picked} of {depth} messages")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
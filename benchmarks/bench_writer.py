@@ -0,0 +1,79 @@
+"""Time OutputWriter against slow storage emulated with artificial latency.
+
+Every directory creation, file open and file close sleeps for a fixed
+latency, like round trips to a network filesystem, before touching a real
+temporary directory. Reports the time to write the same files inline
+(threads=0, what convert used to do) and through thread pools of several
+sizes.
+
+    python benchmarks/bench_writer.py [files] [latency_ms]
+"""
+
+from __future__ import annotations
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from chatgpt_to_claude.core.models import Conversation
+from chatgpt_to_claude.core.splitter import SplitPart
+from chatgpt_to_claude.core.writer import OutputWriter
+
+
+class SlowFile:
+    """A text file whose open and close each cost one round trip."""
+
+    def __init__(self, path: Path, latency: float):
+        time.sleep(latency)
+        self.latency = latency
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, text: str) -> int:
+        return self.file.write(text)
+
+    def __enter__(self) -> SlowFile:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.file.close()
+        time.sleep(self.latency)
+
+
+def run(parts: list[tuple[str, SplitPart]], threads: int, latency: float) -> float:
+    root = Path(tempfile.mkdtemp())
+    writer = OutputWriter(
+        threads,
+        opener=lambda path: SlowFile(path, latency),
+        make_dirs=lambda path: (time.sleep(latency), path.mkdir(parents=True, exist_ok=True)),
+    )
+    start = time.perf_counter()
+    try:
+        with writer:
+            for rel, part in parts:
+                writer.write(root / rel, part)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(root)
+
+
+def main(files: int = 400, latency_ms: float = 5.0) -> None:
+    latency = latency_ms / 1e3
+    body = "lorem ipsum dolor sit amet " * 400
+    conv = Conversation(id="bench", title="Bench")
+    parts = [
+        (f"2024-{i % 12 + 1:02d}/conversation_{i}.md", SplitPart(conv, [f"# {i}\n", body]))
+        for i in range(files)
+    ]
+
+    print(f"{files} files of {len(body) // 1024} KiB, {latency_ms:g} ms per open/close/mkdir")
+    inline = run(parts, 0, latency)
+    print(f"inline:     {inline:6.2f} s")
+    for threads in (2, 4, 8, 16):
+        elapsed = run(parts, threads, latency)
+        print(f"{threads:2d} threads: {elapsed:6.2f} s ({inline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) if i else int(arg) for i, arg in enumerate(sys.argv[1:3])))
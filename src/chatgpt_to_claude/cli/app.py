@@ -2,20 +2,42 @@
 
 from __future__ import annotations
 
+import time
 from pathlib import Path
 
 import click
 from rich.console import Console
 from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
-from ..core.extractor import ExportFormatError, extract_conversations
-from ..core.markdown_writer import conversation_to_markdown, generate_index
-from ..core.models import OrganizeMode
-from ..core.organizer import deduplicate_path, resolve_output_path
+from ..core.cache import DEFAULT_CACHE_SIZE, ExportCache
+from ..core.extractor import ConversationStream, ExportFormatError, iter_conversations
+from ..core.indexer import IndexedExport, SelectedConversations
+from ..core.manifest import (
+    Manifest,
+    ManifestEntry,
+    load_manifest,
+    options_key,
+    remove_stale_outputs,
+    save_manifest,
+)
+from ..core.markdown_writer import generate_index
+from ..core.models import OrganizeMode, SizeUnit
+from ..core.organizer import deduplicate_path
+from ..core.parallel import parse_conversations_parallel
 from ..core.parser import parse_conversations
-from ..core.splitter import DEFAULT_MAX_SIZE, maybe_split
-from ..core.statistics import compute_statistics
-from .display import print_statistics, print_summary
+from ..core.pipeline import (
+    ConvertOptions,
+    decode_elements,
+    decode_scanned_export,
+    render_conversations_parallel,
+    render_decoded,
+    render_raw_conversations,
+)
+from ..core.splitter import DEFAULT_MAX_SIZE, MIN_MAX_SIZE
+from ..core.stages import BoundedStage, StageStats
+from ..core.statistics import StatisticsAccumulator, compute_statistics
+from ..core.writer import DEFAULT_IO_THREADS, OutputWriteError, OutputWriter
+from .display import format_size, format_stages, print_statistics, print_summary
 
 console = Console()
 
@@ -57,8 +79,17 @@ flag to generate condensed versions.
 
 @click.group()
 @click.version_option(package_name="chatgpt-to-claude")
-def cli():
+@click.option(
+    "--cache-size",
+    type=int,
+    default=DEFAULT_CACHE_SIZE >> 20,
+    show_default=True,
+    help="MB of scanned exports to keep in the user cache (0 disables it).",
+)
+@click.pass_context
+def cli(ctx: click.Context, cache_size: int):
     """ChatGPT to Claude -- Convert your ChatGPT exports to clean Markdown."""
+    ctx.obj = ExportCache(max_bytes=cache_size << 20) if cache_size > 0 else None
 
 
 @cli.command()
@@ -77,75 +108,276 @@ def cli():
 )
 @click.option(
     "--max-file-size",
-    type=int,
+    type=click.IntRange(min=MIN_MAX_SIZE[SizeUnit.CHARS]),
     default=DEFAULT_MAX_SIZE,
     help="Max characters per file before splitting.",
 )
+@click.option(
+    "--max-bytes",
+    type=click.IntRange(min=MIN_MAX_SIZE[SizeUnit.BYTES]),
+    default=None,
+    help="Split by UTF-8 size instead: max bytes per file.",
+)
+@click.option(
+    "--max-tokens",
+    type=click.IntRange(min=MIN_MAX_SIZE[SizeUnit.TOKENS]),
+    default=None,
+    help="Split by estimated token count instead: max tokens per file.",
+)
 @click.option(
     "--no-frontmatter",
     is_flag=True,
     help="Omit YAML frontmatter from output files.",
 )
-def convert(source: str, output: str, organize: str, max_file_size: int, no_frontmatter: bool):
-    """Convert a ChatGPT export to Claude-ready Markdown files."""
+@click.option(
+    "--all-branches",
+    is_flag=True,
+    help="Also export edited and regenerated branches, one file per branch.",
+)
+@click.option(
+    "--id", "conversation_ids",
+    multiple=True,
+    help="Only convert the conversation with this id (repeatable). "
+         "Uses a byte-offset index cached next to the export. In a compressed "
+         "ZIP the export is still inflated up to the last selected conversation; "
+         "extract it first for fast lookups.",
+)
+@click.option(
+    "--jobs", "-j",
+    type=int,
+    default=1,
+    help="Worker processes that decode, parse and split conversations (0 = all CPUs). "
+         "With 1, conversion runs in this process while a background thread "
+         "reads and decodes the export.",
+)
+@click.option(
+    "--io-threads",
+    type=int,
+    default=DEFAULT_IO_THREADS,
+    show_default=True,
+    help="Threads writing output files in the background (0 = write inline).",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Re-convert every conversation, even if unchanged since the last run.",
+)
+@click.pass_obj
+def convert(
+    cache: ExportCache | None,
+    source: str,
+    output: str,
+    organize: str,
+    max_file_size: int,
+    max_bytes: int | None,
+    max_tokens: int | None,
+    no_frontmatter: bool,
+    all_branches: bool,
+    conversation_ids: tuple[str, ...],
+    jobs: int,
+    io_threads: int,
+    force: bool,
+):
+    """Convert a ChatGPT export to Claude-ready Markdown files.
+
+    Re-running into the same output directory only re-converts conversations
+    that changed, using the manifest written by the previous run.
+    """
     output_dir = Path(output)
     organize_mode = OrganizeMode(organize)
+    if max_bytes is not None and max_tokens is not None:
+        raise click.UsageError("--max-bytes and --max-tokens cannot be combined.")
+    if max_bytes is not None:
+        max_size, size_unit = max_bytes, SizeUnit.BYTES
+    elif max_tokens is not None:
+        max_size, size_unit = max_tokens, SizeUnit.TOKENS
+    else:
+        max_size, size_unit = max_file_size, SizeUnit.CHARS
+    options = ConvertOptions(
+        organize_mode=organize_mode,
+        max_size=max_size,
+        size_unit=size_unit,
+        include_frontmatter=not no_frontmatter,
+        all_branches=all_branches,
+    )
 
     console.print("\n[bold blue]ChatGPT -> Claude Migration Tool[/]\n")
 
-    # Load
+    # A previous run into the same directory lets unchanged conversations be
+    # skipped; selective (--id) runs neither use nor update the manifest.
+    # With --force nothing is reused, but the previous manifest still says
+    # which outputs have gone stale.
+    incremental = not conversation_ids
+    previous = load_manifest(output_dir) if incremental else None
+    manifest = Manifest(options_key(options))
+    known = (
+        previous.reusable(output_dir)
+        if previous is not None and previous.options == manifest.options and not force
+        else {}
+    )
+    reserved = {
+        str(output_dir / p).lower()
+        for conv_id in known.values()
+        for p in previous.entries[conv_id].summary.output_paths
+    }
+    reusable_ids = set(known.values())
+
+    # Load (conversations are decoded one at a time while converting)
     try:
         console.print(f"Loading export from: [cyan]{source}[/]")
-        raw_data = extract_conversations(source)
-        console.print(f"Found [bold]{len(raw_data)}[/] conversations\n")
+        if conversation_ids:
+            indexed = IndexedExport(source)
+            raw_stream = indexed.select(conversation_ids)
+            missing = len(set(conversation_ids)) - len(raw_stream)
+            if missing:
+                console.print(f"[yellow]Warning:[/] {missing} conversation id(s) not found")
+            read_stage = BoundedStage("read", raw_stream)
+            rendered_stream = render_raw_conversations(read_stage, options)
+        elif (
+            (known or jobs == 1)
+            and cache is not None
+            and (scan := cache.lookup(source)) is not None
+        ):
+            # A cached scan (e.g. from `stats`) holds every hash and index
+            # entry, so nothing is re-hashed and only changed conversations
+            # are read. A first run with --jobs renders in parallel instead.
+            indexed = IndexedExport(source, scan.index())
+            raw_stream, decoded = decode_scanned_export(indexed, scan, known)
+            read_stage = BoundedStage("read", decoded)
+            rendered_stream = render_decoded(read_stage, options)
+        elif jobs != 1:
+            # Read in a background thread; parse, split and render in worker
+            # processes
+            raw_stream = render_conversations_parallel(source, options, jobs, known=known)
+            read_stage = None
+            rendered_stream = iter(raw_stream)
+        else:
+            # Read and decode in a background thread, render here
+            raw_stream = ConversationStream(source, decode=False)
+            read_stage = BoundedStage("read", decode_elements(raw_stream, known))
+            rendered_stream = render_decoded(read_stage, options)
+        if raw_stream.size is not None:
+            console.print(f"Streaming [bold]{format_size(raw_stream.size)}[/] of conversations\n")
     except ExportFormatError as e:
         console.print(f"[red]Error:[/] {e}")
         raise SystemExit(1)
 
-    # Parse and convert
-    all_conversations = []
+    # Parse and convert, keeping only a summary of each conversation
+    summaries = []
+    skipped = []
+    unchanged = 0
+    statistics = StatisticsAccumulator()
     used_paths: dict[str, int] = {}
 
+    def stage_stats() -> list[StageStats]:
+        """Queue depth and throughput of read -> render -> write."""
+        if read_stage is None:
+            stages = raw_stream.stats()  # read thread and worker processes
+        else:
+            render = StageStats("render", 0, 0, rendered_count, time.monotonic() - started)
+            stages = [read_stage.stats(), render]
+        return stages + [writer.stats()]
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
         TimeElapsedColumn(),
+        TextColumn("[dim]{task.fields[stages]}"),
         console=console,
     ) as progress:
-        task = progress.add_task("Converting conversations...", total=len(raw_data))
-
-        for conv in parse_conversations(raw_data, metadata_only=False):
-            if not conv.messages:
-                progress.advance(task)
-                continue
-
-            # Split if too large
-            parts = maybe_split(conv, max_file_size)
-
-            for part in parts:
-                markdown = conversation_to_markdown(
-                    part,
-                    include_frontmatter=not no_frontmatter,
-                )
-
-                out_path = resolve_output_path(part, organize_mode, output_dir)
-                out_path = deduplicate_path(out_path, used_paths)
-                out_path.parent.mkdir(parents=True, exist_ok=True)
-                out_path.write_text(markdown, encoding="utf-8")
-
-            all_conversations.append(conv)
-            progress.advance(task)
+        task = progress.add_task("Converting conversations...", total=raw_stream.size, stages="")
+        started = time.monotonic()
+        rendered_count = 0
+
+        try:
+            # Files are written in the background; leaving the block waits for
+            # them and raises the first failed write
+            with OutputWriter(io_threads) as writer:
+                # Results arrive in export order, so deduplication is deterministic
+                for rendered in rendered_stream:
+                    rendered_count += 1
+                    progress.update(
+                        task, completed=raw_stream.position, stages=format_stages(stage_stats()),
+                    )
+                    if rendered.error:
+                        skipped.append(rendered.error)
+                        continue
+                    conv_id = rendered.summary.id
+                    if rendered.unchanged:
+                        # Keep the previous files and summary as they are
+                        entry = previous.entries[conv_id]
+                        manifest.entries[conv_id] = entry
+                        statistics.add(entry.summary)
+                        if entry.summary.output_paths:
+                            summaries.append(entry.summary)
+                        unchanged += 1
+                        continue
+
+                    if conv_id in reusable_ids:
+                        # Changed since the last run: its old paths are free again
+                        reserved.difference_update(
+                            str(output_dir / p).lower()
+                            for p in previous.entries[conv_id].summary.output_paths
+                        )
+                    summary = rendered.summary
+                    statistics.add(summary)
+                    if incremental:
+                        key = conv_id
+                        while key in manifest.entries:  # duplicate ids in the export
+                            key += "#"
+                        manifest.entries[key] = ManifestEntry(
+                            rendered.update_time, rendered.content_hash, summary,
+                        )
+                    if not rendered.parts:
+                        continue
+
+                    for rel_path, part in rendered.parts:
+                        out_path = deduplicate_path(output_dir / rel_path, used_paths, reserved)
+                        writer.write(out_path, part)  # in the background
+                        summary.output_paths.append(out_path.relative_to(output_dir).as_posix())
+
+                    summaries.append(summary)
+            progress.update(
+                task, completed=raw_stream.position, stages=format_stages(stage_stats()),
+            )
+        except (ExportFormatError, OutputWriteError) as e:
+            console.print(f"[red]Error:[/] {e}")
+            raise SystemExit(1)
+        finally:
+            # Stop the read stage (or worker pool) if the loop ended early
+            if read_stage is not None:
+                read_stage.close()
+            else:
+                rendered_stream.close()
+            if isinstance(raw_stream, SelectedConversations):
+                raw_stream.export.close()
+
+    if incremental:
+        removed = 0
+        if previous is not None:
+            removed = remove_stale_outputs(
+                output_dir, previous.output_paths() - manifest.output_paths(),
+            )
+        save_manifest(manifest, output_dir)
+        if unchanged or removed:
+            console.print(
+                f"Unchanged since last run: [bold]{unchanged}[/] conversation(s); "
+                f"removed [bold]{removed}[/] stale file(s)"
+            )
+
+    for error in skipped:
+        console.print(f"[yellow]Skipped:[/] {error}")
 
     # Generate index and upload guide
-    index_md = generate_index(all_conversations, organize_mode)
+    index_md = generate_index(summaries, organize_mode, skipped)
     output_dir.mkdir(parents=True, exist_ok=True)
     (output_dir / "_INDEX.md").write_text(index_md, encoding="utf-8")
     (output_dir / "_UPLOAD_GUIDE.md").write_text(UPLOAD_GUIDE, encoding="utf-8")
 
     # Stats
-    stats = compute_statistics(all_conversations)
+    stats = statistics.result()
     console.print()
     print_statistics(stats, console)
     print_summary(output_dir, stats, console)
@@ -153,18 +385,34 @@ def convert(source: str, output: str, organize: str, max_file_size: int, no_fron
 
 @cli.command()
 @click.argument("source", type=click.Path(exists=True))
-def stats(source: str):
+@click.option(
+    "--jobs", "-j",
+    type=int,
+    default=1,
+    help="Worker processes for decoding and parsing (0 = all CPUs). "
+         "A cached scan is still used, but one is only cached with 1 job.",
+)
+@click.pass_obj
+def stats(cache: ExportCache | None, source: str, jobs: int):
     """Show statistics about a ChatGPT export without converting."""
     console.print("\n[bold blue]ChatGPT Export Statistics[/]\n")
 
+    # Use metadata-only mode for speed; the cached scan also serves a
+    # following `convert` or `serve`
     try:
-        raw_data = extract_conversations(source)
+        scan = cache.lookup(source) if cache is not None else None
+        if scan is not None:
+            metas = scan.metadata
+        elif cache is not None and jobs == 1:
+            metas = cache.load_or_scan(source).metadata
+        elif jobs != 1:
+            metas = list(parse_conversations_parallel(source, jobs, metadata_only=True))
+        else:
+            metas = list(parse_conversations(iter_conversations(source), metadata_only=True))
     except ExportFormatError as e:
         console.print(f"[red]Error:[/] {e}")
         raise SystemExit(1)
 
-    # Use metadata-only mode for speed
-    metas = list(parse_conversations(raw_data, metadata_only=True))
     export_stats = compute_statistics(metas)
     print_statistics(export_stats, console)
 
@@ -172,7 +420,8 @@ def stats(source: str):
 @cli.command()
 @click.option("--port", "-p", type=int, default=5000, help="Port for the web UI.")
 @click.option("--host", "-h", default="127.0.0.1", help="Host to bind to.")
-def serve(port: int, host: str):
+@click.pass_obj
+def serve(cache: ExportCache | None, port: int, host: str):
     """Launch the web UI for browser-based conversion."""
     from ..web.app import create_app
 
@@ -180,7 +429,7 @@ def serve(port: int, host: str):
     console.print(f"Starting at [cyan]http://{host}:{port}[/]\n")
     console.print("[dim]Press Ctrl+C to stop[/]\n")
 
-    app = create_app()
+    app = create_app({"EXPORT_CACHE": cache})
     app.run(host=host, port=port, debug=False)
 
 
@@ -9,6 +9,28 @@ from rich.panel import Panel
 from rich.table import Table
 
 from ..core.models import ExportStatistics
+from ..core.stages import StageStats
+
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count for humans, e.g. 1.4 GB."""
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    size = num_bytes / 1024
+    for unit in ("KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def format_stages(stages: list[StageStats]) -> str:
+    """One-line pipeline status: queue depth and throughput per stage."""
+    parts = []
+    for stage in stages:
+        depth = f" {stage.depth}/{stage.capacity}" if stage.capacity else ""
+        parts.append(f"{stage.name}{depth} {stage.rate:,.0f}/s")
+    return " | ".join(parts)
 
 
 def print_statistics(stats: ExportStatistics, console: Console) -> None:
@@ -37,6 +59,13 @@ def print_statistics(stats: ExportStatistics, console: Console) -> None:
         )
         table.add_row("Messages by role", roles_str)
 
+    if stats.content_types:
+        types_str = ", ".join(
+            f"{content_type}: {count:,}"
+            for content_type, count in sorted(stats.content_types.items())
+        )
+        table.add_row("Content types", types_str)
+
     console.print(table)
     console.print()
 
@@ -0,0 +1,171 @@
+"""On-disk cache of scanned exports, shared by stats, convert and serve.
+
+Scanning an export decodes every conversation once and records its index
+entry, a hash of its raw JSON and its ConversationMeta. That is everything
+``stats`` and the web UI need, and it lets ``convert`` find the conversations
+that changed since its last run without decoding the rest. Scans are stored
+as zlib-compressed pickles, keyed by the export's identity: size, mtime and
+ZIP CRC for exports on disk, a hash of conversations.json for uploads. The cache
+directory is kept under a size cap by evicting the least recently used scans.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import zipfile
+import zlib
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from .extractor import ExportFormatError, open_conversations_json
+from .. import __version__
+from .indexer import (
+    ConversationIndex,
+    IndexEntry,
+    default_cache_dir,
+    export_fingerprint,
+    make_entry,
+)
+from .json_stream import iter_array_elements
+from .manifest import content_hash
+from .models import ConversationMeta
+from .parser import parse_conversations
+
+CACHE_VERSION = 1
+SCAN_SUFFIX = ".c2c-scan"
+DEFAULT_CACHE_SIZE = 256 << 20  # bytes on disk
+
+
+@dataclass
+class ExportScan:
+    """Per-conversation index entry, raw JSON hash and metadata, in export order."""
+
+    entries: list[IndexEntry] = field(default_factory=list)
+    hashes: list[str] = field(default_factory=list)
+    metadata: list[ConversationMeta] = field(default_factory=list)
+    fingerprint: Optional[dict] = None
+
+    def index(self) -> ConversationIndex:
+        return ConversationIndex(entries=self.entries, fingerprint=self.fingerprint)
+
+
+def scan_export(source: Union[str, Path, BinaryIO]) -> ExportScan:
+    """Decode every conversation once, keeping only what ExportScan holds."""
+    scan = ExportScan()
+    with ExitStack() as stack:
+        stream, _size = open_conversations_json(source, stack)
+        try:
+            for offset, raw in iter_array_elements(stream):
+                conv = json.loads(raw)
+                scan.entries.append(make_entry(conv, offset, len(raw)))
+                scan.hashes.append(content_hash(raw))
+                scan.metadata.extend(parse_conversations([conv], metadata_only=True))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
+    if isinstance(source, (str, Path)):
+        scan.fingerprint = export_fingerprint(source)
+    return scan
+
+
+class ExportCache:
+    """Directory of cached ExportScans with LRU eviction under max_bytes.
+
+    A scan's file mtime is its last use: reads touch it, and writes evict
+    the oldest files until the directory fits.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.directory = Path(directory) if directory is not None else default_cache_dir() / "scans"
+        self.max_bytes = max_bytes
+
+    def key_for(self, source: Union[str, Path]) -> str:
+        """Cache key of an export on disk."""
+        return self._key(json.dumps(export_fingerprint(source), sort_keys=True))
+
+    def upload_key(self, digest: str) -> str:
+        """Cache key of an upload, from the content_hash of its conversations.json."""
+        return self._key(digest)
+
+    def get(self, key: str) -> Optional[ExportScan]:
+        """Load a cached scan, or None if missing or unreadable."""
+        path = self._path(key)
+        try:
+            scan = pickle.loads(zlib.decompress(path.read_bytes()))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:  # corrupt, truncated or from an incompatible release
+            path.unlink(missing_ok=True)
+            return None
+        return scan if isinstance(scan, ExportScan) else None
+
+    def put(self, key: str, scan: ExportScan) -> None:
+        """Store a scan, then evict least recently used scans over the cap."""
+        data = zlib.compress(pickle.dumps(scan, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        if len(data) > self.max_bytes:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self._evict()
+        except OSError:
+            pass  # the cache is an optimization only
+
+    def load_or_scan(
+        self, source: Union[str, Path, BinaryIO], key: Optional[str] = None,
+    ) -> ExportScan:
+        """Return the cached scan of an export, scanning and caching on a miss.
+
+        ``key`` overrides the fingerprint-based key, e.g. with ``upload_key``
+        for uploads whose file identity means nothing.
+        """
+        if key is None:
+            try:
+                key = self.key_for(source)
+            except (OSError, zipfile.BadZipFile):
+                return scan_export(source)  # reports the unreadable export
+        scan = self.get(key)
+        if scan is None:
+            scan = scan_export(source)
+            self.put(key, scan)
+        return scan
+
+    def lookup(self, source: Union[str, Path]) -> Optional[ExportScan]:
+        """The cached scan of an export on disk, without scanning on a miss."""
+        try:
+            return self.get(self.key_for(source))
+        except (OSError, zipfile.BadZipFile, ExportFormatError):
+            return None
+
+    @staticmethod
+    def _key(identity: str) -> str:
+        # The release is part of the key: ConversationMeta and the parser may
+        # change between versions, making older scans stale
+        versioned = f"{CACHE_VERSION}:{__version__}:{identity}"
+        return hashlib.sha256(versioned.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{SCAN_SUFFIX}"
+
+    def _evict(self) -> None:
+        files = []
+        for path in self.directory.glob(f"*{SCAN_SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(size for _mtime, size, _path in files)
+        for _mtime, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import sys
+
 from .models import ContentPart, ContentType
 
 
@@ -66,6 +68,8 @@ def _handle_code(content: dict) -> list[ContentPart]:
     """Code generated by Code Interpreter / Advanced Data Analysis."""
     code_text = content.get("text", "")
     language = content.get("language", "python")
+    if isinstance(language, str):
+        language = sys.intern(language)
     return [ContentPart(
         content_type=ContentType.CODE,
         text=code_text,
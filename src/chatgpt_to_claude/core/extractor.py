@@ -4,9 +4,15 @@ from __future__ import annotations
 
 import json
 import zipfile
+import zlib
+from contextlib import ExitStack
 from io import BytesIO
 from pathlib import Path
-from typing import BinaryIO, Union
+from typing import Any, BinaryIO, Iterator, Optional, Union
+
+from .json_stream import DEFAULT_CHUNK_SIZE, iter_array_elements
+
+EXTRACT_CHUNK_SIZE = 1 << 20
 
 
 class ExportFormatError(Exception):
@@ -33,28 +39,228 @@ def extract_conversations(source: Union[str, Path, BinaryIO]) -> list[dict]:
         elif path.is_dir():
             return _load_from_directory(path)
         else:
-            raise ExportFormatError(
-                f"'{source}' is not a ZIP file or directory. "
-                "Please provide a ChatGPT data export ZIP or its extracted folder."
-            )
+            raise _unsupported_path_error(source)
     elif isinstance(source, (BytesIO, BinaryIO)) or hasattr(source, "read"):
         return _load_from_file_object(source)
     else:
         raise ExportFormatError(f"Unsupported source type: {type(source)}")
 
 
+def iter_conversations(
+    source: Union[str, Path, BinaryIO],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> ConversationStream:
+    """Stream conversation dicts from conversations.json one at a time.
+
+    Unlike extract_conversations, the top-level array is never decoded as a
+    whole, so peak memory is bounded by the largest single conversation.
+
+    Args:
+        source: Path to a ZIP file, path to an extracted directory, or a
+                binary file object holding either ZIP data or the raw
+                conversations.json bytes.
+        chunk_size: Number of bytes read from the underlying file at a time.
+
+    Returns:
+        A ConversationStream yielding raw conversation dicts.
+
+    Raises:
+        ExportFormatError: If conversations.json cannot be found. Malformed
+            JSON is reported the same way while iterating.
+    """
+    return ConversationStream(source, chunk_size)
+
+
+class ConversationStream:
+    """Iterable over the conversations in an export, decoded lazily.
+
+    Exposes ``size`` (bytes in conversations.json, if known) and ``position``
+    (bytes consumed so far) for progress reporting. The underlying file is
+    closed once iteration finishes or ``close()`` is called. With
+    ``decode=False`` each conversation's raw JSON bytes are yielded instead.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, Path, BinaryIO],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        decode: bool = True,
+    ):
+        self._stack = ExitStack()
+        self.chunk_size = chunk_size
+        self.decode = decode
+        self.position = 0
+        try:
+            self._file, self.size = open_conversations_json(source, self._stack)
+        except BaseException:
+            self._stack.close()
+            raise
+
+    def __iter__(self) -> Iterator[Union[dict, bytes]]:
+        try:
+            for offset, raw in iter_array_elements(self._file, self.chunk_size):
+                conv = json.loads(raw) if self.decode else raw
+                self.position = offset + len(raw)
+                yield conv
+            if self.size is not None:
+                self.position = self.size
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._stack.close()
+
+    def __enter__(self) -> ConversationStream:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_conversations_json(
+    source: Union[str, Path, BinaryIO],
+    stack: ExitStack,
+) -> tuple[BinaryIO, Optional[int]]:
+    """Open conversations.json for binary reading.
+
+    Every file handle opened along the way is registered on ``stack``.
+
+    Returns:
+        (file object, uncompressed size in bytes or None if unknown).
+
+    Raises:
+        ExportFormatError: If conversations.json is missing.
+    """
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.is_file() and path.suffix == ".zip":
+            zf = stack.enter_context(zipfile.ZipFile(path, "r"))
+            return _open_zip_member(zf, stack)
+        elif path.is_dir():
+            conv_file = find_in_directory(path)
+            return stack.enter_context(open(conv_file, "rb")), conv_file.stat().st_size
+        else:
+            raise _unsupported_path_error(source)
+    elif isinstance(source, (BytesIO, BinaryIO)) or hasattr(source, "read"):
+        if is_zip_file_object(source):
+            zf = stack.enter_context(zipfile.ZipFile(source, "r"))
+            return _open_zip_member(zf, stack)
+        return source, _remaining_size(source)
+    else:
+        raise ExportFormatError(f"Unsupported source type: {type(source)}")
+
+
+def extract_conversations_json(
+    source: Union[str, Path, BinaryIO],
+    dest: Path,
+    max_bytes: Optional[int] = None,
+    hasher: Optional[Any] = None,
+) -> int:
+    """Write conversations.json, decompressed, to dest without loading it.
+
+    Args:
+        source: As for open_conversations_json.
+        dest: File to create.
+        max_bytes: Refuse exports whose conversations.json is larger.
+        hasher: Optional hashlib object updated with every byte written.
+
+    Returns:
+        Number of bytes written.
+
+    Raises:
+        ExportFormatError: If conversations.json is missing, corrupt or
+            larger than max_bytes. dest is removed in that case.
+    """
+    written = 0
+    try:
+        with ExitStack() as stack:
+            stream, size = open_conversations_json(source, stack)
+            if max_bytes is not None and size is not None and size > max_bytes:
+                raise _too_large_error(max_bytes)
+            with open(dest, "wb") as out:
+                while chunk := stream.read(EXTRACT_CHUNK_SIZE):
+                    written += len(chunk)
+                    if max_bytes is not None and written > max_bytes:
+                        raise _too_large_error(max_bytes)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    out.write(chunk)
+    except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+        Path(dest).unlink(missing_ok=True)
+        raise ExportFormatError(f"Failed to extract conversations.json: {e}") from e
+    except BaseException:
+        Path(dest).unlink(missing_ok=True)
+        raise
+    return written
+
+
+def _too_large_error(max_bytes: int) -> ExportFormatError:
+    return ExportFormatError(
+        f"conversations.json is larger than the {max_bytes // (1 << 20)} MB limit"
+    )
+
+
+def _unsupported_path_error(source: Union[str, Path]) -> ExportFormatError:
+    return ExportFormatError(
+        f"'{source}' is not a ZIP file or directory. "
+        "Please provide a ChatGPT data export ZIP or its extracted folder."
+    )
+
+
+def is_zip_file_object(file_obj: BinaryIO) -> bool:
+    """Check for ZIP data without moving the read position."""
+    if not (hasattr(file_obj, "seekable") and file_obj.seekable()):
+        return False
+    pos = file_obj.tell()
+    try:
+        return zipfile.is_zipfile(file_obj)
+    finally:
+        file_obj.seek(pos)
+
+
+def _remaining_size(file_obj: BinaryIO) -> Optional[int]:
+    if not (hasattr(file_obj, "seekable") and file_obj.seekable()):
+        return None
+    pos = file_obj.tell()
+    end = file_obj.seek(0, 2)
+    file_obj.seek(pos)
+    return end - pos
+
+
+def _open_zip_member(zf: zipfile.ZipFile, stack: ExitStack) -> tuple[BinaryIO, int]:
+    info = zf.getinfo(find_zip_member(zf))
+    return stack.enter_context(zf.open(info)), info.file_size
+
+
 def _load_from_zip_path(zip_path: Path) -> list[dict]:
     with zipfile.ZipFile(zip_path, "r") as zf:
         return _find_and_parse_conversations(zf)
 
 
 def _load_from_file_object(file_obj: BinaryIO) -> list[dict]:
+    if not is_zip_file_object(file_obj):
+        try:
+            return json.load(file_obj)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
     with zipfile.ZipFile(file_obj, "r") as zf:
         return _find_and_parse_conversations(zf)
 
 
 def _find_and_parse_conversations(zf: zipfile.ZipFile) -> list[dict]:
     """Locate conversations.json inside a ZipFile and parse it."""
+    target = find_zip_member(zf)
+    try:
+        with zf.open(target) as f:
+            return json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
+
+
+def find_zip_member(zf: zipfile.ZipFile) -> str:
+    """Return the name of the conversations.json member closest to the root."""
     candidates = [n for n in zf.namelist() if n.endswith("conversations.json")]
     if not candidates:
         raise ExportFormatError(
@@ -63,16 +269,21 @@ def _find_and_parse_conversations(zf: zipfile.ZipFile) -> list[dict]:
             "(Settings → Data Controls → Export Data)."
         )
     # Prefer the shortest path (closest to root)
-    target = min(candidates, key=len)
+    return min(candidates, key=len)
+
+
+def _load_from_directory(dir_path: Path) -> list[dict]:
+    """Load conversations.json from an extracted export directory."""
+    conv_file = find_in_directory(dir_path)
     try:
-        with zf.open(target) as f:
+        with open(conv_file, "r", encoding="utf-8") as f:
             return json.load(f)
     except (json.JSONDecodeError, UnicodeDecodeError) as e:
         raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
 
 
-def _load_from_directory(dir_path: Path) -> list[dict]:
-    """Load conversations.json from an extracted export directory."""
+def find_in_directory(dir_path: Path) -> Path:
+    """Locate conversations.json at the root of a directory or one level deep."""
     conv_file = dir_path / "conversations.json"
 
     # Check one level deep if not at root
@@ -89,9 +300,4 @@ def _load_from_directory(dir_path: Path) -> list[dict]:
             f"No 'conversations.json' found in '{dir_path}'. "
             "Make sure this is an extracted ChatGPT data export."
         )
-
-    try:
-        with open(conv_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, UnicodeDecodeError) as e:
-        raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
+    return conv_file
@@ -0,0 +1,361 @@
+"""Byte-offset index of conversations.json for random access.
+
+Scanning a large export once records where every conversation lives in
+conversations.json. The index is persisted as a small JSON sidecar so later
+runs can jump straight to a single conversation (mmap for extracted
+directories and uncompressed ZIP members) and decode only that one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zipfile
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+from .extractor import (
+    ExportFormatError,
+    find_in_directory,
+    find_zip_member,
+    is_zip_file_object,
+    open_conversations_json,
+)
+from .json_stream import iter_array_elements
+
+INDEX_VERSION = 1
+SIDECAR_SUFFIX = ".c2c-index.json"
+
+
+@dataclass
+class IndexEntry:
+    """Location and headline metadata of one conversation."""
+
+    id: str
+    offset: int
+    length: int
+    title: str
+    create_time: Optional[float] = None
+    update_time: Optional[float] = None
+
+
+@dataclass
+class ConversationIndex:
+    """All index entries of an export, in export order."""
+
+    entries: list[IndexEntry] = field(default_factory=list)
+    fingerprint: Optional[dict] = None
+    _by_id: Optional[dict[str, IndexEntry]] = field(default=None, repr=False, compare=False)
+
+    def by_id(self) -> dict[str, IndexEntry]:
+        """Entries keyed by conversation id, built on first use."""
+        if self._by_id is None:
+            self._by_id = {e.id: e for e in self.entries}
+        return self._by_id
+
+    def get(self, conversation_id: str) -> Optional[IndexEntry]:
+        """Look up an entry by conversation id in O(1)."""
+        return self.by_id().get(conversation_id)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def iter_index_entries(stream: BinaryIO) -> Iterator[tuple[IndexEntry, dict]]:
+    """Scan conversations.json, yielding each entry with its decoded dict.
+
+    Callers that need more than the index (e.g. metadata for the web UI) can
+    compute it from the dict in the same pass.
+    """
+    try:
+        for offset, raw in iter_array_elements(stream):
+            conv = json.loads(raw)
+            yield make_entry(conv, offset, len(raw)), conv
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
+
+
+def make_entry(conv: dict, offset: int, length: int) -> IndexEntry:
+    """Index entry for a decoded conversation found at offset."""
+    return IndexEntry(
+        id=conv.get("id", ""),
+        offset=offset,
+        length=length,
+        title=conv.get("title") or "Untitled",
+        create_time=conv.get("create_time"),
+        update_time=conv.get("update_time"),
+    )
+
+
+def build_index(source: Union[str, Path, BinaryIO]) -> ConversationIndex:
+    """Scan an export once and record every conversation's location."""
+    with ExitStack() as stack:
+        stream, _size = open_conversations_json(source, stack)
+        entries = [entry for entry, _conv in iter_index_entries(stream)]
+    fingerprint = export_fingerprint(source) if isinstance(source, (str, Path)) else None
+    return ConversationIndex(entries=entries, fingerprint=fingerprint)
+
+
+def export_fingerprint(source: Union[str, Path]) -> dict:
+    """Identify an export on disk cheaply, without hashing its contents.
+
+    Uses size and mtime of the file, plus the CRC from the ZIP central
+    directory for ZIP exports.
+    """
+    path = Path(source).resolve()
+    if path.is_dir():
+        conv_file = find_in_directory(path)
+        st = conv_file.stat()
+        return {"path": str(conv_file), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    st = path.stat()
+    fingerprint = {"path": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    with zipfile.ZipFile(path, "r") as zf:
+        info = zf.getinfo(find_zip_member(zf))
+        fingerprint.update(member=info.filename, crc=info.CRC, file_size=info.file_size)
+    return fingerprint
+
+
+def default_cache_dir() -> Path:
+    """Per-user cache directory (honours XDG_CACHE_HOME)."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "chatgpt-to-claude"
+
+
+def sidecar_path(source: Union[str, Path], cache_dir: Optional[Path] = None) -> Path:
+    """Where the index for an export is stored.
+
+    Next to the export by default; inside cache_dir (named by a hash of the
+    export's absolute path) when one is given.
+    """
+    path = Path(source).resolve()
+    if cache_dir is not None:
+        digest = hashlib.sha1(str(path).encode("utf-8")).hexdigest()[:16]
+        return Path(cache_dir) / f"{path.name}-{digest}{SIDECAR_SUFFIX}"
+    if path.is_dir():
+        return path / f"conversations{SIDECAR_SUFFIX}"
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def save_index(index: ConversationIndex, path: Path) -> None:
+    """Write the index sidecar atomically."""
+    payload = {
+        "version": INDEX_VERSION,
+        "fingerprint": index.fingerprint,
+        "entries": [
+            [e.id, e.offset, e.length, e.title, e.create_time, e.update_time]
+            for e in index.entries
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_index(path: Path, fingerprint: Optional[dict] = None) -> Optional[ConversationIndex]:
+    """Read an index sidecar, or return None if missing, stale, or unreadable."""
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        if payload.get("version") != INDEX_VERSION:
+            return None
+        if fingerprint is not None and payload.get("fingerprint") != fingerprint:
+            return None
+        entries = [IndexEntry(*row) for row in payload["entries"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return ConversationIndex(entries=entries, fingerprint=payload.get("fingerprint"))
+
+
+def load_or_build_index(
+    source: Union[str, Path],
+    cache_dir: Optional[Path] = None,
+) -> ConversationIndex:
+    """Reuse a valid sidecar for the export, or scan it and write one.
+
+    Tries the location next to the export first and falls back to the user
+    cache directory when that is not writable.
+    """
+    fingerprint = export_fingerprint(source)
+    locations = (
+        [sidecar_path(source, cache_dir)]
+        if cache_dir is not None
+        else [sidecar_path(source), sidecar_path(source, default_cache_dir())]
+    )
+    for location in locations:
+        index = load_index(location, fingerprint)
+        if index is not None:
+            return index
+
+    index = build_index(source)
+    for location in locations:
+        try:
+            save_index(index, location)
+            break
+        except OSError:
+            continue
+    return index
+
+
+class IndexedExport:
+    """Random access to single conversations of an export through its index.
+
+    Extracted directories and uncompressed (stored) ZIP members are memory
+    mapped, so a lookup decodes only the requested conversation. Compressed
+    ZIP members fall back to seeking the decompressed stream, which skips
+    JSON decoding but still inflates everything before the target.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, Path, BinaryIO],
+        index: Optional[ConversationIndex] = None,
+        cache_dir: Optional[Path] = None,
+    ):
+        if index is None:
+            if isinstance(source, (str, Path)):
+                index = load_or_build_index(source, cache_dir)
+            else:
+                index = build_index(source)
+        self.index = index
+        self._stack = ExitStack()
+        try:
+            self._reader = _open_random_access(source, self._stack)
+        except BaseException:
+            self._stack.close()
+            raise
+
+    def read_raw(self, entry: IndexEntry) -> dict:
+        """Decode the conversation stored at an index entry."""
+        try:
+            return json.loads(self._reader.read(entry.offset, entry.length))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ExportFormatError(
+                f"Index is out of date for conversation '{entry.id}': {e}"
+            ) from e
+
+    def get_raw(self, conversation_id: str) -> Optional[dict]:
+        """Decode a single conversation by id, or return None if unknown."""
+        entry = self.index.get(conversation_id)
+        return self.read_raw(entry) if entry else None
+
+    def select(self, conversation_ids: Optional[Iterable[str]] = None) -> SelectedConversations:
+        """Stream the given conversations (or all of them) in export order."""
+        if conversation_ids is None:
+            return SelectedConversations(self, list(self.index.entries))
+        wanted = set(conversation_ids)
+        entries = [e for e in self.index.entries if e.id in wanted]
+        return SelectedConversations(self, entries)
+
+    def close(self) -> None:
+        self._stack.close()
+
+    def __enter__(self) -> IndexedExport:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SelectedConversations:
+    """Iterable over selected raw conversations with byte-based progress.
+
+    Mirrors ConversationStream's ``size``/``position`` attributes.
+    """
+
+    def __init__(self, export: IndexedExport, entries: list[IndexEntry]):
+        self.export = export
+        self.entries = entries
+        self.size = sum(e.length for e in entries)
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[dict]:
+        for entry in self.entries:
+            raw = self.export.read_raw(entry)
+            self.position += entry.length
+            yield raw
+
+
+class _MappedReader:
+    def __init__(self, buf: mmap.mmap, base: int = 0):
+        self.buf = buf
+        self.base = base
+
+    def read(self, offset: int, length: int) -> bytes:
+        start = self.base + offset
+        return self.buf[start:start + length]
+
+
+class _SeekReader:
+    """Reads by seeking a stream, for sources that cannot be memory mapped.
+
+    On a compressed ZIP member every seek inflates from the nearest earlier
+    position (the start, when seeking backwards), so a read costs time
+    proportional to its offset, not its length.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self._lock = threading.Lock()  # seek + read must not interleave
+
+    def read(self, offset: int, length: int) -> bytes:
+        with self._lock:
+            self.stream.seek(offset)
+            return self.stream.read(length)
+
+
+def _open_random_access(source: Union[str, Path, BinaryIO], stack: ExitStack):
+    """Open conversations.json for reads at arbitrary offsets.
+
+    Extracted files and stored ZIP members are memory mapped; anything else,
+    notably a deflated ZIP member, gets a _SeekReader, which re-inflates up to
+    each offset. Reads in export order (as SelectedConversations does) inflate
+    the member at most once.
+    """
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.is_dir():
+            handle = stack.enter_context(open(find_in_directory(path), "rb"))
+            return _map_or_seek(handle, stack)
+        if path.is_file() and path.suffix == ".zip":
+            handle = stack.enter_context(open(path, "rb"))
+            zf = stack.enter_context(zipfile.ZipFile(handle, "r"))
+            info = zf.getinfo(find_zip_member(zf))
+            if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                reader = _map_or_seek(handle, stack)
+                if isinstance(reader, _MappedReader):
+                    reader.base = _zip_data_offset(handle, info)
+                    return reader
+            return _SeekReader(stack.enter_context(zf.open(info)))
+    elif is_zip_file_object(source):
+        zf = stack.enter_context(zipfile.ZipFile(source, "r"))
+        return _SeekReader(stack.enter_context(zf.open(find_zip_member(zf))))
+
+    stream, _size = open_conversations_json(source, stack)
+    return _SeekReader(stream)
+
+
+def _map_or_seek(handle: BinaryIO, stack: ExitStack):
+    try:
+        buf = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):  # empty file or no mmap support
+        return _SeekReader(handle)
+    stack.callback(buf.close)
+    return _MappedReader(buf)
+
+
+def _zip_data_offset(handle: BinaryIO, info: zipfile.ZipInfo) -> int:
+    """Absolute offset of a member's data, just past its local file header."""
+    handle.seek(info.header_offset)
+    header = handle.read(30)
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    return info.header_offset + 30 + name_len + extra_len
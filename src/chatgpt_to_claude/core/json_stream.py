@@ -0,0 +1,222 @@
+"""Incremental scanning of a top-level JSON array.
+
+conversations.json is one large array of conversation objects. Rather than
+decoding the whole document at once, the scanner finds where each element
+starts and ends in the raw byte stream so that elements can be decoded (or
+just located) one at a time.
+
+The scan never walks the input byte by byte in Python. Escapes are
+neutralised with bytes.replace, strings are separated from structure with
+bytes.split on '"', and nesting depth is tracked with itertools over the
+remaining brackets only.
+"""
+
+from __future__ import annotations
+
+import re
+from itertools import accumulate, compress, count, islice, repeat
+from operator import eq
+from typing import BinaryIO, Iterator
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+_BOM = b"\xef\xbb\xbf"
+_NUL = 0x00
+_BACKSLASH = 0x5C
+
+# Keep only brackets (and the NUL separators we insert between string gaps)
+_NON_STRUCTURAL = bytes(b for b in range(256) if b not in b"{}[]\x00")
+_DEPTH_DELTA = [0] * 256
+for _b in b"{[":
+    _DEPTH_DELTA[_b] = 1
+for _b in b"}]":
+    _DEPTH_DELTA[_b] = -1
+
+_BRACKET_RE = re.compile(rb"[{}\[\]]")
+_LEADING_RE = re.compile(rb"[ \t\r\n]*")
+_SEPARATOR_RE = re.compile(rb"[ \t\r\n]*,[ \t\r\n]*")
+
+
+class _ArrayScanner:
+    """Buffered scanner tracking string state and depth across reads.
+
+    Depth is relative to the array interior: 0 between elements, 1 inside a
+    top-level element, -1 once the closing ']' of the array is reached.
+    """
+
+    def __init__(self, stream: BinaryIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.data = bytearray()
+        self.base = 0  # absolute offset of data[0]
+        self.scanned = 0  # bytes of data already folded into depth/in_string
+        self.depth = 0
+        self.in_string = False
+        self.eof = False
+
+    def read(self) -> bool:
+        """Read another chunk. Returns False once the stream is exhausted."""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.data += chunk
+        return True
+
+    def discard(self, pos: int) -> None:
+        """Drop everything before relative position pos."""
+        if pos:
+            del self.data[:pos]
+            self.base += pos
+            self.scanned -= pos
+
+    def scan(self) -> tuple[list[int], int]:
+        """Fold newly buffered bytes into the scan state.
+
+        Returns:
+            (element_ends, close_pos): relative positions just past each
+            top-level closing bracket, and the position just past the array's
+            closing ']' (or -1 if it has not been reached yet).
+        """
+        data = self.data
+        start = self.scanned
+        end = len(data)
+        if not self.eof:
+            # Never split an escape sequence across two scans
+            while end > start and data[end - 1] == _BACKSLASH:
+                end -= 1
+        if end <= start:
+            return [], -1
+
+        cleaned = bytes(data[start:end]).replace(b"\\\\", b"__").replace(b'\\"', b"__")
+        parts = cleaned.split(b'"')
+        first_outside = 1 if self.in_string else 0
+        skeleton = b"\x00".join(parts[first_outside::2]).translate(None, _NON_STRUCTURAL)
+
+        depths = list(accumulate(map(_DEPTH_DELTA.__getitem__, skeleton), initial=self.depth))
+        del depths[0]
+        close_idx = next(compress(count(), map(eq, repeat(-1), depths)), -1)
+        limit = close_idx if close_idx >= 0 else len(skeleton)
+        hits = [
+            i for i in compress(count(), map(eq, repeat(0), islice(depths, limit)))
+            if skeleton[i] != _NUL
+        ]
+        if close_idx >= 0:
+            hits.append(close_idx)
+
+        # Map skeleton indices back to positions in the raw buffer
+        positions = []
+        nul_count = 0
+        prev_idx = 0
+        part_idx = 0
+        part_offset = start
+        for i in hits:
+            nul_count += skeleton.count(b"\x00", prev_idx, i)
+            prev_idx = i
+            nth_bracket = i - skeleton.rfind(b"\x00", 0, i) - 1
+            target = first_outside + 2 * nul_count
+            part_offset += sum(map(len, islice(parts, part_idx, target))) + (target - part_idx)
+            part_idx = target
+            bracket = next(islice(_BRACKET_RE.finditer(parts[target]), nth_bracket, None))
+            positions.append(part_offset + bracket.end())
+
+        if close_idx >= 0:
+            self.depth = -1
+            self.scanned = positions[-1]
+            return positions[:-1], positions[-1]
+
+        if depths:
+            self.depth = depths[-1]
+        self.in_string ^= (len(parts) - 1) % 2 == 1
+        self.scanned = end
+        return positions, -1
+
+
+def iter_array_elements(
+    stream: BinaryIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[int, bytes]]:
+    """Yield (byte offset, raw bytes) for each element of a top-level JSON array.
+
+    Elements must be objects or arrays, which is always the case for
+    conversations.json. Only the current element (plus at most one read chunk)
+    is held in memory. Element bytes are returned undecoded; pass them to
+    json.loads.
+
+    Raises:
+        ValueError: If the stream is not a JSON array of objects/arrays, or is
+            truncated.
+    """
+    scanner = _ArrayScanner(stream, chunk_size)
+
+    while len(scanner.data) < len(_BOM) and scanner.read():
+        pass
+    if scanner.data.startswith(_BOM):
+        scanner.discard(len(_BOM))
+    while True:
+        pos = _LEADING_RE.match(scanner.data).end()
+        if pos < len(scanner.data) or not scanner.read():
+            break
+    if pos >= len(scanner.data) or scanner.data[pos] != 0x5B:  # '['
+        raise ValueError("Expected a JSON array at the top level")
+    scanner.discard(pos + 1)
+    scanner.scanned = 0
+
+    cursor = 0  # relative position just past the previous element (or '[')
+    first = True
+    while True:
+        ends, close_pos = scanner.scan()
+        data = scanner.data
+
+        for end in ends:
+            gap = (_LEADING_RE if first else _SEPARATOR_RE).match(data, cursor)
+            start = gap.end() if gap else cursor
+            if gap is None or data[start] not in b"{[":
+                raise ValueError(
+                    f"Expected an object or array element at byte {scanner.base + start}"
+                )
+            yield scanner.base + start, bytes(data[start:end])
+            cursor = end
+            first = False
+
+        if close_pos >= 0:
+            gap = _LEADING_RE.match(data, cursor)
+            if gap.end() != close_pos - 1 or data[close_pos - 1] != 0x5D:  # ']'
+                raise ValueError(f"Malformed array near byte {scanner.base + gap.end()}")
+            return
+
+        scanner.discard(cursor)
+        cursor = 0
+        if not scanner.read():
+            raise ValueError("Unexpected end of data: array is not closed")
+
+
+def iter_array_chunks(
+    stream: BinaryIO,
+    target_size: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[int, int, bytes]]:
+    """Group consecutive array elements into self-contained JSON arrays.
+
+    Each chunk holds whole elements totalling roughly target_size bytes, so it
+    can be decoded independently with a single json.loads call.
+
+    Yields:
+        (byte offset just past the chunk's last element, element count,
+        b"[elem,elem,...]").
+    """
+    batch: list[bytes] = []
+    batch_bytes = 0
+    end = 0
+    for offset, raw in iter_array_elements(stream, chunk_size):
+        batch.append(raw)
+        batch_bytes += len(raw)
+        end = offset + len(raw)
+        if batch_bytes >= target_size:
+            yield end, len(batch), b"[" + b",".join(batch) + b"]"
+            batch = []
+            batch_bytes = 0
+    if batch:
+        yield end, len(batch), b"[" + b",".join(batch) + b"]"
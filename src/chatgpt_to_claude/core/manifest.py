@@ -0,0 +1,175 @@
+"""Manifest of a previous conversion, for incremental re-runs.
+
+``convert`` records, for every conversation it wrote, the export's
+update_time, a hash of the conversation's raw JSON, the files produced and
+the summary used by the index and statistics. The next run over the same
+output directory hashes each conversation's raw bytes and only decodes,
+parses and renders those whose hash is new; unchanged ones reuse their files
+and summary, and files nobody produced this time are removed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .. import __version__
+from .models import ConversationSummary
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = ".c2c-manifest.json"
+
+
+def content_hash(raw: bytes) -> str:
+    """Hash of one conversation's raw JSON bytes."""
+    return content_hasher(raw).hexdigest()
+
+
+def content_hasher(raw: bytes = b""):
+    """Incremental form of content_hash, for data read in chunks."""
+    return hashlib.blake2b(raw, digest_size=16)
+
+
+@dataclass
+class ManifestEntry:
+    """What a previous run knew and wrote for one conversation."""
+
+    update_time: Optional[float]
+    content_hash: str
+    summary: ConversationSummary
+
+
+@dataclass
+class Manifest:
+    """Conversations written to an output directory, keyed by id.
+
+    ``options`` identifies the rendering options (and tool version) the files
+    were produced with; files written under other options are never reused.
+    """
+
+    options: dict
+    entries: dict[str, ManifestEntry] = field(default_factory=dict)
+
+    def output_paths(self) -> set[str]:
+        """Every file recorded, relative to the output directory."""
+        return {p for e in self.entries.values() for p in e.summary.output_paths}
+
+    def reusable(self, output_dir: Path) -> dict[str, str]:
+        """Map content hash to id for conversations whose files all still exist.
+
+        The hash covers the conversation's whole raw JSON, update_time
+        included, so a match means nothing changed. Ids that occur more than
+        once in the export (stored as "id#", "id##" ...) are always
+        re-converted.
+        """
+        return {
+            entry.content_hash: conv_id
+            for conv_id, entry in self.entries.items()
+            if conv_id + "#" not in self.entries and not conv_id.endswith("#")
+            and all((output_dir / p).is_file() for p in entry.summary.output_paths)
+        }
+
+
+def options_key(options) -> dict:
+    """JSON-comparable description of ConvertOptions plus the tool version."""
+    key = {
+        name: value.value if hasattr(value, "value") else value
+        for name, value in asdict(options).items()
+    }
+    key["version"] = __version__
+    return key
+
+
+def manifest_path(output_dir: Path) -> Path:
+    return Path(output_dir) / MANIFEST_NAME
+
+
+def save_manifest(manifest: Manifest, output_dir: Path) -> None:
+    """Write the manifest atomically."""
+    payload = {
+        "version": MANIFEST_VERSION,
+        "options": manifest.options,
+        "conversations": {
+            conv_id: [e.update_time, e.content_hash, _summary_row(e.summary)]
+            for conv_id, e in manifest.entries.items()
+        },
+    }
+    path = manifest_path(output_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_manifest(output_dir: Path) -> Optional[Manifest]:
+    """Read the manifest of an output directory, or None if missing or unreadable."""
+    try:
+        payload = json.loads(manifest_path(output_dir).read_text(encoding="utf-8"))
+        if payload.get("version") != MANIFEST_VERSION:
+            return None
+        entries = {
+            conv_id: ManifestEntry(update_time, digest, _summary_from_row(conv_id, row))
+            for conv_id, (update_time, digest, row) in payload["conversations"].items()
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return Manifest(options=payload.get("options") or {}, entries=entries)
+
+
+def remove_stale_outputs(output_dir: Path, stale: set[str]) -> int:
+    """Delete files from a previous run and any directories left empty.
+
+    Entries that resolve outside output_dir (absolute paths, "..", links
+    out of the directory) are ignored rather than deleted.
+    """
+    removed = 0
+    parents = set()
+    root = output_dir.resolve()
+    for rel in stale:
+        path = output_dir / rel
+        if not path.resolve().is_relative_to(root) or path.resolve() == root:
+            continue
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed += 1
+        parents.update(p for p in path.parents if output_dir in p.parents)
+
+    # Deepest first, so emptied parents can go too
+    for directory in sorted(parents, key=lambda p: len(p.parts), reverse=True):
+        try:
+            directory.rmdir()
+        except OSError:
+            pass
+    return removed
+
+
+def _summary_row(summary: ConversationSummary) -> list:
+    return [
+        summary.title,
+        summary.create_time,
+        summary.message_count,
+        sorted(summary.model_slugs),
+        summary.messages_by_role,
+        summary.model_counts,
+        summary.output_paths,
+    ]
+
+
+def _summary_from_row(conv_id: str, row: list) -> ConversationSummary:
+    title, create_time, message_count, slugs, by_role, model_counts, paths = row
+    return ConversationSummary(
+        id=conv_id,
+        title=title,
+        create_time=create_time,
+        message_count=message_count,
+        model_slugs=set(slugs),
+        messages_by_role=by_role,
+        model_counts=model_counts,
+        output_paths=paths,
+    )
@@ -2,15 +2,21 @@
 
 from __future__ import annotations
 
-import yaml
+import io
+import math
+import re
+from itertools import chain
+from typing import Iterable, Optional, TextIO, Union
 
 from .models import (
     ContentPart,
     ContentType,
     Conversation,
+    ConversationSummary,
     Message,
     OrganizeMode,
 )
+from .timestamps import date_key, month_heading
 
 
 ROLE_LABELS = {
@@ -36,40 +42,137 @@ def conversation_to_markdown(
     Returns:
         A complete Markdown document as a string.
     """
+    buf = io.StringIO()
+    write_markdown(conversation, buf, include_frontmatter, include_model_info)
+    return buf.getvalue()
+
+
+def write_markdown(
+    conversation: Conversation,
+    sink: TextIO,
+    include_frontmatter: bool = True,
+    include_model_info: bool = True,
+) -> None:
+    """Render a Conversation incrementally into a text sink.
+
+    Messages are rendered and written one at a time, so the document never
+    exists as a single string. Any object with a ``write(str)`` method works:
+    an open file, a ZIP member wrapped in io.TextIOWrapper, a socket's
+    makefile("w").
+    """
     if not conversation.messages:
-        return ""
+        return
+
+    write_sections(
+        chain(
+            render_header(conversation, include_frontmatter),
+            (render_message(msg, include_model_info) for msg in conversation.messages),
+        ),
+        sink,
+    )
 
-    sections = []
 
-    if include_frontmatter:
-        sections.append(_render_frontmatter(conversation))
+def write_sections(sections: Iterable[str], sink: TextIO) -> None:
+    """Write sections to sink exactly as ``"\\n".join(sections)`` would read."""
+    first = True
+    for section in sections:
+        if not first:
+            sink.write("\n")
+        sink.write(section)
+        first = False
 
-    sections.append(f"# {conversation.title}\n")
 
-    for msg in conversation.messages:
-        sections.append(_render_message(msg, include_model_info))
+def render_header(conversation: Conversation, include_frontmatter: bool = True) -> list[str]:
+    """Render the sections preceding the messages (frontmatter and title).
 
-    return "\n".join(sections)
+    The document is these sections followed by one render_message section
+    per message, joined with ``"\\n"``.
+    """
+    sections = []
+    if include_frontmatter:
+        sections.append(_render_frontmatter(conversation))
+    sections.append(f"# {conversation.title}\n")
+    if conversation.context_note:
+        sections.append(f"> {conversation.context_note}\n")
+    return sections
 
 
 def _render_frontmatter(conversation: Conversation) -> str:
     """Generate YAML frontmatter block."""
     meta = {"title": conversation.title, "source": "chatgpt-export"}
 
-    if conversation.created_at:
+    if conversation.create_time is not None:
         meta["created"] = conversation.created_at.isoformat()
-    if conversation.updated_at:
+    if conversation.update_time is not None:
         meta["updated"] = conversation.updated_at.isoformat()
     if conversation.model_slugs:
         meta["models"] = sorted(conversation.model_slugs)
 
     meta["message_count"] = len(conversation.messages)
 
-    frontmatter = yaml.dump(meta, default_flow_style=False, allow_unicode=True).strip()
-    return f"---\n{frontmatter}\n---\n"
+    return f"---\n{_emit_yaml_mapping(meta)}\n---\n"
 
 
-def _render_message(message: Message, include_model: bool) -> str:
+# Strings that can be written as plain YAML scalars: start with a letter, no
+# indicators (":", "#", quotes, brackets...) and nothing YAML would resolve
+# to a bool or null
+_PLAIN_SAFE_RE = re.compile(r"[^\W\d](?:[\w .,()/'!?+&-]*[\w.)/'!?+&-])?")
+_YAML_RESERVED_WORDS = {"yes", "no", "true", "false", "on", "off", "null"}
+# Characters outside YAML's printable set, plus those PyYAML escapes anyway
+_NEEDS_ESCAPE_RE = re.compile('[\x00-\x1f\x7f-\x9f\u2028\u2029\ufeff\ufffe\uffff\ud800-\udfff]')
+_DOUBLE_QUOTE_ESCAPE_RE = re.compile(
+    '[\x00-\x1f\x7f-\x9f\u2028\u2029\ufeff\ufffe\uffff\ud800-\udfff"\\\\]'
+)
+_DOUBLE_QUOTE_ESCAPES = {'"': '\\"', "\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+
+
+def _emit_yaml_mapping(meta: dict) -> str:
+    """Emit a flat mapping in block style with sorted keys, like yaml.dump.
+
+    Handles the frontmatter schema (strings, ints, string lists) directly;
+    PyYAML is imported only for values of any other type.
+    """
+    lines = []
+    for key in sorted(meta):
+        value = meta[key]
+        if isinstance(value, list) and all(isinstance(v, str) for v in value) and value:
+            lines.append(f"{key}:")
+            lines.extend(f"- {_emit_yaml_string(v)}" for v in value)
+        elif isinstance(value, str):
+            lines.append(f"{key}: {_emit_yaml_string(value)}")
+        elif isinstance(value, int) and not isinstance(value, bool):
+            lines.append(f"{key}: {value}")
+        else:
+            import yaml
+
+            lines.append(
+                yaml.safe_dump({key: value}, default_flow_style=False, allow_unicode=True).strip()
+            )
+    return "\n".join(lines)
+
+
+def _emit_yaml_string(value: str) -> str:
+    """Quote a string only when it is not safe as a plain scalar.
+
+    Like PyYAML: single quotes unless the string needs escape sequences.
+    """
+    if _PLAIN_SAFE_RE.fullmatch(value) and value.lower() not in _YAML_RESERVED_WORDS:
+        return value
+    if not _NEEDS_ESCAPE_RE.search(value):
+        return "'" + value.replace("'", "''") + "'"
+    return '"' + _DOUBLE_QUOTE_ESCAPE_RE.sub(_escape_yaml_char, value) + '"'
+
+
+def _escape_yaml_char(match: re.Match) -> str:
+    char = match.group()
+    escape = _DOUBLE_QUOTE_ESCAPES.get(char)
+    if escape:
+        return escape
+    code = ord(char)
+    return f"\\x{code:02x}" if code <= 0xFF else f"\\u{code:04x}"
+
+
+def render_message(message: Message, include_model: bool = True) -> str:
     """Render a single message as Markdown."""
     role_label = ROLE_LABELS.get(message.author_role.value, message.author_role.value.title())
 
@@ -79,14 +182,18 @@ def _render_message(message: Message, include_model: bool) -> str:
     else:
         header = f"## {role_label}"
 
+    return f"{header}\n\n{render_message_body(message)}\n"
+
+
+def render_message_body(message: Message) -> str:
+    """Render a message's content parts, without the role header."""
     content_lines = []
     for part in message.content_parts:
         rendered = _render_content_part(part)
         if rendered:
             content_lines.append(rendered)
 
-    content = "\n\n".join(content_lines)
-    return f"{header}\n\n{content}\n"
+    return "\n\n".join(content_lines)
 
 
 def _render_content_part(part: ContentPart) -> str:
@@ -122,11 +229,22 @@ def _render_content_part(part: ContentPart) -> str:
 
 
 def generate_index(
-    conversations: list[Conversation],
+    conversations: list[Union[Conversation, ConversationSummary]],
     organize_mode: OrganizeMode,
+    skipped: Optional[list[str]] = None,
 ) -> str:
-    """Generate an INDEX.md with a table of contents."""
-    from .organizer import resolve_output_path
+    """Generate an INDEX.md with a table of contents.
+
+    Accepts full conversations or the ConversationSummary kept by a streaming
+    conversion. ``skipped`` lists the errors of conversations that could not
+    be converted; they get a section of their own at the end.
+    """
+    from .statistics import summarize_conversation
+
+    conversations = [
+        summarize_conversation(c) if isinstance(c, Conversation) else c
+        for c in conversations
+    ]
 
     lines = [
         "# ChatGPT Export — Conversation Index",
@@ -142,18 +260,18 @@ def generate_index(
     # Sort by date (newest first)
     sorted_convs = sorted(
         conversations,
-        key=lambda c: c.created_at or _MIN_DT,
+        key=lambda c: c.create_time if c.create_time is not None else -math.inf,
         reverse=True,
     )
 
     current_month = None
     for conv in sorted_convs:
-        if not conv.messages:
+        if not conv.message_count:
             continue
 
-        if conv.created_at:
-            month_label = conv.created_at.strftime("%B %Y")
-            date_str = conv.created_at.strftime("%Y-%m-%d")
+        if conv.create_time is not None:
+            month_label = month_heading(conv.create_time)
+            date_str = date_key(conv.create_time)
         else:
             month_label = "Unknown Date"
             date_str = "?"
@@ -163,17 +281,15 @@ def generate_index(
             lines.append(f"### {month_label}")
             lines.append("")
 
-        msg_count = len(conv.messages)
+        msg_count = conv.message_count
         models = ", ".join(sorted(conv.model_slugs)) if conv.model_slugs else ""
         model_info = f" | {models}" if models else ""
 
         lines.append(f"- **{conv.title}** — {date_str}, {msg_count} messages{model_info}")
 
+    if skipped:
+        lines.extend(["", "## Skipped", ""])
+        lines.extend(f"- {error}" for error in skipped)
+
     lines.append("")
     return "\n".join(lines)
-
-
-# Sentinel for sorting conversations without dates
-from datetime import datetime, timezone
-
-_MIN_DT = datetime.min.replace(tzinfo=timezone.utc)
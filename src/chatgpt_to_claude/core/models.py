@@ -7,6 +7,8 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
+from .timestamps import EpochDatetime
+
 
 class AuthorRole(Enum):
     USER = "user"
@@ -31,9 +33,21 @@ class OrganizeMode(Enum):
     YEARLY = "yearly"
 
 
-@dataclass
+class SizeUnit(Enum):
+    """What a split size limit counts."""
+
+    CHARS = "chars"
+    BYTES = "bytes"  # UTF-8
+    TOKENS = "tokens"  # estimated
+
+
+@dataclass(slots=True)
 class ContentPart:
-    """A single part of message content."""
+    """A single part of message content.
+
+    Slotted like the other per-message models: a text-only part is one small
+    object with no per-instance __dict__.
+    """
 
     content_type: ContentType
     text: Optional[str] = None
@@ -43,37 +57,96 @@ class ContentPart:
     title: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     id: str
     author_role: AuthorRole
     content_parts: list[ContentPart]
-    created_at: Optional[datetime] = None
+    create_time: Optional[float] = None  # epoch seconds
     model_slug: Optional[str] = None
+    _created_at: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
 
+    created_at = EpochDatetime("create_time", "_created_at")
 
-@dataclass
+
+@dataclass(slots=True)
+class Branch:
+    """An edit or regeneration that is not on the displayed path.
+
+    The branch continues its parent (0 for the displayed conversation, else
+    another branch's number) after the parent's first fork_index messages;
+    messages holds only what follows, never the shared prefix.
+    """
+
+    number: int
+    parent: int
+    fork_index: int
+    messages: list[Message] = field(default_factory=list)
+
+
+@dataclass(slots=True)
 class ConversationMeta:
-    """Lightweight metadata for fast preview without full parse."""
+    """Lightweight metadata for fast preview without full parse.
+
+    Counts cover user and assistant messages across the whole mapping.
+    """
 
     id: str
     title: str
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    create_time: Optional[float] = None  # epoch seconds
+    update_time: Optional[float] = None
     message_count: int = 0
     model_slugs: set[str] = field(default_factory=set)
+    messages_by_role: dict[str, int] = field(default_factory=dict)
+    model_counts: dict[str, int] = field(default_factory=dict)
+    content_types: dict[str, int] = field(default_factory=dict)
+    first_message_time: Optional[float] = None
+    last_message_time: Optional[float] = None
+    _created_at: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _updated_at: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
 
+    created_at = EpochDatetime("create_time", "_created_at")
+    updated_at = EpochDatetime("update_time", "_updated_at")
 
-@dataclass
+
+@dataclass(slots=True)
 class Conversation:
     """Fully parsed conversation with ordered messages."""
 
     id: str
     title: str
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    create_time: Optional[float] = None  # epoch seconds
+    update_time: Optional[float] = None
     messages: list[Message] = field(default_factory=list)
     model_slugs: set[str] = field(default_factory=set)
+    branches: list[Branch] = field(default_factory=list)  # only when all branches are requested
+    context_note: Optional[str] = None  # shown under the title
+    _created_at: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _updated_at: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    created_at = EpochDatetime("create_time", "_created_at")
+    updated_at = EpochDatetime("update_time", "_updated_at")
+
+
+@dataclass
+class ConversationSummary:
+    """What the index and statistics need once a conversation is written.
+
+    Kept instead of the full Conversation so that memory during a conversion
+    does not grow with the number of messages in the export.
+    """
+
+    id: str
+    title: str
+    create_time: Optional[float] = None  # epoch seconds
+    message_count: int = 0
+    model_slugs: set[str] = field(default_factory=set)
+    messages_by_role: dict[str, int] = field(default_factory=dict)
+    model_counts: dict[str, int] = field(default_factory=dict)
+    output_paths: list[str] = field(default_factory=list)
+    _created_at: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    created_at = EpochDatetime("create_time", "_created_at")
 
 
 @dataclass
@@ -84,3 +157,4 @@ class ExportStatistics:
     models_used: dict[str, int] = field(default_factory=dict)
     messages_by_role: dict[str, int] = field(default_factory=dict)
     conversations_by_month: dict[str, int] = field(default_factory=dict)
+    content_types: dict[str, int] = field(default_factory=dict)  # metadata scans only
@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import re
 from pathlib import Path
+from typing import AbstractSet
 
 from .models import Conversation, OrganizeMode
+from .timestamps import month_key, year_key
 
 
 def resolve_output_path(
@@ -28,11 +30,11 @@ def resolve_output_path(
     if mode == OrganizeMode.FLAT:
         return base_dir / f"{safe_name}.md"
 
-    if conversation.created_at:
+    if conversation.create_time is not None:
         if mode == OrganizeMode.MONTHLY:
-            subdir = conversation.created_at.strftime("%Y-%m")
+            subdir = month_key(conversation.create_time)
         else:  # YEARLY
-            subdir = conversation.created_at.strftime("%Y")
+            subdir = year_key(conversation.create_time)
     else:
         subdir = "undated"
 
@@ -60,23 +62,29 @@ def sanitize_filename(title: str, max_length: int = 100) -> str:
     return safe[:max_length]
 
 
-def deduplicate_path(path: Path, used_paths: dict[str, int]) -> Path:
+def deduplicate_path(
+    path: Path,
+    used_paths: dict[str, int],
+    reserved: AbstractSet[str] = frozenset(),
+) -> Path:
     """Append a numeric suffix if the path has already been used.
 
     Args:
         path: The desired output path.
         used_paths: A dict tracking path usage counts (mutated in-place).
+        reserved: Lower-cased paths that are taken but not in used_paths,
+                  such as files kept from a previous incremental run.
 
     Returns:
         A unique path, possibly with a numeric suffix.
     """
     path_key = str(path).lower()  # Case-insensitive on Windows
-    if path_key in used_paths:
-        used_paths[path_key] += 1
-        stem = path.stem
-        suffix = path.suffix
-        new_name = f"{stem}_{used_paths[path_key]}{suffix}"
-        return path.with_name(new_name)
-    else:
+    if path_key not in used_paths:
         used_paths[path_key] = 0
-        return path
+        if path_key not in reserved:
+            return path
+    while True:
+        used_paths[path_key] += 1
+        candidate = path.with_name(f"{path.stem}_{used_paths[path_key]}{path.suffix}")
+        if str(candidate).lower() not in reserved:
+            return candidate
@@ -0,0 +1,151 @@
+"""Multi-process decoding and parsing of conversations.json.
+
+The main process only finds element boundaries (see json_stream) and groups
+whole conversations into byte chunks. Worker processes run json.loads and the
+parser on those chunks; results come back in export order.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Union
+
+from .extractor import ExportFormatError, open_conversations_json
+from .json_stream import iter_array_chunks
+from .parser import parse_conversations
+from .stages import BoundedStage, StageStats
+
+DEFAULT_BATCH_BYTES = 4 << 20  # 4 MiB of JSON per task
+# Workers start from a clean server process rather than forking this one,
+# whose reader and writer threads may hold locks at the time
+START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Translate a --jobs value into a worker count (0 means all CPUs)."""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+class ParallelExportReader:
+    """Run a chunk worker over conversations.json in a process pool.
+
+    ``worker`` receives one chunk (a JSON array of whole conversations, as
+    bytes) and returns a list of results; the reader yields those results
+    flattened and in export order. Reading and chunking the file runs in a
+    background thread, at most ``2 * jobs`` chunks ahead of submission, and at
+    most ``2 * jobs`` chunks are in flight in the pool, which bounds memory
+    regardless of export size.
+
+    ``initializer(*initargs)`` runs once in every worker process, e.g. to
+    hand it data shared by all chunks instead of pickling it with each one.
+
+    Like ConversationStream, exposes ``size`` and ``position`` in bytes, and
+    per-stage progress through ``stats()``.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, Path, BinaryIO],
+        worker: Callable[[bytes], list],
+        jobs: int,
+        batch_bytes: int = DEFAULT_BATCH_BYTES,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: tuple = (),
+    ):
+        self.worker = worker
+        self.initializer = initializer
+        self.initargs = initargs
+        self.jobs = resolve_jobs(jobs)
+        self.batch_bytes = batch_bytes
+        self.position = 0
+        self.results = 0
+        self._read_stage: Optional[BoundedStage] = None
+        self._in_flight = 0
+        self._started: Optional[float] = None
+        self._stack = ExitStack()
+        try:
+            self._file, self.size = open_conversations_json(source, self._stack)
+        except BaseException:
+            self._stack.close()
+            raise
+
+    def __iter__(self) -> Iterator[Any]:
+        pool = ProcessPoolExecutor(
+            max_workers=self.jobs,
+            mp_context=multiprocessing.get_context(START_METHOD),
+            initializer=self.initializer,
+            initargs=self.initargs,
+        )
+        pending: deque[tuple[int, Future]] = deque()
+        self._started = time.monotonic()
+        self._read_stage = BoundedStage(
+            "read", iter_array_chunks(self._file, self.batch_bytes), maxsize=2 * self.jobs,
+        )
+        try:
+            for end, _count, raw in self._read_stage:
+                pending.append((end, pool.submit(self.worker, raw)))
+                self._in_flight = len(pending)
+                if len(pending) >= 2 * self.jobs:
+                    yield from self._collect(pending.popleft())
+            while pending:
+                yield from self._collect(pending.popleft())
+            if self.size is not None:
+                self.position = self.size
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
+        finally:
+            self._read_stage.close()
+            pool.shutdown(wait=True, cancel_futures=True)
+            self._stack.close()
+
+    def stats(self) -> list[StageStats]:
+        """Read stage (chunks queued) and worker stage (chunks in flight)."""
+        if self._read_stage is None:
+            return []
+        elapsed = time.monotonic() - self._started
+        return [
+            self._read_stage.stats(),
+            StageStats("render", self._in_flight, 2 * self.jobs, self.results, elapsed),
+        ]
+
+    def _collect(self, item: tuple[int, Future]) -> list:
+        end, future = item
+        results = future.result()
+        self.position = end
+        self.results += len(results)
+        self._in_flight -= 1
+        return results
+
+    def close(self) -> None:
+        self._stack.close()
+
+
+def parse_conversations_parallel(
+    source: Union[str, Path, BinaryIO],
+    jobs: int,
+    metadata_only: bool = False,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+) -> ParallelExportReader:
+    """Parallel equivalent of parse_conversations(iter_conversations(source)).
+
+    Yields Conversation (or ConversationMeta) objects in export order.
+    """
+    worker = partial(_parse_chunk, metadata_only=metadata_only)
+    return ParallelExportReader(source, worker, jobs, batch_bytes)
+
+
+def _parse_chunk(raw: bytes, metadata_only: bool) -> list:
+    """Worker: decode one chunk and parse every conversation in it."""
+    return list(parse_conversations(json.loads(raw), metadata_only=metadata_only))
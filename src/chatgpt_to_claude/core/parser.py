@@ -2,34 +2,65 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Iterator, Union, overload
+import sys
+import time
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional, Union, overload
 
 from .content_handlers import render_content
+from .extractor import ExportFormatError
 from .models import (
     AuthorRole,
+    Branch,
     Conversation,
     ConversationMeta,
     Message,
 )
+from .timestamps import parse_epoch
+
+# Guards against corrupted or hand-edited trees
+MAX_TREE_DEPTH = 100_000  # nodes on a single walk
+TIME_BUDGET = 10.0  # seconds of traversal per conversation
+_CLOCK_INTERVAL = 1024  # nodes between deadline checks
+
+ErrorHandler = Callable[[dict, "MalformedConversationError"], None]
+
+
+class MalformedConversationError(ExportFormatError):
+    """A conversation's message tree cannot be traversed safely."""
 
 
 @overload
-def parse_conversations(raw_data: list[dict], metadata_only: bool = False) -> Iterator[Conversation]: ...
+def parse_conversations(
+    raw_data: Iterable[dict], metadata_only: bool = False, all_branches: bool = False,
+    on_error: Optional[ErrorHandler] = None,
+) -> Iterator[Conversation]: ...
 
 @overload
-def parse_conversations(raw_data: list[dict], metadata_only: bool = True) -> Iterator[ConversationMeta]: ...
+def parse_conversations(
+    raw_data: Iterable[dict], metadata_only: bool = True, all_branches: bool = False,
+    on_error: Optional[ErrorHandler] = None,
+) -> Iterator[ConversationMeta]: ...
 
 def parse_conversations(
-    raw_data: list[dict],
+    raw_data: Iterable[dict],
     metadata_only: bool = False,
+    all_branches: bool = False,
+    on_error: Optional[ErrorHandler] = None,
 ) -> Iterator[Union[ConversationMeta, Conversation]]:
     """Yield parsed conversations from raw JSON data.
 
     Args:
-        raw_data: The parsed conversations.json list.
+        raw_data: The parsed conversations.json list, or any iterable of raw
+                  conversation dicts such as a ConversationStream.
         metadata_only: If True, yield ConversationMeta (fast, for previews).
                        If False, yield full Conversation objects.
+        all_branches: Also collect edits and regenerations that are not on
+                      the displayed path into Conversation.branches.
+        on_error: Called with the raw conversation and the error when its
+                  tree is malformed (cycles, runaway depth, over the time
+                  budget); the conversation is then skipped. Without it the
+                  MalformedConversationError propagates.
 
     Yields:
         ConversationMeta or Conversation objects.
@@ -37,31 +68,45 @@ def parse_conversations(
     for raw_conv in raw_data:
         conv_id = raw_conv.get("id", "")
         title = raw_conv.get("title") or "Untitled"
-        created_at = _parse_timestamp(raw_conv.get("create_time"))
-        updated_at = _parse_timestamp(raw_conv.get("update_time"))
+        create_time = parse_epoch(raw_conv.get("create_time"))
+        update_time = parse_epoch(raw_conv.get("update_time"))
         mapping = raw_conv.get("mapping", {})
 
         if metadata_only:
-            msg_count = _count_messages(mapping)
-            model_slugs = _extract_model_slugs(mapping)
-            yield ConversationMeta(
+            meta = ConversationMeta(
                 id=conv_id,
                 title=title,
-                created_at=created_at,
-                updated_at=updated_at,
-                message_count=msg_count,
-                model_slugs=model_slugs,
+                create_time=create_time,
+                update_time=update_time,
             )
+            _scan_metadata(mapping, meta)
+            yield meta
         else:
-            messages = _traverse_and_parse(mapping)
+            try:
+                guard = _TraversalGuard(TIME_BUDGET)
+                path = _path_to_leaf(mapping, raw_conv.get("current_node"), guard)
+                messages = [_parse_message(raw) for raw in _visible_messages(mapping, path)]
+                branches = _collect_branches(mapping, path, guard) if all_branches else []
+            except (MalformedConversationError, AttributeError, TypeError) as e:
+                reason = (
+                    str(e) if isinstance(e, MalformedConversationError)
+                    else f"unexpected structure: {e}"
+                )
+                error = MalformedConversationError(f"Conversation {conv_id!r} ({title}): {reason}")
+                if on_error is None:
+                    raise error from e
+                on_error(raw_conv, error)
+                continue
+
             model_slugs = {m.model_slug for m in messages if m.model_slug}
             yield Conversation(
                 id=conv_id,
                 title=title,
-                created_at=created_at,
-                updated_at=updated_at,
+                create_time=create_time,
+                update_time=update_time,
                 messages=messages,
                 model_slugs=model_slugs,
+                branches=branches,
             )
 
 
@@ -72,29 +117,162 @@ def parse_single_conversation(raw_conv: dict) -> Conversation:
     return result
 
 
-def _traverse_and_parse(mapping: dict) -> list[Message]:
-    """Traverse the conversation tree and extract ordered messages.
+class _TraversalGuard:
+    """Bounds the work spent on one conversation's tree.
 
-    ChatGPT stores conversations as a tree (branching on edits).
-    Strategy: find the leaf node (no children or the current_node),
-    walk backward via parent pointers, then reverse for chronological order.
+    Each walk keeps its own visited set (revisiting a node means a cycle)
+    and may not exceed MAX_TREE_DEPTH nodes; all walks share one deadline.
     """
-    if not mapping:
-        return []
-
-    raw_messages = _traverse_tree(mapping)
-    return [_parse_message(raw) for raw in raw_messages if raw is not None]
-
 
-def _traverse_tree(mapping: dict) -> list[dict]:
+    def __init__(self, time_budget: float):
+        self.deadline = time.monotonic() + time_budget
+        self.steps = 0
+
+    def visit(self, node_id: str, seen: set) -> None:
+        if node_id in seen:
+            raise MalformedConversationError(f"cycle in message tree at node {node_id!r}")
+        seen.add(node_id)
+        if len(seen) > MAX_TREE_DEPTH:
+            raise MalformedConversationError(f"message tree deeper than {MAX_TREE_DEPTH} nodes")
+        self.steps += 1
+        if self.steps % _CLOCK_INTERVAL == 0 and time.monotonic() > self.deadline:
+            raise MalformedConversationError("message tree traversal exceeded its time budget")
+
+
+def _traverse_tree(
+    mapping: dict,
+    current_node: Optional[str] = None,
+    guard: Optional[_TraversalGuard] = None,
+) -> list[dict]:
     """Walk the tree from leaf to root, then reverse.
 
-    Finds the deepest leaf by following last-child pointers from root,
-    then walks backward from that leaf via parent pointers.
+    The export's current_node is the leaf of the branch the user last saw,
+    so when present only that root-to-leaf path is touched (O(depth)).
+    Otherwise finds the deepest leaf by following last-child pointers from
+    root, then walks backward from that leaf via parent pointers.
     """
+    guard = guard or _TraversalGuard(TIME_BUDGET)
+    return _visible_messages(mapping, _path_to_leaf(mapping, current_node, guard))
+
+
+def _visible_messages(mapping: dict, path: list[str]) -> list[dict]:
+    messages = []
+    for node_id in path:
+        msg = mapping[node_id].get("message")
+        if _is_visible(msg):
+            messages.append(msg)
+    return messages
+
+
+def _path_to_leaf(mapping: dict, current_node: Optional[str], guard: _TraversalGuard) -> list[str]:
+    """Node ids from the root to the displayed leaf, in order."""
     if not mapping:
         return []
 
+    if current_node is not None and current_node in mapping:
+        leaf_id = current_node
+    else:
+        leaf_id = _last_child_leaf(mapping, guard)
+        if leaf_id is None:
+            return []
+
+    # Walk backward from leaf to root
+    path = []
+    seen: set[str] = set()
+    current_id = leaf_id
+    while current_id is not None:
+        node = mapping.get(current_id)
+        if not node:
+            break
+        guard.visit(current_id, seen)
+        path.append(current_id)
+        current_id = node.get("parent")
+
+    path.reverse()
+    return path
+
+
+def _is_visible(msg: Optional[dict]) -> bool:
+    """Whether a raw message belongs in the Markdown output."""
+    if msg is None:
+        return False
+
+    author = msg.get("author", {})
+    role = author.get("role", "")
+    content = msg.get("content")
+
+    # Skip system messages (unless user-created)
+    is_user_system = msg.get("metadata", {}).get("is_user_system_message", False)
+    if role == "system" and not is_user_system:
+        return False
+
+    # Skip tool results (internal) unless they have visible content
+    if role == "tool":
+        return False
+
+    # Skip messages with no content
+    if not content or not content.get("parts"):
+        return False
+
+    # Skip empty text parts
+    parts = content.get("parts", [])
+    has_content = any(
+        (isinstance(p, str) and p.strip()) or isinstance(p, dict)
+        for p in parts
+    )
+    if not has_content and content.get("content_type") == "text":
+        return False
+
+    return True
+
+
+def _collect_branches(mapping: dict, path: list[str], guard: _TraversalGuard) -> list[Branch]:
+    """Gather every branch off the displayed path, each node visited once.
+
+    Every child not on the path starts a branch. A branch follows last
+    children (the most recent edit or regeneration) and queues its other
+    children as further branches, so the work is linear in the number of
+    nodes however many root-to-leaf paths the tree has.
+    """
+    on_path = set(path)
+    seen = set(on_path)  # shared by all branches: a tree reaches each node once
+    pending: deque[tuple[str, int, int]] = deque()  # (start node, parent branch, fork index)
+
+    visible = 0
+    for node_id in path:
+        node = mapping[node_id]
+        if _is_visible(node.get("message")):
+            visible += 1
+        for child in node.get("children", []):
+            if child not in on_path and child in mapping:
+                pending.append((child, 0, visible))
+
+    branches = []
+    while pending:
+        node_id, parent, fork_index = pending.popleft()
+        number = len(branches) + 1
+        raw_messages = []
+        while node_id is not None:
+            guard.visit(node_id, seen)
+            node = mapping[node_id]
+            msg = node.get("message")
+            if _is_visible(msg):
+                raw_messages.append(msg)
+            children = [c for c in node.get("children", []) if c in mapping]
+            for other in children[:-1]:
+                pending.append((other, number, len(raw_messages)))
+            node_id = children[-1] if children else None
+        branches.append(Branch(
+            number=number,
+            parent=parent,
+            fork_index=fork_index,
+            messages=[_parse_message(raw) for raw in raw_messages],
+        ))
+    return branches
+
+
+def _last_child_leaf(mapping: dict, guard: _TraversalGuard) -> Optional[str]:
+    """Fallback leaf: from the root, always follow the last child."""
     # Find root (node with no parent)
     root_id = None
     for node_id, node in mapping.items():
@@ -103,64 +281,21 @@ def _traverse_tree(mapping: dict) -> list[dict]:
             break
 
     if root_id is None:
-        return []
+        return None
 
     # Walk forward from root, always taking the last child, to find the leaf
     leaf_id = root_id
+    seen: set[str] = set()
     while True:
         node = mapping.get(leaf_id)
         if not node:
             break
+        guard.visit(leaf_id, seen)
         children = node.get("children", [])
         if not children:
             break
         leaf_id = children[-1]
-
-    # Walk backward from leaf to root
-    messages = []
-    current_id = leaf_id
-    while current_id is not None:
-        node = mapping.get(current_id)
-        if not node:
-            break
-        msg = node.get("message")
-        if msg is not None:
-            author = msg.get("author", {})
-            role = author.get("role", "")
-            content = msg.get("content")
-
-            # Skip system messages (unless user-created)
-            is_user_system = msg.get("metadata", {}).get("is_user_system_message", False)
-            if role == "system" and not is_user_system:
-                current_id = node.get("parent")
-                continue
-
-            # Skip tool results (internal) unless they have visible content
-            if role == "tool":
-                current_id = node.get("parent")
-                continue
-
-            # Skip messages with no content
-            if not content or not content.get("parts"):
-                current_id = node.get("parent")
-                continue
-
-            # Skip empty text parts
-            parts = content.get("parts", [])
-            has_content = any(
-                (isinstance(p, str) and p.strip()) or isinstance(p, dict)
-                for p in parts
-            )
-            if not has_content and content.get("content_type") == "text":
-                current_id = node.get("parent")
-                continue
-
-            messages.append(msg)
-
-        current_id = node.get("parent")
-
-    messages.reverse()
-    return messages
+    return leaf_id
 
 
 def _parse_message(raw: dict) -> Message:
@@ -177,52 +312,63 @@ def _parse_message(raw: dict) -> Message:
     content = raw.get("content", {})
     content_parts = render_content(content)
 
-    created_at = _parse_timestamp(raw.get("create_time"))
+    create_time = parse_epoch(raw.get("create_time"))
 
     metadata = raw.get("metadata", {})
     model_slug = metadata.get("model_slug") or metadata.get("model")
+    if isinstance(model_slug, str):
+        # A handful of distinct slugs repeat across every assistant message
+        model_slug = sys.intern(model_slug)
 
     return Message(
         id=msg_id,
         author_role=author_role,
         content_parts=content_parts,
-        created_at=created_at,
+        create_time=create_time,
         model_slug=model_slug,
     )
 
 
-def _count_messages(mapping: dict) -> int:
-    """Quick message count without full parsing."""
-    count = 0
-    for node in mapping.values():
-        msg = node.get("message")
-        if msg is None:
-            continue
-        role = msg.get("author", {}).get("role", "")
-        if role in ("user", "assistant"):
-            count += 1
-    return count
+def _scan_metadata(mapping: dict, meta: ConversationMeta) -> None:
+    """Fill in message metadata with a single pass over the mapping.
 
+    Collects the user/assistant message count, per-role and per-model
+    message counts, content-type counts and first/last message times. Model
+    slugs are gathered from every message, as other roles can carry them too.
+    """
+    by_role = meta.messages_by_role
+    by_model = meta.model_counts
+    by_type = meta.content_types
+    slugs = meta.model_slugs
+    first = last = None
 
-def _extract_model_slugs(mapping: dict) -> set[str]:
-    """Extract all model slugs from a conversation mapping."""
-    slugs = set()
     for node in mapping.values():
         msg = node.get("message")
         if msg is None:
             continue
-        metadata = msg.get("metadata", {})
+        metadata = msg.get("metadata") or {}
         slug = metadata.get("model_slug") or metadata.get("model")
         if slug:
             slugs.add(slug)
-    return slugs
 
-
-def _parse_timestamp(ts: float | int | None) -> datetime | None:
-    """Convert a Unix timestamp to a UTC datetime, or None."""
-    if ts is None:
-        return None
-    try:
-        return datetime.fromtimestamp(float(ts), tz=timezone.utc)
-    except (ValueError, OSError, OverflowError):
-        return None
+        role = (msg.get("author") or {}).get("role", "")
+        if role not in ("user", "assistant"):
+            continue
+        by_role[role] = by_role.get(role, 0) + 1
+        if slug:
+            by_model[slug] = by_model.get(slug, 0) + 1
+        content_type = (msg.get("content") or {}).get("content_type", "text")
+        by_type[content_type] = by_type.get(content_type, 0) + 1
+
+        ts = msg.get("create_time")
+        if ts is not None:
+            ts = parse_epoch(ts)
+            if ts is not None:
+                if first is None or ts < first:
+                    first = ts
+                if last is None or ts > last:
+                    last = ts
+
+    meta.message_count = sum(by_role.values())
+    meta.first_message_time = first
+    meta.last_message_time = last
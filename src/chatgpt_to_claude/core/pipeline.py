@@ -0,0 +1,285 @@
+"""Per-conversation conversion step shared by serial and parallel runs.
+
+Rendering a conversation (split, Markdown, organizer path) depends only on the
+conversation itself, so it can run in worker processes. Everything that depends
+on order — path deduplication and writing — stays with the caller, which
+consumes results in export order and therefore produces identical output
+whatever the number of workers.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Mapping, Optional, Union
+
+from .cache import ExportScan
+from .extractor import ExportFormatError
+from .indexer import IndexedExport, SelectedConversations
+from .json_stream import iter_array_elements
+from .manifest import content_hash
+from .models import Branch, Conversation, ConversationSummary, OrganizeMode, SizeUnit
+from .organizer import resolve_output_path
+from .parallel import DEFAULT_BATCH_BYTES, ParallelExportReader
+from .parser import MalformedConversationError, parse_conversations
+from .splitter import DEFAULT_MAX_SIZE, SplitBudgetError, SplitPart, maybe_split
+from .statistics import summarize_conversation
+from .timestamps import parse_epoch
+
+
+@dataclass(frozen=True)
+class ConvertOptions:
+    """Options that affect how a single conversation is rendered."""
+
+    organize_mode: OrganizeMode = OrganizeMode.MONTHLY
+    max_size: int = DEFAULT_MAX_SIZE
+    size_unit: SizeUnit = SizeUnit.CHARS
+    include_frontmatter: bool = True
+    all_branches: bool = False
+
+
+@dataclass
+class RenderedConversation:
+    """A conversation with its rendered Markdown files, paths not yet deduplicated.
+
+    Paths are relative to the output directory. ``parts`` is empty for
+    conversations without messages, which produce no files. Parts hold only
+    their rendered Markdown, and only a summary of the conversation is kept,
+    so the full message tree can be freed (and is never pickled back from
+    worker processes).
+
+    ``error`` is set, and ``parts`` empty, for a conversation that was skipped
+    because its message tree is malformed. ``update_time`` and
+    ``content_hash`` (of the raw JSON) are set when rendering from raw bytes;
+    ``unchanged`` marks a conversation identical to one from a previous run,
+    which was not decoded or parsed at all.
+    """
+
+    summary: ConversationSummary
+    parts: list[tuple[Path, SplitPart]] = field(default_factory=list)
+    error: Optional[str] = None
+    update_time: Optional[float] = None
+    content_hash: Optional[str] = None
+    unchanged: bool = False
+
+
+def render_conversation(
+    conversation: Conversation, options: ConvertOptions,
+) -> RenderedConversation:
+    """Split and render one conversation to (relative path, SplitPart) pairs."""
+    summary = summarize_conversation(conversation)
+    if not conversation.messages:
+        return RenderedConversation(summary)
+
+    # Branches (only present in all-branches mode) become files of their own
+    documents = [conversation]
+    documents.extend(branch_conversation(conversation, b) for b in conversation.branches)
+
+    parts = []
+    for conv in documents:
+        for part in maybe_split(
+            conv, options.max_size, options.include_frontmatter, options.size_unit,
+        ):
+            path = resolve_output_path(part.conversation, options.organize_mode, Path())
+            # Keep only the Markdown; the part's messages are not needed again
+            parts.append((path, SplitPart(None, part.sections)))
+    return RenderedConversation(summary, parts)
+
+
+def render_raw_conversations(
+    raw_conversations: Iterable[dict], options: ConvertOptions,
+) -> Iterator[RenderedConversation]:
+    """Parse and render raw conversation dicts, in order.
+
+    A conversation whose tree cannot be traversed, or whose title is too
+    long for the size budget, is reported as a RenderedConversation with
+    ``error`` set instead of stopping the run.
+    """
+    skipped: list[RenderedConversation] = []
+
+    def skip(raw: dict, error: MalformedConversationError) -> None:
+        summary = ConversationSummary(id=raw.get("id", ""), title=raw.get("title") or "Untitled")
+        skipped.append(RenderedConversation(summary, error=str(error)))
+
+    # on_error runs before the next conversation is yielded, so draining
+    # skipped first keeps export order
+    for conv in parse_conversations(
+        raw_conversations, metadata_only=False, all_branches=options.all_branches, on_error=skip,
+    ):
+        yield from skipped
+        skipped.clear()
+        try:
+            rendered = render_conversation(conv, options)
+        except SplitBudgetError as e:
+            error = f"Conversation {conv.id!r} ({conv.title}): {e}"
+            rendered = RenderedConversation(summarize_conversation(conv), error=error)
+        yield rendered
+    yield from skipped
+
+
+@dataclass
+class DecodedElement:
+    """One conversations.json element after hashing (and decoding, if needed).
+
+    ``conversation`` is None when the hash matched a previous run, in which
+    case ``unchanged_id`` names the conversation.
+    """
+
+    content_hash: str
+    conversation: Optional[dict] = None
+    unchanged_id: Optional[str] = None
+
+
+def decode_elements(
+    elements: Iterable[bytes],
+    known: Optional[Mapping[str, str]] = None,
+) -> Iterator[DecodedElement]:
+    """Hash raw conversations.json elements and decode those not in known.
+
+    ``known`` maps content hashes from a previous run's manifest to ids.
+    """
+    known = known or {}
+    for raw in elements:
+        digest = content_hash(raw)
+        conv_id = known.get(digest)
+        if conv_id is not None:
+            yield DecodedElement(digest, unchanged_id=conv_id)
+            continue
+        try:
+            yield DecodedElement(digest, json.loads(raw))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ExportFormatError(f"Failed to parse conversations.json: {e}") from e
+
+
+def render_decoded(
+    decoded: Iterable[DecodedElement],
+    options: ConvertOptions,
+) -> Iterator[RenderedConversation]:
+    """Render decoded elements in order; unchanged ones are passed through.
+
+    Conversations matching a previous run are yielded as ``unchanged``
+    without being parsed or rendered.
+    """
+    fingerprints: deque[tuple[Optional[float], str]] = deque()
+    unchanged: list[RenderedConversation] = []
+
+    def changed() -> Iterator[dict]:
+        for element in decoded:
+            if element.conversation is None:
+                summary = ConversationSummary(id=element.unchanged_id, title="")
+                unchanged.append(
+                    RenderedConversation(summary, content_hash=element.content_hash, unchanged=True)
+                )
+                continue
+            update_time = parse_epoch(element.conversation.get("update_time"))
+            fingerprints.append((update_time, element.content_hash))
+            yield element.conversation
+
+    # render_raw_conversations yields exactly one result per input, in order
+    for rendered in render_raw_conversations(changed(), options):
+        yield from unchanged
+        unchanged.clear()
+        rendered.update_time, rendered.content_hash = fingerprints.popleft()
+        yield rendered
+    yield from unchanged
+
+
+def render_export_elements(
+    elements: Iterable[bytes],
+    options: ConvertOptions,
+    known: Optional[Mapping[str, str]] = None,
+) -> Iterator[RenderedConversation]:
+    """Hash, decode and render raw conversations.json elements.
+
+    ``known`` maps content hashes from a previous run's manifest to ids;
+    those conversations are yielded as ``unchanged`` without being decoded,
+    parsed or rendered.
+    """
+    return render_decoded(decode_elements(elements, known), options)
+
+
+def decode_scanned_export(
+    export: IndexedExport,
+    scan: ExportScan,
+    known: Mapping[str, str],
+) -> tuple[SelectedConversations, Iterator[DecodedElement]]:
+    """Like decode_elements, for an export with a cached scan.
+
+    The scan's hashes tell which conversations are unchanged without reading
+    them; only the others are read, through the index. Returns the stream of
+    conversations that will be read (for progress) and the decoded elements
+    in export order.
+    """
+    changed = [entry for entry, digest in zip(scan.entries, scan.hashes) if digest not in known]
+    selected = SelectedConversations(export, changed)
+
+    def decoded() -> Iterator[DecodedElement]:
+        conversations = iter(selected)
+        for digest in scan.hashes:
+            conv_id = known.get(digest)
+            if conv_id is not None:
+                yield DecodedElement(digest, unchanged_id=conv_id)
+            else:
+                yield DecodedElement(digest, next(conversations))
+
+    return selected, decoded()
+
+
+def branch_conversation(conversation: Conversation, branch: Branch) -> Conversation:
+    """A stand-alone conversation for one branch, pointing at its parent.
+
+    Holds only the branch's own messages; the note names the file and message
+    where it departs, so the shared prefix is written once.
+    """
+    parent = "the main conversation" if branch.parent == 0 else f"Branch {branch.parent}"
+    if branch.fork_index:
+        where = f"after message {branch.fork_index} of {parent}"
+    else:
+        where = f"from the start of {parent}"
+    return Conversation(
+        id=f"{conversation.id}_branch{branch.number}",
+        title=f"{conversation.title} (Branch {branch.number})",
+        create_time=conversation.create_time,
+        update_time=conversation.update_time,
+        messages=branch.messages,
+        model_slugs={m.model_slug for m in branch.messages if m.model_slug},
+        context_note=f"Alternative branch of \"{conversation.title}\": continues {where}.",
+    )
+
+
+def render_conversations_parallel(
+    source: Union[str, Path, BinaryIO],
+    options: ConvertOptions,
+    jobs: int,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+    known: Optional[Mapping[str, str]] = None,
+) -> ParallelExportReader:
+    """Hash, decode, parse, split and render in worker processes.
+
+    Yields RenderedConversation objects in export order, as
+    render_export_elements does. ``known`` is sent to each worker once, when
+    it starts, rather than with every chunk.
+    """
+    worker = partial(_render_chunk, options=options)
+    return ParallelExportReader(
+        source, worker, jobs, batch_bytes, initializer=_set_known, initargs=(known,),
+    )
+
+
+_known: Optional[Mapping[str, str]] = None  # a worker's copy of the previous run's hashes
+
+
+def _set_known(known: Optional[Mapping[str, str]]) -> None:
+    """Worker initializer: keep the hashes of unchanged conversations."""
+    global _known
+    _known = known
+
+
+def _render_chunk(raw: bytes, options: ConvertOptions) -> list[RenderedConversation]:
+    """Worker: split one chunk back into elements and render each of them."""
+    elements = (element for _offset, element in iter_array_elements(io.BytesIO(raw)))
+    return list(render_export_elements(elements, options, _known))
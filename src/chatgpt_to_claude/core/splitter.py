@@ -2,65 +2,313 @@
 
 from __future__ import annotations
 
-from .markdown_writer import conversation_to_markdown
-from .models import Conversation
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional, TextIO
+
+from .markdown_writer import render_header, render_message, write_sections
+from .models import ContentPart, ContentType, Conversation, Message, SizeUnit
+from .tokens import estimate_tokens, utf8_size
 
 
 DEFAULT_MAX_SIZE = 90_000  # chars (~100K is Claude Project per-file limit)
+MIN_CONTENT_SIZE = 64  # room a part needs for content besides its headers
+# Smallest max_size accepted on the command line; leaves room for a typical
+# frontmatter and title plus content
+MIN_MAX_SIZE = {SizeUnit.CHARS: 1_000, SizeUnit.BYTES: 1_000, SizeUnit.TOKENS: 250}
+
+_MEASURES: dict[SizeUnit, Callable[[str], int]] = {
+    SizeUnit.CHARS: len,
+    SizeUnit.BYTES: utf8_size,
+    SizeUnit.TOKENS: estimate_tokens,
+}
+
+_FENCE_RE = re.compile(r"[ ]{0,3}(`{3,}|~{3,})")
+
+
+class SplitBudgetError(ValueError):
+    """max_size leaves too little room for content next to a part's headers."""
+
+
+@dataclass
+class SplitPart:
+    """One output file: the (possibly partial) conversation and its Markdown.
+
+    The Markdown is kept as the rendered sections (header, then one per
+    message) so it can be written out without joining it into one string.
+    ``conversation`` is None once the part has been detached from it, e.g.
+    to be sent back from a worker process as Markdown only.
+    """
+
+    conversation: Optional[Conversation]
+    sections: list[str]
+
+    @property
+    def markdown(self) -> str:
+        return "\n".join(self.sections)
+
+    def write_to(self, sink: TextIO) -> None:
+        """Write the part's Markdown to a text sink, section by section."""
+        write_sections(self.sections, sink)
 
 
 def maybe_split(
     conversation: Conversation,
     max_size: int = DEFAULT_MAX_SIZE,
-) -> list[Conversation]:
-    """Split a conversation if its Markdown exceeds max_size characters.
+    include_frontmatter: bool = True,
+    unit: SizeUnit = SizeUnit.CHARS,
+) -> list[SplitPart]:
+    """Render a conversation, splitting it if its Markdown exceeds max_size.
+
+    max_size counts characters, UTF-8 bytes or estimated tokens depending on
+    unit.
+
+    Every message is rendered exactly once; parts are made of the rendered
+    sections, including the pieces of a message too large for any part. Part
+    boundaries are chosen from the exact rendered sizes, including
+    frontmatter and title, so each part fits.
 
     Returns a list with either the original conversation (if within limits)
-    or multiple Conversation objects with "(Part N)" title suffixes.
+    or multiple parts with "(Part N)" title suffixes. Conversations without
+    messages produce no parts.
+
+    Raises:
+        SplitBudgetError: If splitting is needed but a part's frontmatter,
+            title and message heading leave less than MIN_CONTENT_SIZE for
+            content.
     """
-    markdown = conversation_to_markdown(conversation)
-    if len(markdown) <= max_size:
-        return [conversation]
+    if not conversation.messages:
+        return []
+
+    measure = _MEASURES[unit]
+    sections = [render_message(msg) for msg in conversation.messages]
+    sizes = list(map(measure, sections))
+    header = render_header(conversation, include_frontmatter)
+    if _joined_size(header, measure) + sum(sizes) + len(sizes) <= max_size:
+        return [SplitPart(conversation, header + sections)]
 
-    return _split_at_messages(conversation, max_size)
+    return _split_at_messages(conversation, sections, sizes, max_size, include_frontmatter, measure)
 
 
-def _split_at_messages(conversation: Conversation, max_size: int) -> list[Conversation]:
-    """Split by distributing messages across parts."""
+def _split_at_messages(
+    conversation: Conversation,
+    sections: list[str],
+    sizes: list[int],
+    max_size: int,
+    include_frontmatter: bool,
+    measure: Callable[[str], int],
+) -> list[SplitPart]:
+    """Split by distributing rendered messages across parts.
+
+    Sizes add up section by section, with one unit per "\n" separator.
+    """
     messages = conversation.messages
-    if not messages:
-        return [conversation]
+
+    # Largest header any part can get: the longest part number, every model
+    # and the full message count in its frontmatter
+    widest = _make_part(conversation, messages, len(messages))
+    budget = max_size - _joined_size(render_header(widest, include_frontmatter), measure) - 1
+    if budget < MIN_CONTENT_SIZE:
+        raise SplitBudgetError(
+            f"a maximum size of {max_size} does not fit the frontmatter and title "
+            f"of a part plus {MIN_CONTENT_SIZE} of content"
+        )
+
+    # A message too large for any part is broken into continuation messages
+    if max(sizes) > budget:
+        messages, sections, sizes = _break_oversized(messages, sections, sizes, budget, measure)
+
+    groups: list[tuple[int, int]] = []
+    start = 0
+    current_size = -1  # no separator before the first section
+    for i, section_size in enumerate(sizes):
+        size = section_size + 1
+        if current_size + size > budget and i > start:
+            groups.append((start, i))
+            start = i
+            current_size = -1
+        current_size += size
+    groups.append((start, len(sections)))
+
+    # If we ended up with only 1 part, don't rename it
+    if len(groups) == 1:
+        header = render_header(conversation, include_frontmatter)
+        return [SplitPart(conversation, header + sections)]
 
     parts = []
-    current_messages = []
-    current_size = 0
-    part_num = 1
+    for part_num, (start, end) in enumerate(groups, start=1):
+        part = _make_part(conversation, messages[start:end], part_num)
+        header = render_header(part, include_frontmatter)
+        parts.append(SplitPart(part, header + sections[start:end]))
+    return parts
+
 
-    # Rough overhead per message (header + spacing)
-    OVERHEAD_PER_MSG = 50
+def _break_oversized(
+    messages: list[Message],
+    sections: list[str],
+    sizes: list[int],
+    budget: int,
+    measure: Callable[[str], int],
+) -> tuple[list[Message], list[str], list[int]]:
+    """Replace every message larger than budget with fitting pieces."""
+    out_messages, out_sections, out_sizes = [], [], []
+    for message, section, size in zip(messages, sections, sizes):
+        if size <= budget:
+            out_messages.append(message)
+            out_sections.append(section)
+            out_sizes.append(size)
+            continue
+        for piece, piece_section in _split_message(message, section, budget, measure):
+            out_messages.append(piece)
+            out_sections.append(piece_section)
+            out_sizes.append(measure(piece_section))
+    return out_messages, out_sections, out_sizes
 
-    for msg in messages:
-        # Estimate this message's size
-        msg_size = sum(len(p.text or "") for p in msg.content_parts) + OVERHEAD_PER_MSG
 
-        if current_size + msg_size > max_size and current_messages:
-            # Flush current part
-            parts.append(_make_part(conversation, current_messages, part_num))
-            part_num += 1
-            current_messages = []
-            current_size = 0
+def _split_message(
+    message: Message, section: str, budget: int, measure: Callable[[str], int],
+) -> list[tuple[Message, str]]:
+    """Break one oversized message into pieces that each render within budget.
 
-        current_messages.append(msg)
-        current_size += msg_size
+    Works on the message's rendered section, so nothing is rendered again:
+    a piece is a plain text message, whose section is the role heading
+    followed by the piece's text. The content is scanned once, line by
+    line. A piece ends at the last blank line (outside code) that fits,
+    otherwise at a line break, and lines longer than a whole piece are
+    hard-wrapped. A cut inside a code fence closes the fence and reopens
+    it, info string included, at the start of the next piece.
+    """
+    heading = section[:section.index("\n\n") + 2]  # "## Role\n\n"
+    body = section[len(heading):-1]
+    overhead = measure(heading + "\n")
 
-    if current_messages:
-        parts.append(_make_part(conversation, current_messages, part_num))
+    # One pass: measure each line and track which fence is open after it
+    lines: list[str] = []
+    line_sizes: list[int] = []
+    open_after: list[Optional[str]] = []
+    fence: Optional[str] = None  # opening line of the fence we are inside
+    fence_sizes = [0]
+    for line in body.split("\n"):
+        match = _FENCE_RE.match(line)
+        if match:
+            marker = match.group(1)
+            if fence is None:
+                fence = line
+                fence_sizes.append(measure(line))
+            else:
+                stripped = line.strip()
+                if stripped.startswith(_fence_marker(fence)) and not stripped.strip(marker[0]):
+                    fence = None
+        lines.append(line)
+        line_sizes.append(measure(line))
+        open_after.append(fence)
 
-    # If we ended up with only 1 part, don't rename it
-    if len(parts) == 1:
-        return [conversation]
+    # Room for closing and reopening a fence in every piece
+    limit = budget - overhead - 2 * (max(fence_sizes) + 1)
+    if limit < MIN_CONTENT_SIZE:
+        raise SplitBudgetError(
+            f"message {message.id!r} is too large for a part, and its heading and "
+            f"code fences leave less than {MIN_CONTENT_SIZE} of content per piece"
+        )
+    if max(line_sizes) + 1 > limit:
+        lines, line_sizes, open_after = _hard_wrap(lines, line_sizes, open_after, limit, measure)
 
-    return parts
+    chunks: list[str] = []
+    start = 0
+    reopen: Optional[str] = None  # fence line the current piece starts with
+    size = -1
+    last_blank = -1
+    for i, line_size in enumerate(line_sizes):
+        if size + line_size + 1 > limit and i > start:
+            cut = last_blank if last_blank > start else i
+            chunks.append(_piece_text(lines, start, cut, reopen, open_after[cut - 1]))
+            reopen = open_after[cut - 1]
+            start = cut + 1 if cut == last_blank else cut
+            size = (measure(reopen) if reopen else -1) + sum(
+                s + 1 for s in line_sizes[start:i]
+            )
+            last_blank = -1
+        size += line_size + 1
+        if not lines[i].strip() and open_after[i] is None:
+            last_blank = i
+    chunks.append(_piece_text(lines, start, len(lines), reopen, None))
+
+    return [
+        (
+            Message(
+                id=message.id,
+                author_role=message.author_role,
+                content_parts=[ContentPart(ContentType.TEXT, text=chunk)],
+                create_time=message.create_time,
+                model_slug=message.model_slug,
+            ),
+            f"{heading}{chunk}\n",
+        )
+        for chunk in chunks
+    ]
+
+
+def _fence_marker(fence_line: str) -> str:
+    return _FENCE_RE.match(fence_line).group(1)
+
+
+def _piece_text(
+    lines: list[str],
+    start: int,
+    end: int,
+    reopen: Optional[str],
+    still_open: Optional[str],
+) -> str:
+    """Join lines[start:end], reopening and closing fences as needed."""
+    piece = lines[start:end]
+    if reopen:
+        piece.insert(0, reopen)
+    if still_open:
+        piece.append(_fence_marker(still_open))
+    return "\n".join(piece)
+
+
+def _hard_wrap(
+    lines: list[str],
+    line_sizes: list[int],
+    open_after: list[Optional[str]],
+    limit: int,
+    measure: Callable[[str], int],
+) -> tuple[list[str], list[int], list[Optional[str]]]:
+    """Break lines that cannot fit in a piece on their own.
+
+    An overlong line is walked with a running offset. Each head is sized
+    from the line's average density and measured on its own, shrinking
+    proportionally until it fits; the remainder is never copied or
+    re-measured, so wrapping is linear in the line's length.
+    """
+    cap = limit - 1  # largest head that fits with its line break
+    out_lines, out_sizes, out_open = [], [], []
+    for line, size, fence in zip(lines, line_sizes, open_after):
+        if size <= cap:
+            out_lines.append(line)
+            out_sizes.append(size)
+            out_open.append(fence)
+            continue
+
+        chars_per_unit = len(line) / size
+        pos = 0
+        while pos < len(line):
+            n = min(len(line) - pos, max(1, int(cap * chars_per_unit)))
+            head_size = measure(line[pos:pos + n])
+            while n > 1 and head_size > cap:
+                n = max(1, min(n - 1, n * cap // head_size))
+                head_size = measure(line[pos:pos + n])
+            out_lines.append(line[pos:pos + n])
+            out_sizes.append(head_size)
+            out_open.append(fence)
+            pos += n
+    return out_lines, out_sizes, out_open
+
+
+def _joined_size(sections: list[str], measure: Callable[[str], int]) -> int:
+    """Size of "\\n".join(sections)."""
+    return sum(map(measure, sections)) + len(sections) - 1
 
 
 def _make_part(
@@ -73,8 +321,9 @@ def _make_part(
     return Conversation(
         id=f"{original.id}_part{part_num}",
         title=f"{original.title} (Part {part_num})",
-        created_at=original.created_at,
-        updated_at=original.updated_at,
+        create_time=original.create_time,
+        update_time=original.update_time,
         messages=messages,
         model_slugs=model_slugs,
+        context_note=original.context_note,
     )
@@ -0,0 +1,113 @@
+"""Bounded hand-off between the stages of a conversion.
+
+``convert`` runs as a pipeline: reading (decompression, element scanning and
+JSON decoding) feeds rendering, which feeds the output writer. Each hand-off
+is a bounded queue, so a fast stage runs ahead of a slow one only by a fixed
+number of items and memory stays capped whatever the export size.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Generic, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_STAGE_DEPTH = 64  # items a stage may run ahead of its consumer
+
+
+@dataclass(frozen=True)
+class StageStats:
+    """A snapshot of one pipeline stage for progress display."""
+
+    name: str
+    depth: int  # items waiting for (or being processed by) the stage
+    capacity: int  # bound on depth; 0 when the stage runs inline
+    items: int  # items the stage has completed
+    elapsed: float  # seconds since the stage started
+
+    @property
+    def rate(self) -> float:
+        """Completed items per second."""
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+class BoundedStage(Generic[T]):
+    """Run an iterable in a background thread, handing items over in order.
+
+    At most ``maxsize`` items wait in the queue; the thread blocks when it is
+    full. An exception raised by the source is re-raised to the consumer at
+    the point in the sequence where it happened. Stopping iteration early
+    stops the thread.
+    """
+
+    def __init__(self, name: str, source: Iterable[T], maxsize: int = DEFAULT_STAGE_DEPTH):
+        self.name = name
+        self.maxsize = maxsize
+        self.items = 0
+        self._source = source
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._stop = threading.Event()
+        self._started: Optional[float] = None
+        self._thread = threading.Thread(target=self._run, name=f"c2c-{name}", daemon=True)
+
+    def __iter__(self) -> Iterator[T]:
+        self._started = time.monotonic()
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            self.close()
+
+    def stats(self) -> StageStats:
+        elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        return StageStats(self.name, self._queue.qsize(), self.maxsize, self.items, elapsed)
+
+    def close(self) -> None:
+        """Stop the background thread and wait for it to finish."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        iterator = iter(self._source)
+        try:
+            for item in iterator:
+                if not self._put(item):
+                    return
+                self.items += 1
+        except BaseException as e:
+            self._put(_Failure(e))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        self._put(_DONE)
+
+    def _put(self, item) -> bool:
+        """Block until there is room, unless the consumer has gone away."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
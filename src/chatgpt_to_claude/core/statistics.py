@@ -4,55 +4,90 @@ from __future__ import annotations
 
 from typing import Iterable, Union
 
-from .models import Conversation, ConversationMeta, ExportStatistics
+from .models import Conversation, ConversationMeta, ConversationSummary, ExportStatistics
+from .timestamps import epoch_to_datetime, month_key
 
 
-def compute_statistics(
-    conversations: Iterable[Union[Conversation, ConversationMeta]],
-) -> ExportStatistics:
-    """Compute aggregate statistics in a single pass.
+def summarize_conversation(conversation: Conversation) -> ConversationSummary:
+    """Reduce a parsed conversation to the counts needed after conversion."""
+    by_role: dict[str, int] = {}
+    model_counts: dict[str, int] = {}
+    for msg in conversation.messages:
+        role_key = msg.author_role.value
+        by_role[role_key] = by_role.get(role_key, 0) + 1
+        if msg.model_slug:
+            model_counts[msg.model_slug] = model_counts.get(msg.model_slug, 0) + 1
+
+    return ConversationSummary(
+        id=conversation.id,
+        title=conversation.title,
+        create_time=conversation.create_time,
+        message_count=len(conversation.messages),
+        model_slugs=set(conversation.model_slugs),
+        messages_by_role=by_role,
+        model_counts=model_counts,
+    )
+
 
-    Works with both full Conversation objects and lightweight ConversationMeta.
+class StatisticsAccumulator:
+    """Build ExportStatistics incrementally, one conversation at a time.
+
+    Accepts full Conversation objects, lightweight ConversationMeta, or
+    ConversationSummary, so callers never need to keep the whole export.
     """
-    stats = ExportStatistics()
-    earliest = None
-    latest = None
 
-    for conv in conversations:
+    def __init__(self):
+        self.stats = ExportStatistics()
+        self._earliest = None
+        self._latest = None
+
+    def add(self, conv: Union[Conversation, ConversationMeta, ConversationSummary]) -> None:
+        stats = self.stats
         stats.total_conversations += 1
 
-        # Message count
         if isinstance(conv, Conversation):
-            msg_count = len(conv.messages)
-            for msg in conv.messages:
-                role_key = msg.author_role.value
-                stats.messages_by_role[role_key] = stats.messages_by_role.get(role_key, 0) + 1
-                if msg.model_slug:
-                    stats.models_used[msg.model_slug] = (
-                        stats.models_used.get(msg.model_slug, 0) + 1
-                    )
-        else:
-            msg_count = conv.message_count
-            for slug in conv.model_slugs:
-                if slug not in stats.models_used:
-                    stats.models_used[slug] = 0
-
-        stats.total_messages += msg_count
-
-        # Date tracking
-        dt = conv.created_at
-        if dt:
-            month_key = dt.strftime("%Y-%m")
-            stats.conversations_by_month[month_key] = (
-                stats.conversations_by_month.get(month_key, 0) + 1
-            )
-            if earliest is None or dt < earliest:
-                earliest = dt
-            if latest is None or dt > latest:
-                latest = dt
-
-    stats.date_range = (earliest, latest)
-    return stats
+            conv = summarize_conversation(conv)
+
+        # Summaries and metadata both carry per-role and per-model counts
+        stats.total_messages += conv.message_count
+        for role_key, n in conv.messages_by_role.items():
+            stats.messages_by_role[role_key] = stats.messages_by_role.get(role_key, 0) + n
+        for slug, n in conv.model_counts.items():
+            stats.models_used[slug] = stats.models_used.get(slug, 0) + n
+        for slug in conv.model_slugs:
+            if slug not in stats.models_used:
+                stats.models_used[slug] = 0
+        if isinstance(conv, ConversationMeta):
+            for content_type, n in conv.content_types.items():
+                stats.content_types[content_type] = stats.content_types.get(content_type, 0) + n
+
+        # Date tracking, on raw epochs
+        epoch = conv.create_time
+        if epoch is not None:
+            key = month_key(epoch)
+            stats.conversations_by_month[key] = stats.conversations_by_month.get(key, 0) + 1
+            if self._earliest is None or epoch < self._earliest:
+                self._earliest = epoch
+            if self._latest is None or epoch > self._latest:
+                self._latest = epoch
+
+    def result(self) -> ExportStatistics:
+        self.stats.date_range = (epoch_to_datetime(self._earliest), epoch_to_datetime(self._latest))
+        return self.stats
+
+
+def compute_statistics(
+    conversations: Iterable[Union[Conversation, ConversationMeta, ConversationSummary]],
+) -> ExportStatistics:
+    """Compute aggregate statistics in a single pass.
+
+    Works with full Conversation objects, lightweight ConversationMeta, and
+    ConversationSummary.
+    """
+    accumulator = StatisticsAccumulator()
+    for conv in conversations:
+        accumulator.add(conv)
+    return accumulator.result()
 
 
 def statistics_to_dict(stats: ExportStatistics) -> dict:
@@ -67,4 +102,5 @@ def statistics_to_dict(stats: ExportStatistics) -> dict:
         "models_used": stats.models_used,
         "messages_by_role": stats.messages_by_role,
         "conversations_by_month": dict(sorted(stats.conversations_by_month.items())),
+        "content_types": stats.content_types,
     }
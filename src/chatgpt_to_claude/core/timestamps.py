@@ -0,0 +1,101 @@
+"""Epoch timestamps: validation, lazy datetimes and cached date keys.
+
+Models store ChatGPT's raw epoch floats. A datetime is built only when one is
+actually read, and the date strings used for bucketing (month keys, index
+labels) come from a per-day cache instead of strftime per item.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+_SECONDS_PER_DAY = 86400
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Range datetime can represent (years 1..9999)
+_MIN_EPOCH = (date(1, 1, 1).toordinal() - _EPOCH_ORDINAL) * _SECONDS_PER_DAY
+_MAX_EPOCH = (date(9999, 12, 31).toordinal() - _EPOCH_ORDINAL + 1) * _SECONDS_PER_DAY - 1
+
+
+def parse_epoch(value: float | int | str | None) -> Optional[float]:
+    """Validate a raw timestamp, returning it as a float or None."""
+    if value is None:
+        return None
+    try:
+        epoch = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(epoch) or not _MIN_EPOCH <= epoch <= _MAX_EPOCH:
+        return None
+    return epoch
+
+
+def epoch_to_datetime(epoch: Optional[float]) -> Optional[datetime]:
+    """Convert an epoch to a UTC datetime, or None."""
+    if epoch is None:
+        return None
+    try:
+        return datetime.fromtimestamp(epoch, tz=timezone.utc)
+    except (ValueError, OSError, OverflowError):
+        return None
+
+
+@lru_cache(maxsize=1 << 16)
+def _day_strings(day: int) -> tuple[str, str, str, str]:
+    d = date.fromordinal(day + _EPOCH_ORDINAL)
+    return (
+        f"{d.year:04d}-{d.month:02d}-{d.day:02d}",
+        f"{d.year:04d}-{d.month:02d}",
+        f"{d.year:04d}",
+        d.strftime("%B %Y"),
+    )
+
+
+def date_key(epoch: float) -> str:
+    """"YYYY-MM-DD" (UTC) for an epoch."""
+    return _day_strings(int(epoch // _SECONDS_PER_DAY))[0]
+
+
+def month_key(epoch: float) -> str:
+    """"YYYY-MM" (UTC) for an epoch."""
+    return _day_strings(int(epoch // _SECONDS_PER_DAY))[1]
+
+
+def year_key(epoch: float) -> str:
+    """"YYYY" (UTC) for an epoch."""
+    return _day_strings(int(epoch // _SECONDS_PER_DAY))[2]
+
+
+def month_heading(epoch: float) -> str:
+    """Human month label such as "March 2024" (UTC) for an epoch."""
+    return _day_strings(int(epoch // _SECONDS_PER_DAY))[3]
+
+
+class EpochDatetime:
+    """Expose an epoch-float field as a lazily built, cached UTC datetime.
+
+    ``cache`` (a slot) holds the epoch the datetime was built from together
+    with the datetime, so assigning the epoch field directly makes the next
+    read rebuild it. Assigning a datetime updates the field and the cache.
+    """
+
+    def __init__(self, epoch_field: str, cache: str):
+        self.epoch_field = epoch_field
+        self.cache = cache
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        epoch = getattr(obj, self.epoch_field)
+        cached = getattr(obj, self.cache)
+        if cached is None or cached[0] != epoch:
+            cached = (epoch, epoch_to_datetime(epoch))
+            setattr(obj, self.cache, cached)
+        return cached[1]
+
+    def __set__(self, obj, value: Optional[datetime]) -> None:
+        epoch = value.timestamp() if value is not None else None
+        setattr(obj, self.epoch_field, epoch)
+        setattr(obj, self.cache, (epoch, value))
@@ -0,0 +1,59 @@
+"""Fast local estimates of text size in bytes and tokens.
+
+No tokenizer is bundled, so token counts are estimated from character
+classes, leaning slightly high so that a part sized by the estimate still
+fits the real limit. Every count is taken by a C-level pass (regex findall,
+str.encode), never by looping over characters in Python.
+"""
+
+from __future__ import annotations
+
+import re
+
+# ASCII pre-tokenization in the style of BPE tokenizers: a word with its
+# leading space, short digit groups, punctuation runs, whitespace runs
+_ASCII_PIECE_RE = re.compile(r" ?[A-Za-z]+| ?[0-9]{1,3}| ?[!-/:-@\[-`{-~]+|\s+")
+# Long words are split into several tokens; one extra per 7 further letters
+_LONG_WORD_RE = re.compile(r"[A-Za-z]{7}(?=[A-Za-z])")
+
+# Tokens per non-ASCII character, by UTF-8 width
+_TWO_BYTE_COST = 1.0  # Latin accents, Greek, Cyrillic, Hebrew, Arabic
+_THREE_BYTE_COST = 1.5  # CJK, kana, hangul, most symbols
+_FOUR_BYTE_COST = 3.0  # emoji and other astral characters
+
+
+def utf8_size(text: str) -> int:
+    """Size of text in bytes once encoded as UTF-8."""
+    return len(text.encode("utf-8", "surrogatepass"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text.
+
+    ASCII is counted as BPE-style pieces (plus extra tokens for long words);
+    other characters are costed by their UTF-8 width, which separates
+    accented/Cyrillic text, CJK and emoji without inspecting each character.
+    """
+    if not text:
+        return 0
+
+    chars = len(text)
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    tokens = len(_ASCII_PIECE_RE.findall(text)) + len(_LONG_WORD_RE.findall(text))
+    if ascii_chars == chars:
+        return tokens
+
+    utf8_bytes = utf8_size(text)
+    # Astral characters take two UTF-16 code units instead of one
+    four_byte = len(text.encode("utf-16-le", "surrogatepass")) // 2 - chars
+    other = chars - ascii_chars - four_byte
+    three_byte = (utf8_bytes - ascii_chars - 4 * four_byte) - 2 * other
+    two_byte = other - three_byte
+
+    return int(
+        tokens
+        + two_byte * _TWO_BYTE_COST
+        + three_byte * _THREE_BYTE_COST
+        + four_byte * _FOUR_BYTE_COST
+        + 0.999
+    )
@@ -0,0 +1,146 @@
+"""Write-behind output of rendered parts through a bounded thread pool.
+
+Rendering is CPU work in the convert loop; writing is waiting on storage,
+which on network filesystems can dominate. OutputWriter hands each file to a
+thread pool and returns straight away, so the loop keeps rendering while
+earlier files are written. At most ``max_pending`` writes are outstanding,
+which bounds the rendered Markdown held in memory.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, TextIO
+
+from .splitter import SplitPart
+from .stages import StageStats
+
+DEFAULT_IO_THREADS = 4
+
+
+def _open_text(path: Path) -> TextIO:
+    return open(path, "w", encoding="utf-8")
+
+
+def _make_dirs(path: Path) -> None:
+    os.makedirs(path, exist_ok=True)
+
+
+class OutputWriteError(OSError):
+    """Writing an output file failed."""
+
+    def __init__(self, path: Path, error: OSError):
+        super().__init__(f"Could not write {path}: {error.strerror or error}")
+        self.path = path
+        self.errno = error.errno
+
+
+class OutputWriter:
+    """Write SplitParts to files in the background.
+
+    Each output directory is created once, in the calling thread, before the
+    first file in it is queued. Errors surface deterministically: the one
+    raised is always the first failed write in submission order, whatever
+    order the threads finish in. It is raised by the ``write`` call that
+    finds it while waiting for room, or by ``close``, which first waits for
+    every outstanding write. With ``threads=0`` files are written
+    synchronously.
+
+    ``opener`` and ``make_dirs`` default to the local filesystem; they exist
+    so other sinks (e.g. storage with artificial latency) can be measured.
+    """
+
+    def __init__(
+        self,
+        threads: int = DEFAULT_IO_THREADS,
+        max_pending: Optional[int] = None,
+        opener: Callable[[Path], TextIO] = _open_text,
+        make_dirs: Callable[[Path], None] = _make_dirs,
+    ):
+        self.opener = opener
+        self.make_dirs = make_dirs
+        self.max_pending = max_pending if max_pending is not None else 4 * max(threads, 1)
+        self.files_written = 0
+        self._started = time.monotonic()
+        self._created_dirs: set[Path] = set()
+        self._pending: deque[tuple[Path, Future]] = deque()
+        self._pool = (
+            ThreadPoolExecutor(threads, thread_name_prefix="c2c-writer") if threads > 0 else None
+        )
+
+    def write(self, path: Path, part: SplitPart) -> None:
+        """Queue part to be written to path, waiting while the queue is full."""
+        parent = path.parent
+        if parent not in self._created_dirs:
+            self._call(path, self.make_dirs, parent)
+            self._created_dirs.add(parent)
+
+        if self._pool is None:
+            self._call(path, self._write_file, path, part)
+            self.files_written += 1
+            return
+
+        while len(self._pending) >= self.max_pending:
+            self._finish_oldest()
+        self._pending.append((path, self._pool.submit(self._write_file, path, part)))
+
+    @property
+    def pending(self) -> int:
+        """Writes queued or in progress."""
+        return len(self._pending)
+
+    def stats(self) -> StageStats:
+        capacity = self.max_pending if self._pool is not None else 0
+        elapsed = time.monotonic() - self._started
+        return StageStats("write", len(self._pending), capacity, self.files_written, elapsed)
+
+    def close(self) -> None:
+        """Wait for all outstanding writes, then raise the first error, if any."""
+        error = None
+        try:
+            while self._pending:
+                try:
+                    self._finish_oldest()
+                except OutputWriteError as e:
+                    error = error or e
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+        if error is not None:
+            raise error
+
+    def __enter__(self) -> OutputWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # Already failing: finish what is queued, keep the original error
+        try:
+            self.close()
+        except OutputWriteError:
+            pass
+
+    def _finish_oldest(self) -> None:
+        path, future = self._pending.popleft()
+        try:
+            future.result()
+        except OSError as e:
+            raise OutputWriteError(path, e) from e
+        self.files_written += 1
+
+    def _write_file(self, path: Path, part: SplitPart) -> None:
+        with self.opener(path) as f:
+            part.write_to(f)
+
+    @staticmethod
+    def _call(path: Path, func: Callable, *args) -> None:
+        try:
+            func(*args)
+        except OSError as e:
+            raise OutputWriteError(path, e) from e
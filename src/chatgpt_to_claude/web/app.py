@@ -3,9 +3,19 @@
 from __future__ import annotations
 
 import os
+import sys
 
 from flask import Flask
 
+from .jobs import DEFAULT_JOB_WORKERS, DEFAULT_MAX_QUEUED_JOBS, JobManager
+from .lru import ByteLRU
+from .sessions import (
+    DEFAULT_SESSION_DISK,
+    DEFAULT_SESSION_MEMORY,
+    MAX_SESSION_AGE,
+    SessionStore,
+)
+
 
 def create_app(config: dict | None = None) -> Flask:
     """Create and configure the Flask application.
@@ -24,11 +34,34 @@ def create_app(config: dict | None = None) -> Flask:
 
     # Defaults
     app.config["MAX_CONTENT_LENGTH"] = 200 * 1024 * 1024  # 200MB
+    app.config["MAX_EXTRACTED_LENGTH"] = 4 * 1024 * 1024 * 1024  # decompressed conversations.json
     app.config["SECRET_KEY"] = os.urandom(24).hex()
+    app.config["EXPORT_CACHE"] = None  # core.cache.ExportCache for scanned uploads
+    app.config["JOB_WORKERS"] = DEFAULT_JOB_WORKERS  # conversions running at once
+    app.config["MAX_QUEUED_JOBS"] = DEFAULT_MAX_QUEUED_JOBS
+    app.config["PREVIEW_CACHE_SIZE"] = 32 * 1024 * 1024  # rendered previews, all sessions
+    app.config["SESSION_MEMORY_LIMIT"] = DEFAULT_SESSION_MEMORY  # metadata + index, all sessions
+    app.config["SESSION_SPILL"] = True  # spill idle sessions to disk instead of dropping them
+    app.config["SESSION_DISK_LIMIT"] = DEFAULT_SESSION_DISK  # session directories, all sessions
+    app.config["MAX_SESSION_AGE"] = MAX_SESSION_AGE
 
     if config:
         app.config.update(config)
 
+    app.extensions["jobs"] = JobManager(app.config["JOB_WORKERS"], app.config["MAX_QUEUED_JOBS"])
+    previews = ByteLRU(app.config["PREVIEW_CACHE_SIZE"], sys.getsizeof)
+    app.extensions["previews"] = previews
+    app.extensions["sessions"] = SessionStore(
+        app.config["SESSION_MEMORY_LIMIT"],
+        app.config["MAX_SESSION_AGE"],
+        app.config["SESSION_SPILL"],
+        # Previews are keyed by (session id, conversation id)
+        on_close=lambda session: previews.discard_where(
+            lambda key: key[0] == session.session_id
+        ),
+        max_disk_bytes=app.config["SESSION_DISK_LIMIT"],
+    )
+
     # Register routes
     from .routes import web
     app.register_blueprint(web)
@@ -0,0 +1,67 @@
+"""ZIP archives generated on the fly for streaming responses."""
+
+from __future__ import annotations
+
+import io
+import zipfile
+from typing import Iterable, Iterator, Union
+
+from ..core.splitter import SplitPart
+
+CHUNK_SIZE = 64 * 1024  # bytes buffered before a chunk is handed to the response
+
+Content = Union[str, SplitPart]
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object collecting ZipFile output.
+
+    ZipFile detects that it cannot seek and writes data descriptors after
+    each member instead of patching local headers, so the archive can be
+    sent as it is produced.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self.buffered = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self.buffered += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.buffered = 0
+        return data
+
+
+def stream_zip(entries: Iterable[tuple[str, Content]]) -> Iterator[bytes]:
+    """Yield a deflated ZIP of (path, content) entries in chunks.
+
+    Content is a string or a SplitPart written straight into its member.
+    Only the current member's compressed output is held in memory; the
+    entries iterable is consumed lazily and closed if the consumer stops
+    early (e.g. the client disconnects).
+    """
+    sink = _ChunkSink()
+    entries = iter(entries)
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+            for path, content in entries:
+                with io.TextIOWrapper(zf.open(path, "w"), encoding="utf-8", newline="") as f:
+                    if isinstance(content, str):
+                        f.write(content)
+                    else:
+                        content.write_to(f)
+                if sink.buffered >= CHUNK_SIZE:
+                    yield sink.drain()
+        yield sink.drain()
+    finally:
+        close = getattr(entries, "close", None)
+        if close is not None:
+            close()
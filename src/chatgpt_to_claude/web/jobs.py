@@ -0,0 +1,260 @@
+"""Background conversion jobs for the web UI.
+
+``/api/convert`` queues a Job and returns at once. A fixed number of worker
+threads render queued jobs into their session's result file, while the
+browser follows progress through ``/api/jobs/<id>`` or its event stream.
+Requests never wait on a conversion, so proxies don't time out and server
+threads stay free.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import uuid
+from typing import Optional
+
+from .processing import ConversionSession
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = frozenset({DONE, FAILED, CANCELLED})
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_MAX_QUEUED_JOBS = 16  # unfinished jobs accepted before refusing more
+MAX_JOB_AGE = 3600  # seconds a finished job stays queryable
+MAX_REPORTED_ERRORS = 100  # skipped-conversation errors included in to_dict
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation was requested."""
+
+
+class JobQueueFull(Exception):
+    """Too many unfinished jobs to accept another."""
+
+
+class Job:
+    """Status and progress of one conversion.
+
+    Progress is written only by the worker running the job; readers take
+    snapshots with ``to_dict`` or block in ``wait`` until it changes.
+    """
+
+    def __init__(self, session_id: str):
+        self.job_id = str(uuid.uuid4())
+        self.session_id = session_id
+        self.status = QUEUED
+        self.conversations_total: Optional[int] = None
+        self.conversations_processed = 0
+        self.bytes_written = 0
+        self.skipped: list[str] = []  # errors of conversations left out
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+        self._version = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """Ask the job to stop; a queued job never starts."""
+        if not self.finished:
+            self._cancel.set()
+            self._notify()
+
+    # ConversionProgress, called by the conversion in the worker thread
+
+    def start(self, total: int) -> None:
+        self.conversations_total = total
+        self._notify()
+
+    def advance(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.conversations_processed += 1
+        self._notify()
+
+    def skip(self, error: str) -> None:
+        self.skipped.append(error)
+
+    def add_bytes(self, count: int) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.bytes_written += count
+
+    def eta(self) -> Optional[float]:
+        """Seconds until done, extrapolated from the rate so far."""
+        if self.status != RUNNING or not self.conversations_processed:
+            return None
+        if not self.conversations_total:
+            return None
+        elapsed = time.time() - self.started_at
+        remaining = self.conversations_total - self.conversations_processed
+        return elapsed / self.conversations_processed * remaining
+
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        eta = self.eta()
+        return {
+            "job_id": self.job_id,
+            "session_id": self.session_id,
+            "status": self.status,
+            "conversations_total": self.conversations_total,
+            "conversations_processed": self.conversations_processed,
+            "bytes_written": self.bytes_written,
+            "skipped": len(self.skipped),
+            "skipped_errors": self.skipped[:MAX_REPORTED_ERRORS],
+            "elapsed": round(end - self.started_at, 2) if self.started_at else 0.0,
+            "eta": round(eta, 1) if eta is not None else None,
+            "cancel_requested": self.cancel_requested,
+            "error": self.error,
+        }
+
+    def wait(self, version: int, timeout: float) -> int:
+        """Block until the job changes after ``version``; return the new version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version != version, timeout)
+            return self._version
+
+    def _set_status(self, status: str, error: Optional[str] = None) -> None:
+        now = time.time()
+        if status == RUNNING:
+            self.started_at = now
+        elif status in FINISHED:
+            self.finished_at = now
+        self.error = error
+        self.status = status
+        self._notify()
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+
+class JobManager:
+    """Runs conversion jobs on a fixed number of daemon worker threads.
+
+    At most ``max_queued`` jobs may be unfinished at once; ``submit`` raises
+    JobQueueFull beyond that. A new job for a session cancels the session's
+    previous one, whose result would be out of date anyway. ``shutdown``
+    cancels what is left and stops the workers.
+    """
+
+    def __init__(
+        self, workers: int = DEFAULT_JOB_WORKERS, max_queued: int = DEFAULT_MAX_QUEUED_JOBS,
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: queue.Queue = queue.Queue()
+        self._jobs: dict[str, Job] = {}
+        self._latest: dict[str, Job] = {}  # session id -> newest job
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._shut_down = False
+
+    def submit(self, session: ConversionSession) -> Job:
+        """Queue a conversion of the session's current request."""
+        with self._lock:
+            if self._shut_down:
+                raise RuntimeError("Job manager is shut down")
+            self._prune()
+            unfinished = sum(not job.finished for job in self._jobs.values())
+            if unfinished >= self.max_queued:
+                raise JobQueueFull(f"{unfinished} conversions are already queued")
+
+            previous = self._latest.get(session.session_id)
+            if previous is not None:
+                previous.cancel()
+            job = Job(session.session_id)
+            self._jobs[job.job_id] = job
+            self._latest[session.session_id] = job
+            self._start_workers()
+        self._queue.put((job, session))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def latest_job(self, session_id: str) -> Optional[Job]:
+        """The session's newest job, finished or not."""
+        return self._latest.get(session_id)
+
+    def active_job(self, session_id: str) -> Optional[Job]:
+        """The session's newest job, if it has not finished."""
+        job = self._latest.get(session_id)
+        return job if job is not None and not job.finished else None
+
+    def shutdown(self) -> None:
+        """Cancel unfinished jobs and wait for the worker threads to exit."""
+        with self._lock:
+            self._shut_down = True
+            for job in self._jobs.values():
+                job.cancel()
+            threads, self._threads = self._threads, []
+        for _thread in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work, name=f"c2c-job-{len(self._threads)}", daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:  # shutdown
+                self._queue.task_done()
+                return
+            job, session = item
+            try:
+                self._run(job, session)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _run(job: Job, session: ConversionSession) -> None:
+        if job.cancel_requested:
+            job._set_status(CANCELLED)
+            return
+        job._set_status(RUNNING)
+        chunks = None
+        try:
+            chunks = session.stream_result(spool=True, progress=job)
+            for chunk in chunks:
+                job.add_bytes(len(chunk))
+        except JobCancelled:
+            job._set_status(CANCELLED)
+        except Exception as e:
+            job._set_status(FAILED, error=str(e))
+        else:
+            job._set_status(DONE)
+        finally:
+            if chunks is not None:
+                chunks.close()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - MAX_JOB_AGE
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                if self._latest.get(job.session_id) is job:
+                    del self._latest[job.session_id]
@@ -1,159 +1,354 @@
-"""In-memory processing pipeline for web uploads."""
+"""Processing pipeline for web uploads."""
 
 from __future__ import annotations
 
-import io
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
 import time
 import uuid
-import zipfile
-from typing import Optional
-
-from ..core.extractor import extract_conversations
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Protocol
+
+from ..core.cache import ExportCache, scan_export
+from ..core.extractor import extract_conversations_json
+from ..core.indexer import ConversationIndex, IndexedExport
+from ..core.manifest import content_hasher
 from ..core.markdown_writer import conversation_to_markdown, generate_index
 from ..core.models import OrganizeMode
-from ..core.organizer import deduplicate_path, resolve_output_path, sanitize_filename
-from ..core.parser import parse_conversations, parse_single_conversation
-from ..core.splitter import maybe_split
+from ..core.organizer import deduplicate_path
+from ..core.parser import parse_single_conversation
+from ..core.pipeline import ConvertOptions, render_raw_conversations
 from ..core.statistics import ExportStatistics, compute_statistics, statistics_to_dict
+from .archive import Content, stream_zip
+from .lru import ByteLRU
+
+
+@dataclass
+class ConversionRequest:
+    """Selection and options of a conversion, rendered when downloaded."""
+
+    conversation_ids: Optional[list[str]]
+    options: ConvertOptions
+
+
+class ConversionProgress(Protocol):
+    """Receives progress from ``stream_result``, e.g. a background job."""
+
+    def start(self, total: int) -> None:
+        """Called once with the number of conversations selected."""
+
+    def advance(self) -> None:
+        """Called after each conversation; may raise to abort."""
+
+    def skip(self, error: str) -> None:
+        """Called with the error of a conversation that was skipped."""
 
 
 class ConversionSession:
     """Holds state for an in-progress conversion.
 
-    All data stays in memory — nothing touches disk.
+    Each session owns a private temporary directory holding the upload's
+    conversations.json, decompressed, and any spooled result ZIP. Only the
+    offset index, metadata and statistics stay in memory (about
+    ``memory_bytes``), and ``spill`` can move those to the directory too
+    while the session is idle; they are reloaded on next use. ``close``
+    removes everything.
     """
 
-    def __init__(self, file_data: bytes):
+    def __init__(
+        self,
+        upload: BinaryIO,
+        cache: Optional[ExportCache] = None,
+        max_extracted_bytes: Optional[int] = None,
+    ):
         self.session_id = str(uuid.uuid4())
         self.created_at = time.time()
+        self.workdir = Path(tempfile.mkdtemp(prefix="c2c-session-"))
+        self._lock = threading.RLock()
+        self._leases = 0
+
+        try:
+            # Decompress once, hashing as we go, so previews and downloads
+            # read single conversations at their offsets (memory mapped)
+            # instead of inflating the ZIP up to each one
+            hasher = content_hasher()
+            extract_conversations_json(
+                upload, self.workdir / "conversations.json", max_extracted_bytes, hasher,
+            )
+
+            # One pass records each conversation's byte offset and metadata,
+            # without keeping the decoded JSON. With a cache, re-uploading
+            # the same export skips the pass.
+            if cache is not None:
+                scan = cache.load_or_scan(self.workdir, key=cache.upload_key(hasher.hexdigest()))
+            else:
+                scan = scan_export(self.workdir)
+            self.metadata = scan.metadata
+            self.export = IndexedExport(self.workdir, scan.index())
+            self.export.index.by_id()  # previews look conversations up by id
+        except BaseException:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            raise
 
-        # Parse the raw data from the uploaded ZIP
-        self.raw_data: list[dict] = extract_conversations(io.BytesIO(file_data))
-
-        # Extract metadata (fast pass)
-        self.metadata = list(parse_conversations(self.raw_data, metadata_only=True))
         self.statistics = compute_statistics(self.metadata)
-        self.result_zip: Optional[io.BytesIO] = None
+        self.conversion: Optional[ConversionRequest] = None
+        self.result_path: Optional[Path] = None  # spooled result ZIP
+        self.memory_bytes = self._estimate_memory()
+
+    @property
+    def spilled(self) -> bool:
+        return self.export is None
+
+    @property
+    def busy(self) -> bool:
+        """Whether data is being read, e.g. by a conversion in progress."""
+        return self._leases > 0
+
+    def disk_bytes(self) -> int:
+        """Bytes in the session's directory: extracted JSON, results, spill."""
+        total = 0
+        try:
+            for path in self.workdir.iterdir():
+                total += path.stat().st_size
+        except FileNotFoundError:  # closed meanwhile
+            pass
+        return total
+
+    @contextmanager
+    def in_use(self) -> Iterator[ConversionSession]:
+        """Keep the session in memory while its data is used.
+
+        Reloads a spilled session, and keeps ``spill`` from unloading it
+        until the block ends.
+        """
+        with self._lock:
+            self._load()
+            self._leases += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._leases -= 1
+
+    def load(self) -> None:
+        """Bring a spilled session back into memory."""
+        with self._lock:
+            self._load()
+
+    def spill(self) -> bool:
+        """Move metadata, statistics and index to disk; False if in use."""
+        with self._lock:
+            if self._leases or self.spilled:
+                return False
+            index = self.export.index
+            state = (self.metadata, self.statistics, index.entries, index.fingerprint)
+            path = self._spill_path()
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+
+            self.export.close()
+            self.export = None
+            self.metadata = None
+            self.statistics = None
+            return True
 
     def get_metadata_dicts(self) -> list[dict]:
         """Return metadata as JSON-serializable dicts."""
         result = []
-        for meta in self.metadata:
-            result.append({
-                "id": meta.id,
-                "title": meta.title,
-                "created_at": meta.created_at.isoformat() if meta.created_at else None,
-                "updated_at": meta.updated_at.isoformat() if meta.updated_at else None,
-                "message_count": meta.message_count,
-                "model_slugs": sorted(meta.model_slugs),
-            })
+        with self.in_use():
+            for meta in self.metadata:
+                result.append({
+                    "id": meta.id,
+                    "title": meta.title,
+                    "created_at": meta.created_at.isoformat() if meta.created_at else None,
+                    "updated_at": meta.updated_at.isoformat() if meta.updated_at else None,
+                    "message_count": meta.message_count,
+                    "model_slugs": sorted(meta.model_slugs),
+                })
         return result
 
     def get_statistics_dict(self) -> dict:
-        return statistics_to_dict(self.statistics)
+        with self.in_use():
+            return statistics_to_dict(self.statistics)
 
-    def preview_conversation(self, conversation_id: str) -> Optional[str]:
-        """Full parse and Markdown render of a single conversation."""
-        for raw in self.raw_data:
-            if raw.get("id") == conversation_id:
-                conv = parse_single_conversation(raw)
-                return conversation_to_markdown(conv)
-        return None
+    def preview_conversation(
+        self, conversation_id: str, cache: Optional[ByteLRU] = None,
+    ) -> Optional[str]:
+        """Full parse and Markdown render of a single conversation.
+
+        Renders are kept in ``cache``, keyed by session and conversation id,
+        so paging back and forth through previews decodes each one once.
+        """
+        key = (self.session_id, conversation_id)
+        if cache is not None:
+            markdown = cache.get(key)
+            if markdown is not None:
+                return markdown
+
+        with self.in_use():
+            raw = self.export.get_raw(conversation_id)
+        if raw is None:
+            return None
+        markdown = conversation_to_markdown(parse_single_conversation(raw))
+        if cache is not None:
+            cache.put(key, markdown)
+        return markdown
 
     def convert_selected(
         self,
         conversation_ids: list[str] | None = None,
         organize: str = "monthly",
         include_frontmatter: bool = True,
-    ) -> io.BytesIO:
-        """Convert selected (or all) conversations and build an in-memory ZIP.
+        all_branches: bool = False,
+    ) -> ConversionRequest:
+        """Record which conversations to convert, and how, for download.
+
+        Nothing is rendered here: ``stream_result`` converts while the ZIP
+        is written, so the server never holds a whole result archive.
 
         Args:
             conversation_ids: IDs to include, or None for all.
             organize: Organization mode (flat, monthly, yearly).
             include_frontmatter: Whether to include YAML frontmatter.
+            all_branches: Also export edited/regenerated branches as files.
 
         Returns:
-            BytesIO containing the ZIP file ready for download.
+            The recorded request.
+
+        Raises:
+            ValueError: If organize is not a known mode.
+        """
+        options = ConvertOptions(
+            organize_mode=OrganizeMode(organize),
+            include_frontmatter=include_frontmatter,
+            all_branches=all_branches,
+        )
+        self.conversion = ConversionRequest(conversation_ids or None, options)
+        self._discard_result()
+        return self.conversion
+
+    def stream_result(
+        self, spool: bool = False, progress: Optional[ConversionProgress] = None,
+    ) -> Iterator[bytes]:
+        """Generate the ZIP for the last convert_selected call, in chunks.
+
+        With ``spool``, the archive is also written to a temporary file as it
+        is sent; once complete, ``result_path`` points at it and later
+        downloads are served from disk instead of converting again.
         """
-        organize_mode = OrganizeMode(organize)
+        if self.conversion is None:
+            raise ValueError("No conversion requested")
+        chunks = self._leased(stream_zip(self._archive_entries(self.conversion, progress)))
+        if spool:
+            return self._spool(chunks, self.conversion)
+        return chunks
+
+    def close(self) -> None:
+        """Release the upload and delete the session's temporary files."""
+        with self._lock:
+            self.result_path = None
+            if self.export is not None:
+                self.export.close()
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _leased(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        with self.in_use():
+            yield from chunks
+
+    def _archive_entries(
+        self, conversion: ConversionRequest, progress: Optional[ConversionProgress] = None,
+    ) -> Iterator[tuple[str, Content]]:
+        """(path, content) of every file in the result ZIP, rendered lazily."""
         output_base = "claude_import"
+        selected = self.export.select(conversion.conversation_ids)
+        if progress is not None:
+            progress.start(len(selected))
 
-        # Filter raw data to selected IDs
-        if conversation_ids:
-            id_set = set(conversation_ids)
-            selected = [r for r in self.raw_data if r.get("id") in id_set]
-        else:
-            selected = self.raw_data
-
-        # Parse and convert
-        all_conversations = []
+        summaries = []
+        skipped = []
         used_paths: dict[str, int] = {}
-
-        buf = io.BytesIO()
-        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-            for conv in parse_conversations(selected, metadata_only=False):
-                if not conv.messages:
-                    continue
-
-                parts = maybe_split(conv)
-                for part in parts:
-                    markdown = conversation_to_markdown(
-                        part,
-                        include_frontmatter=include_frontmatter,
-                    )
-                    from pathlib import PurePosixPath, Path
-
-                    out_path = resolve_output_path(part, organize_mode, Path(output_base))
-                    out_path = deduplicate_path(out_path, used_paths)
-                    # Use forward slashes in ZIP
-                    zip_path = str(PurePosixPath(out_path))
-                    zf.writestr(zip_path, markdown)
-
-                all_conversations.append(conv)
-
-            # Add index
-            index_md = generate_index(all_conversations, organize_mode)
-            zf.writestr(f"{output_base}/_INDEX.md", index_md)
-
-            # Add upload guide
-            from ..cli.app import UPLOAD_GUIDE
-            zf.writestr(f"{output_base}/_UPLOAD_GUIDE.md", UPLOAD_GUIDE)
-
-        buf.seek(0)
-        self.result_zip = buf
-        return buf
-
-
-# Simple in-memory session store
-_sessions: dict[str, ConversionSession] = {}
-
-MAX_SESSION_AGE = 3600  # 1 hour
-
-
-def create_session(file_data: bytes) -> ConversionSession:
-    """Create a new conversion session from uploaded file data."""
-    _cleanup_expired()
-    session = ConversionSession(file_data)
-    _sessions[session.session_id] = session
-    return session
-
-
-def get_session(session_id: str) -> Optional[ConversionSession]:
-    """Retrieve a session by ID."""
-    session = _sessions.get(session_id)
-    if session and (time.time() - session.created_at) > MAX_SESSION_AGE:
-        del _sessions[session_id]
-        return None
-    return session
-
-
-def _cleanup_expired():
-    """Remove sessions older than MAX_SESSION_AGE."""
-    now = time.time()
-    expired = [
-        sid for sid, s in _sessions.items()
-        if (now - s.created_at) > MAX_SESSION_AGE
-    ]
-    for sid in expired:
-        del _sessions[sid]
+        for rendered in render_raw_conversations(selected, conversion.options):
+            for rel_path, part in rendered.parts:
+                out_path = deduplicate_path(Path(output_base) / rel_path, used_paths)
+                # Use forward slashes in ZIP
+                zip_path = out_path.as_posix()
+                yield zip_path, part
+                rendered.summary.output_paths.append(zip_path)
+
+            if rendered.parts:
+                summaries.append(rendered.summary)
+            if rendered.error:
+                skipped.append(rendered.error)
+                if progress is not None:
+                    progress.skip(rendered.error)
+            if progress is not None:
+                progress.advance()
+
+        index_md = generate_index(summaries, conversion.options.organize_mode, skipped)
+        yield f"{output_base}/_INDEX.md", index_md
+
+        from ..cli.app import UPLOAD_GUIDE
+        yield f"{output_base}/_UPLOAD_GUIDE.md", UPLOAD_GUIDE
+
+    def _spool(self, chunks: Iterator[bytes], conversion: ConversionRequest) -> Iterator[bytes]:
+        fd, tmp = tempfile.mkstemp(prefix="result-", suffix=".zip", dir=self.workdir)
+        complete = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            chunks.close()
+            # Keep the file only if it is whole and still the current request
+            if complete and self.conversion is conversion:
+                self._discard_result()
+                self.result_path = Path(tmp)
+            else:
+                Path(tmp).unlink(missing_ok=True)
+
+    def _load(self) -> None:
+        if not self.spilled:
+            return
+        with open(self._spill_path(), "rb") as f:
+            self.metadata, self.statistics, entries, fingerprint = pickle.load(f)
+        self.export = IndexedExport(self.workdir, ConversationIndex(entries, fingerprint))
+        self.export.index.by_id()
+
+    def _spill_path(self) -> Path:
+        return self.workdir / "session.pickle"
+
+    def _estimate_memory(self) -> int:
+        """Approximate heap bytes held for metadata and the offset index."""
+        index = self.export.index
+        size = sys.getsizeof(self.metadata) + sys.getsizeof(index.entries)
+        size += sys.getsizeof(index.by_id())
+        size += sum(_approx_sizeof(meta) for meta in self.metadata)
+        size += sum(_approx_sizeof(entry) for entry in index.entries)
+        return size
+
+    def _discard_result(self) -> None:
+        if self.result_path is not None:
+            self.result_path.unlink(missing_ok=True)
+            self.result_path = None
+
+
+def _approx_sizeof(obj) -> int:
+    """Size of an object plus the objects its fields refer to directly."""
+    fields = getattr(obj, "__dict__", None)
+    if fields is not None:
+        values = fields.values()
+        size = sys.getsizeof(obj) + sys.getsizeof(fields)
+    else:
+        values = [getattr(obj, name, None) for name in type(obj).__slots__]
+        size = sys.getsizeof(obj)
+    return size + sum(sys.getsizeof(v) for v in values if v is not None)
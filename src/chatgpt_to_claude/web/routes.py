@@ -2,13 +2,30 @@
 
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, render_template, request, send_file
+import json
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, render_template, request, send_file
 
 from ..core.extractor import ExportFormatError
-from .processing import create_session, get_session
+from .jobs import DONE, JobManager, JobQueueFull
+from .processing import ConversionSession
+from .sessions import SessionStore, SessionStoreFull
 
 web = Blueprint("web", __name__)
 
+DOWNLOAD_NAME = "chatgpt_to_claude_export.zip"
+EVENT_INTERVAL = 0.25  # seconds between progress events
+EVENT_KEEPALIVE = 15.0  # seconds of silence before a keep-alive comment
+
+
+def _jobs() -> JobManager:
+    return current_app.extensions["jobs"]
+
+
+def _sessions() -> SessionStore:
+    return current_app.extensions["sessions"]
+
 
 @web.route("/")
 def index():
@@ -26,11 +43,20 @@ def upload():
     if not file.filename or not file.filename.lower().endswith(".zip"):
         return jsonify({"error": "Please upload a .zip file"}), 400
 
+    store = _sessions()
+    max_extracted = current_app.config.get("MAX_EXTRACTED_LENGTH")
+    if max_extracted is None or max_extracted > store.max_disk_bytes:
+        max_extracted = store.max_disk_bytes  # never larger than all sessions may take
     try:
-        file_data = file.read()
-        session = create_session(file_data)
+        # Werkzeug has already spooled the upload to a temporary file
+        session = ConversionSession(
+            file.stream, current_app.config.get("EXPORT_CACHE"), max_extracted,
+        )
+        store.add(session)
     except ExportFormatError as e:
         return jsonify({"error": str(e)}), 400
+    except SessionStoreFull as e:
+        return jsonify({"error": f"Server busy, try again shortly: {e}"}), 503
     except Exception as e:
         return jsonify({"error": f"Failed to process file: {e}"}), 500
 
@@ -44,11 +70,14 @@ def upload():
 @web.route("/api/preview/<session_id>/<conversation_id>")
 def preview_conversation(session_id: str, conversation_id: str):
     """Full parse and render of a single conversation for preview."""
-    session = get_session(session_id)
+    session = _sessions().get(session_id)
     if not session:
         return jsonify({"error": "Session expired or not found"}), 404
 
-    markdown = session.preview_conversation(conversation_id)
+    try:
+        markdown = session.preview_conversation(conversation_id, current_app.extensions["previews"])
+    except ExportFormatError as e:
+        return jsonify({"error": str(e)}), 422
     if markdown is None:
         return jsonify({"error": "Conversation not found"}), 404
 
@@ -57,42 +86,111 @@ def preview_conversation(session_id: str, conversation_id: str):
 
 @web.route("/api/convert", methods=["POST"])
 def convert():
-    """Convert selected conversations and return download info."""
+    """Queue a conversion of the selected conversations and return its job."""
     data = request.get_json()
     if not data or "session_id" not in data:
         return jsonify({"error": "Missing session_id"}), 400
 
-    session = get_session(data["session_id"])
+    session = _sessions().get(data["session_id"])
     if not session:
         return jsonify({"error": "Session expired or not found"}), 404
 
     conversation_ids = data.get("conversation_ids")  # None = all
     organize = data.get("organize", "monthly")
     include_frontmatter = data.get("include_frontmatter", True)
+    all_branches = bool(data.get("all_branches", False))
 
     try:
         session.convert_selected(
             conversation_ids=conversation_ids,
             organize=organize,
             include_frontmatter=include_frontmatter,
+            all_branches=all_branches,
         )
+        job = _jobs().submit(session)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid options: {e}"}), 400
+    except JobQueueFull as e:
+        return jsonify({"error": f"Server busy, try again shortly: {e}"}), 503
     except Exception as e:
         return jsonify({"error": f"Conversion failed: {e}"}), 500
 
-    return jsonify({"ready": True, "session_id": data["session_id"]})
+    return jsonify(job.to_dict()), 202
+
+
+@web.route("/api/jobs/<job_id>")
+def job_status(job_id: str):
+    """Progress of a conversion job."""
+    job = _jobs().get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@web.route("/api/jobs/<job_id>/events")
+def job_events(job_id: str):
+    """Server-sent events with the job's progress until it finishes."""
+    job = _jobs().get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    def events():
+        version = None
+        while True:
+            current = job.wait(version, timeout=EVENT_KEEPALIVE)
+            if current == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = current
+            yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if job.finished:
+                return
+            time.sleep(EVENT_INTERVAL)  # coalesce per-conversation updates
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@web.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id: str):
+    """Ask a queued or running job to stop."""
+    job = _jobs().get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    job.cancel()
+    return jsonify(job.to_dict())
 
 
 @web.route("/api/download/<session_id>")
 def download(session_id: str):
-    """Stream the generated ZIP file to the browser."""
-    session = get_session(session_id)
-    if not session or not session.result_zip:
+    """Send the ZIP written by the session's finished conversion job."""
+    session = _sessions().get(session_id)
+    job = _jobs().latest_job(session_id)
+    if not session or session.conversion is None or job is None:
         return jsonify({"error": "No conversion result found"}), 404
-
-    session.result_zip.seek(0)
+    if not job.finished:
+        return jsonify({"error": "Conversion still running"}), 409
+    if job.status != DONE:
+        return jsonify({"error": f"Conversion {job.status}, nothing to download"}), 410
+
+    result_path = session.result_path
+    if result_path is None or not result_path.is_file():
+        return jsonify({"error": "Conversion result is no longer available"}), 410
     return send_file(
-        session.result_zip,
+        result_path,
         mimetype="application/zip",
         as_attachment=True,
-        download_name="chatgpt_to_claude_export.zip",
+        download_name=DOWNLOAD_NAME,
     )
+
+
+@web.route("/api/metrics")
+def metrics():
+    """Session store and cache counters for monitoring."""
+    return jsonify({
+        "sessions": _sessions().stats(),
+        "preview_cache": current_app.extensions["previews"].stats(),
+    })
@@ -0,0 +1,241 @@
+"""Store of web conversion sessions, bounded by memory and age.
+
+Each session reports roughly how many bytes of metadata and index it keeps
+in memory. When the sessions held in memory add up to more than the cap,
+the least recently used ones are spilled to their temporary directory (or,
+with spilling off, closed) until the total fits. Files on disk have a
+budget of their own: a new upload closes the least recently used idle
+sessions until all session directories fit, and is refused if they still
+don't. Sessions expire a fixed
+time after upload; a timer thread sleeps until the next deadline on a heap
+instead of scanning every session; a session still busy converting at its
+deadline is retried a little later rather than closed under the running
+conversion. ``on_close`` is called for every
+session the store closes, e.g. to drop its cached previews.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from .processing import ConversionSession
+
+DEFAULT_SESSION_MEMORY = 512 * 1024 * 1024
+DEFAULT_SESSION_DISK = 16 * 1024 * 1024 * 1024  # extracted uploads, results, spills
+MAX_SESSION_AGE = 3600  # 1 hour
+EXPIRY_RETRY = 10.0  # seconds until a busy session's expiry is retried
+
+
+class SessionStoreFull(Exception):
+    """Sessions in use already take up the whole disk budget."""
+
+
+class SessionStore:
+    """Sessions by id, in least-recently-used order."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_SESSION_MEMORY,
+        max_age: float = MAX_SESSION_AGE,
+        spill: bool = True,
+        on_close: Optional[Callable[[ConversionSession], None]] = None,
+        max_disk_bytes: int = DEFAULT_SESSION_DISK,
+    ):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.spill = spill
+        self.max_disk_bytes = max_disk_bytes
+        self.on_close = on_close
+        self.evictions = 0
+        self.spills = 0
+        self.expirations = 0
+        self._sessions: OrderedDict[str, ConversionSession] = OrderedDict()
+        self._deadlines: list[tuple[float, str]] = []  # heap of (expiry, session id)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._timer: Optional[threading.Thread] = None
+
+    def add(self, session: ConversionSession) -> None:
+        """Store a new session, making room for it under the memory and disk caps.
+
+        Raises:
+            SessionStoreFull: If busy sessions leave no disk space for it;
+                the new session is closed.
+        """
+        deadline = session.created_at + self.max_age
+        with self._lock:
+            self._sessions[session.session_id] = session
+            heapq.heappush(self._deadlines, (deadline, session.session_id))
+            if self._timer is None:
+                self._timer = threading.Thread(
+                    target=self._expire_loop, name="c2c-sessions", daemon=True,
+                )
+                self._timer.start()
+            elif self._deadlines[0][1] == session.session_id:
+                self._wakeup.notify()
+        self._make_room(keep=session)
+        self._limit_disk(keep=session)
+
+    def get(self, session_id: str) -> Optional[ConversionSession]:
+        """The session, marked most recently used and loaded back if spilled."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            expired = time.time() >= session.created_at + self.max_age
+            if expired and not session.busy:  # a busy one expires once idle
+                del self._sessions[session_id]
+                self.expirations += 1
+                closed = [session]
+                session = None
+            else:
+                self._sessions.move_to_end(session_id)
+                closed = []
+        self._close_all(closed)
+        if session is None:
+            return None
+
+        if session.spilled:
+            session.load()  # outside the store lock
+            self._make_room(keep=session)
+        return session
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._close_all([session])
+
+    def close(self) -> None:
+        """Close every session."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._deadlines.clear()
+        self._close_all(sessions)
+
+    def resident_bytes(self) -> int:
+        """Approximate memory held by sessions that are not spilled."""
+        with self._lock:
+            return _resident_bytes(self._sessions.values())
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        """Occupancy and counters as a JSON-serializable dict."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "spilled": sum(s.spilled for s in sessions),
+            "resident_bytes": _resident_bytes(sessions),
+            "max_bytes": self.max_bytes,
+            "disk_bytes": sum(s.disk_bytes() for s in sessions),
+            "max_disk_bytes": self.max_disk_bytes,
+            "spills": self.spills,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _make_room(self, keep: ConversionSession) -> None:
+        """Spill or drop LRU sessions until resident memory is under the cap.
+
+        Victims are picked under the lock but spilled or closed after it is
+        released, so their disk writes don't stall other requests. ``keep``
+        (the session being used) and sessions busy converting are never
+        touched, so the total can stay over the cap while nothing else is
+        idle.
+        """
+        victims = []
+        with self._lock:
+            total = _resident_bytes(self._sessions.values())
+            for session_id, session in list(self._sessions.items()):
+                if total <= self.max_bytes:
+                    break
+                if session is keep or session.spilled or session.busy:
+                    continue
+                if not self.spill:
+                    del self._sessions[session_id]
+                    self.evictions += 1
+                victims.append(session)
+                total -= session.memory_bytes
+
+        if not self.spill:
+            self._close_all(victims)
+            return
+        for session in victims:
+            if session.spill():  # False if it became busy meanwhile
+                with self._lock:
+                    self.spills += 1
+
+    def _limit_disk(self, keep: ConversionSession) -> None:
+        """Close idle LRU sessions until all session files fit max_disk_bytes.
+
+        Directory sizes are read without the lock. If busy sessions alone
+        exceed the budget, ``keep`` (the new session) is closed instead and
+        SessionStoreFull raised.
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        sizes = {id(s): s.disk_bytes() for s in sessions}
+        total = sum(sizes.values())
+        if total <= self.max_disk_bytes:
+            return
+
+        closed = []
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                if total <= self.max_disk_bytes:
+                    break
+                if session is keep or session.busy or id(session) not in sizes:
+                    continue
+                del self._sessions[session_id]
+                self.evictions += 1
+                closed.append(session)
+                total -= sizes[id(session)]
+            full = total > self.max_disk_bytes
+            if full:
+                self._sessions.pop(keep.session_id, None)
+                closed.append(keep)
+        self._close_all(closed)
+        if full:
+            raise SessionStoreFull(
+                f"uploads in use already take {total - sizes.get(id(keep), 0)} bytes on disk"
+            )
+
+    def _close_all(self, sessions: list[ConversionSession]) -> None:
+        for session in sessions:
+            session.close()
+            if self.on_close is not None:
+                self.on_close(session)
+
+    def _expire_loop(self) -> None:
+        while True:
+            with self._lock:
+                expired = []
+                now = time.time()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _deadline, session_id = heapq.heappop(self._deadlines)
+                    session = self._sessions.get(session_id)
+                    if session is None:
+                        continue
+                    if session.busy:
+                        # Closing would pull the data from under a conversion
+                        heapq.heappush(self._deadlines, (now + EXPIRY_RETRY, session_id))
+                        continue
+                    del self._sessions[session_id]
+                    self.expirations += 1
+                    expired.append(session)
+                if not expired:
+                    timeout = self._deadlines[0][0] - now if self._deadlines else None
+                    self._wakeup.wait(timeout)
+            self._close_all(expired)
+
+
+def _resident_bytes(sessions) -> int:
+    return sum(s.memory_bytes for s in sessions if not s.spilled)
@@ -31,6 +31,8 @@
     const convertAllBtn = $("#convert-all-btn");
     const startOverBtn = $("#start-over-btn");
     const convertingOverlay = $("#converting-overlay");
+    const convertingSubtext = $("#converting-subtext");
+    const cancelConvertBtn = $("#cancel-convert-btn");
     const previewModal = $("#preview-modal");
     const previewTitle = $("#preview-title");
     const previewBody = $("#preview-body");
@@ -301,7 +303,10 @@
     convertBtn.addEventListener("click", () => convertAndDownload(Array.from(selectedIds)));
     convertAllBtn.addEventListener("click", () => convertAndDownload(null));
 
+    let currentJob = null;
+
     async function convertAndDownload(ids) {
+        convertingSubtext.textContent = "Building your Claude-ready export";
         convertingOverlay.hidden = false;
 
         const options = {
@@ -309,6 +314,7 @@
             conversation_ids: ids,
             organize: $("#opt-organize").value,
             include_frontmatter: $("#opt-frontmatter").checked,
+            all_branches: $("#opt-all-branches").checked,
         };
 
         try {
@@ -325,16 +331,75 @@
                 return;
             }
 
-            // Trigger download
-            window.location.href = `/api/download/${sessionId}`;
-
-            setTimeout(() => { convertingOverlay.hidden = true; }, 2000);
+            followJob(data.job_id);
         } catch (err) {
             alert("Conversion error: " + err.message);
             convertingOverlay.hidden = true;
         }
     }
 
+    // The conversion runs as a background job; its event stream reports
+    // progress until it is done, then the finished ZIP is downloaded.
+    function followJob(jobId) {
+        const events = new EventSource(`/api/jobs/${jobId}/events`);
+        currentJob = { id: jobId, events };
+
+        events.onmessage = (e) => {
+            const job = JSON.parse(e.data);
+            convertingSubtext.textContent = describeJob(job);
+
+            if (job.status === "done") {
+                finishJob();
+                window.location.href = `/api/download/${job.session_id}`;
+            } else if (job.status === "failed") {
+                finishJob();
+                alert("Conversion failed: " + (job.error || "Unknown error"));
+            } else if (job.status === "cancelled") {
+                finishJob();
+            }
+        };
+        events.onerror = () => {
+            if (events.readyState === EventSource.CLOSED) {
+                finishJob();
+                alert("Lost connection to the conversion");
+            }
+        };
+    }
+
+    function finishJob() {
+        if (currentJob) currentJob.events.close();
+        currentJob = null;
+        convertingOverlay.hidden = true;
+    }
+
+    function describeJob(job) {
+        if (job.status === "queued") return "Waiting for a free worker...";
+        if (job.conversations_total == null) return "Starting...";
+        let text = `${job.conversations_processed.toLocaleString()} of ` +
+            `${job.conversations_total.toLocaleString()} conversations, ` +
+            `${formatBytes(job.bytes_written)} written`;
+        if (job.skipped) text += ` · ${job.skipped.toLocaleString()} skipped`;
+        if (job.eta != null) text += ` · about ${Math.ceil(job.eta)}s left`;
+        return text;
+    }
+
+    function formatBytes(n) {
+        if (n < 1024) return `${n} B`;
+        if (n < 1024 * 1024) return `${(n / 1024).toFixed(0)} KB`;
+        return `${(n / (1024 * 1024)).toFixed(1)} MB`;
+    }
+
+    cancelConvertBtn.addEventListener("click", async () => {
+        if (!currentJob) return;
+        const jobId = currentJob.id;
+        finishJob();
+        try {
+            await fetch(`/api/jobs/${jobId}/cancel`, { method: "POST" });
+        } catch (err) {
+            // The job is abandoned either way; nothing to report
+        }
+    });
+
     // ─── Start Over ───
 
     startOverBtn.addEventListener("click", () => {
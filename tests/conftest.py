@@ -149,3 +149,9 @@ def sample_zip_path(tmp_path, sample_zip_bytes):
     zip_path = tmp_path / "chatgpt_export.zip"
     zip_path.write_bytes(sample_zip_bytes)
     return zip_path
+
+
+@pytest.fixture(autouse=True)
+def isolated_user_cache(tmp_path_factory, monkeypatch):
+    """Keep index sidecar fallbacks and scan caches out of the real ~/.cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("xdg-cache")))
@@ -0,0 +1,100 @@
+"""Tests for the on-disk cache of scanned exports."""
+
+import io
+import json
+import os
+import zlib
+
+from chatgpt_to_claude.core import cache as cache_module
+from chatgpt_to_claude.core.cache import ExportCache, scan_export
+from chatgpt_to_claude.core.parser import parse_conversations
+
+
+def _export(tmp_path, name, conversations):
+    path = tmp_path / name
+    path.mkdir()
+    (path / "conversations.json").write_text(json.dumps(conversations))
+    return path
+
+
+def test_scan_matches_metadata_parse(tmp_path, sample_conversations):
+    export = _export(tmp_path, "export", sample_conversations)
+    scan = scan_export(export)
+
+    assert [e.id for e in scan.entries] == ["conv-001", "conv-002"]
+    assert len(set(scan.hashes)) == 2
+    assert scan.metadata == list(parse_conversations(sample_conversations, metadata_only=True))
+
+
+def test_cached_scan_is_reused_until_the_export_changes(
+    tmp_path, sample_conversations, monkeypatch,
+):
+    export = _export(tmp_path, "export", sample_conversations)
+    cache = ExportCache(tmp_path / "cache")
+    first = cache.load_or_scan(export)
+
+    calls = []
+    monkeypatch.setattr(cache_module, "scan_export", lambda source: calls.append(source) or first)
+    assert cache.load_or_scan(export).metadata == first.metadata
+    assert calls == []
+
+    (export / "conversations.json").write_text(json.dumps(sample_conversations[:1]))
+    cache.load_or_scan(export)
+    assert calls == [export]
+
+
+def test_uploads_are_keyed_by_content(tmp_path, sample_zip_bytes):
+    cache = ExportCache(tmp_path / "cache")
+    cache.load_or_scan(io.BytesIO(sample_zip_bytes), key=cache.upload_key("abc"))
+    assert cache.get(cache.upload_key("abc")) is not None
+    assert cache.get(cache.upload_key("abd")) is None
+
+
+def test_least_recently_used_scans_are_evicted(tmp_path, sample_conversations):
+    exports = [_export(tmp_path, f"export{i}", sample_conversations[:1]) for i in range(3)]
+    probe = ExportCache(tmp_path / "probe")
+    probe.load_or_scan(exports[0])
+    entry_size = next((tmp_path / "probe").iterdir()).stat().st_size
+
+    cache = ExportCache(tmp_path / "cache", max_bytes=2 * entry_size + entry_size // 2)
+    keys = [cache.key_for(e) for e in exports]
+    for i, export in enumerate(exports[:2]):
+        cache.load_or_scan(export)
+        os.utime(cache._path(keys[i]), ns=(i * 10**9, i * 10**9))
+    assert cache.get(keys[0]) is not None  # touches the first: now most recent
+
+    cache.load_or_scan(exports[2])
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+
+def test_corrupt_cache_file_is_a_miss(tmp_path, sample_conversations):
+    export = _export(tmp_path, "export", sample_conversations)
+    cache = ExportCache(tmp_path / "cache")
+    key = cache.key_for(export)
+    cache.load_or_scan(export)
+    cache._path(key).write_bytes(b"not a cache entry")
+
+    assert cache.get(key) is None
+    assert not cache._path(key).exists()
+
+
+def test_scan_from_an_unimportable_class_is_a_miss(tmp_path):
+    cache = ExportCache(tmp_path / "cache")
+    key = cache.upload_key("abc")
+    # Protocol 0 pickle of a class from a module that no longer exists
+    stale = b"cchatgpt_to_claude.removed_module\nExportScan\n."
+    cache.directory.mkdir(parents=True)
+    cache._path(key).write_bytes(zlib.compress(stale))
+
+    assert cache.get(key) is None
+    assert not cache._path(key).exists()
+
+
+def test_keys_change_with_the_release(tmp_path, monkeypatch):
+    cache = ExportCache(tmp_path / "cache")
+    key = cache.upload_key("abc")
+    monkeypatch.setattr(cache_module, "__version__", "0.0.0-test")
+    assert cache.upload_key("abc") != key
@@ -0,0 +1,387 @@
+"""End-to-end tests for the CLI commands."""
+
+import json
+import os
+import tracemalloc
+
+from click.testing import CliRunner
+
+from chatgpt_to_claude.cli import app
+from chatgpt_to_claude.cli.app import cli
+from chatgpt_to_claude.core.manifest import remove_stale_outputs
+
+
+def _read_tree(root):
+    return {
+        str(p.relative_to(root)): p.read_text(encoding="utf-8")
+        for p in sorted(root.rglob("*")) if p.is_file()
+    }
+
+
+def _export_with_duplicate_titles(tmp_path, sample_conversations, copies=6):
+    convs = []
+    for i in range(copies):
+        for conv in sample_conversations:
+            convs.append(dict(conv, id=f"{conv['id']}-{i}"))
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    (export_dir / "conversations.json").write_text(json.dumps(convs))
+    return export_dir
+
+
+def test_convert_writes_markdown_and_index(tmp_path, sample_zip_path):
+    out = tmp_path / "out"
+    result = CliRunner().invoke(cli, ["convert", str(sample_zip_path), "-o", str(out)])
+
+    assert result.exit_code == 0, result.output
+    files = _read_tree(out)
+    assert "2024-03/Python_async_patterns.md" in files
+    assert "2024-02/Sourdough_recipe.md" in files
+    assert "Python async patterns" in files["_INDEX.md"]
+
+
+def test_parallel_convert_matches_serial(tmp_path, sample_conversations):
+    export_dir = _export_with_duplicate_titles(tmp_path, sample_conversations)
+    runner = CliRunner()
+
+    serial = runner.invoke(cli, ["convert", str(export_dir), "-o", str(tmp_path / "serial")])
+    parallel = runner.invoke(
+        cli, ["convert", str(export_dir), "-o", str(tmp_path / "parallel"), "--jobs", "2"],
+    )
+
+    assert serial.exit_code == 0, serial.output
+    assert parallel.exit_code == 0, parallel.output
+    serial_files = _read_tree(tmp_path / "serial")
+    assert "2024-03/Python_async_patterns_5.md" in serial_files
+    assert _read_tree(tmp_path / "parallel") == serial_files
+
+
+def test_convert_selected_ids(tmp_path, sample_zip_path):
+    out = tmp_path / "out"
+    result = CliRunner().invoke(
+        cli, ["convert", str(sample_zip_path), "-o", str(out), "--id", "conv-002"],
+    )
+
+    assert result.exit_code == 0, result.output
+    files = _read_tree(out)
+    assert "2024-02/Sourdough_recipe.md" in files
+    assert "2024-03/Python_async_patterns.md" not in files
+
+
+def test_convert_reports_missing_export(tmp_path):
+    result = CliRunner().invoke(cli, ["convert", str(tmp_path), "-o", str(tmp_path / "out")])
+    assert result.exit_code == 1
+    assert "conversations.json" in result.output
+
+
+def _write_large_export(export_dir, conversations=400, messages=40, text_size=2000):
+    """Write a synthetic export far larger than the memory budget below."""
+    export_dir.mkdir()
+    filler = "lorem ipsum dolor sit amet " * (text_size // 27)
+    with open(export_dir / "conversations.json", "w", encoding="utf-8") as f:
+        f.write("[")
+        for c in range(conversations):
+            mapping = {"root": {"id": "root", "message": None, "parent": None, "children": ["m0"]}}
+            for m in range(messages):
+                mapping[f"m{m}"] = {
+                    "id": f"m{m}",
+                    "message": {
+                        "id": f"m{m}",
+                        "author": {"role": "user" if m % 2 == 0 else "assistant"},
+                        "content": {"content_type": "text", "parts": [f"{m}: {filler}"]},
+                        "create_time": 1710000000.0 + c * 3600 + m,
+                        "metadata": {"model_slug": "gpt-4"} if m % 2 else {},
+                    },
+                    "parent": "root" if m == 0 else f"m{m - 1}",
+                    "children": [f"m{m + 1}"] if m + 1 < messages else [],
+                }
+            conv = {
+                "id": f"conv-{c}",
+                "title": f"Conversation {c}",
+                "create_time": 1710000000.0 + c * 3600,
+                "update_time": 1710000000.0 + c * 3600 + messages,
+                "mapping": mapping,
+            }
+            f.write(("," if c else "") + json.dumps(conv))
+        f.write("]")
+    return (export_dir / "conversations.json").stat().st_size
+
+
+def test_convert_memory_stays_bounded(tmp_path):
+    export_size = _write_large_export(tmp_path / "export")
+    memory_budget = 12 << 20  # bytes of Python heap at peak
+
+    tracemalloc.start()
+    try:
+        args = ["convert", str(tmp_path / "export"), "-o", str(tmp_path / "out")]
+        result = CliRunner().invoke(cli, args)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert result.exit_code == 0, result.output
+    assert export_size > 2 * memory_budget
+    assert peak < memory_budget, f"peak {peak} bytes for a {export_size} byte export"
+    assert "400" in (tmp_path / "out" / "_INDEX.md").read_text(encoding="utf-8")
+
+
+def test_convert_rejects_two_size_budgets(tmp_path, sample_zip_path):
+    result = CliRunner().invoke(
+        cli,
+        ["convert", str(sample_zip_path), "-o", str(tmp_path / "out"),
+         "--max-bytes", "1000", "--max-tokens", "1000"],
+    )
+    assert result.exit_code == 2
+    assert "cannot be combined" in result.output
+
+
+def test_convert_all_branches_writes_branch_files(tmp_path, sample_conversations):
+    conv = json.loads(json.dumps(sample_conversations[0]))
+    # Regenerate the first answer: msg-1 gets a second, abandoned reply
+    conv["mapping"]["msg-1"]["children"] = ["msg-2b", "msg-2"]
+    conv["mapping"]["msg-2b"] = dict(
+        conv["mapping"]["msg-2"], id="msg-2b", children=[],
+        message=dict(conv["mapping"]["msg-2"]["message"], id="msg-2b",
+                     content={"content_type": "text", "parts": ["An earlier draft answer."]}),
+    )
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    (export_dir / "conversations.json").write_text(json.dumps([conv]))
+
+    out = tmp_path / "out"
+    result = CliRunner().invoke(cli, ["convert", str(export_dir), "-o", str(out), "--all-branches"])
+
+    assert result.exit_code == 0, result.output
+    files = _read_tree(out)
+    branch = files["2024-03/Python_async_patterns_Branch_1.md"]
+    assert "continues after message 1 of the main conversation" in branch
+    assert "An earlier draft answer." in branch
+    assert "How does async/await work" not in branch  # shared prefix is not repeated
+    assert "An earlier draft answer." not in files["2024-03/Python_async_patterns.md"]
+
+
+def test_convert_skips_malformed_conversations(tmp_path, sample_conversations):
+    cyclic = {
+        "id": "conv-cyclic",
+        "title": "Cyclic",
+        "current_node": "a",
+        "mapping": {
+            "a": {"id": "a", "message": None, "parent": "b", "children": []},
+            "b": {"id": "b", "message": None, "parent": "a", "children": ["a"]},
+        },
+    }
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    (export_dir / "conversations.json").write_text(json.dumps([cyclic] + sample_conversations))
+
+    for jobs in ("1", "2"):
+        out = tmp_path / f"out{jobs}"
+        args = ["convert", str(export_dir), "-o", str(out), "--jobs", jobs]
+        result = CliRunner().invoke(cli, args)
+
+        assert result.exit_code == 0, result.output
+        assert "Skipped" in result.output and "conv-cyclic" in result.output
+        assert "2024-03/Python_async_patterns.md" in _read_tree(out)
+
+
+def _write_export(export_dir, conversations):
+    export_dir.mkdir(exist_ok=True)
+    (export_dir / "conversations.json").write_text(json.dumps(conversations))
+
+
+def _age_outputs(root):
+    """Backdate every output so rewrites show up as changed mtimes."""
+    for p in root.rglob("*.md"):
+        os.utime(p, ns=(1_000_000_000, 1_000_000_000))
+    return {p: p.stat().st_mtime_ns for p in root.rglob("*.md")}
+
+
+def test_incremental_rerun_skips_unchanged(tmp_path, sample_conversations):
+    export_dir = tmp_path / "export"
+    _write_export(export_dir, sample_conversations)
+    out = tmp_path / "out"
+    runner = CliRunner()
+
+    first = runner.invoke(cli, ["convert", str(export_dir), "-o", str(out)])
+    assert first.exit_code == 0, first.output
+    files = _read_tree(out)
+    mtimes = _age_outputs(out)
+
+    for jobs in ("1", "2"):
+        again = runner.invoke(cli, ["convert", str(export_dir), "-o", str(out), "--jobs", jobs])
+        assert again.exit_code == 0, again.output
+        assert "Unchanged since last run: 2" in again.output
+        assert _read_tree(out) == files
+        conversation_files = {p: m for p, m in mtimes.items() if not p.name.startswith("_")}
+        assert all(p.stat().st_mtime_ns == m for p, m in conversation_files.items())
+
+
+def test_incremental_rerun_updates_and_removes_stale(tmp_path, sample_conversations):
+    export_dir = tmp_path / "export"
+    _write_export(export_dir, sample_conversations)
+    out = tmp_path / "out"
+    runner = CliRunner()
+    assert runner.invoke(cli, ["convert", str(export_dir), "-o", str(out)]).exit_code == 0
+
+    # Rename the first conversation and drop the second from the export
+    renamed = dict(sample_conversations[0], title="Async in depth")
+    renamed["update_time"] += 60
+    _write_export(export_dir, [renamed])
+    result = runner.invoke(cli, ["convert", str(export_dir), "-o", str(out)])
+
+    assert result.exit_code == 0, result.output
+    files = _read_tree(out)
+    assert "2024-03/Async_in_depth.md" in files
+    assert "2024-03/Python_async_patterns.md" not in files
+    assert "2024-02/Sourdough_recipe.md" not in files
+    assert not (out / "2024-02").exists()
+    assert "Sourdough" not in files["_INDEX.md"]
+
+
+def test_forced_rerun_still_removes_stale_outputs(tmp_path, sample_conversations):
+    export_dir = tmp_path / "export"
+    _write_export(export_dir, sample_conversations)
+    out = tmp_path / "out"
+    runner = CliRunner()
+    assert runner.invoke(cli, ["convert", str(export_dir), "-o", str(out)]).exit_code == 0
+
+    _write_export(export_dir, sample_conversations[:1])
+    mtimes = _age_outputs(out)
+    result = runner.invoke(cli, ["convert", str(export_dir), "-o", str(out), "--force"])
+
+    assert result.exit_code == 0, result.output
+    files = _read_tree(out)
+    assert "2024-03/Python_async_patterns.md" in files
+    assert "2024-02/Sourdough_recipe.md" not in files
+    assert all(p.stat().st_mtime_ns != m for p, m in mtimes.items() if p.exists())
+
+    # The new manifest still covers the forced run's outputs
+    _write_export(export_dir, [])
+    assert runner.invoke(cli, ["convert", str(export_dir), "-o", str(out)]).exit_code == 0
+    assert "2024-03/Python_async_patterns.md" not in _read_tree(out)
+
+
+def test_stale_outputs_outside_the_directory_are_not_removed(tmp_path):
+    out = tmp_path / "out"
+    (out / "2024-03").mkdir(parents=True)
+    (out / "2024-03" / "a.md").write_text("a")
+    outside = tmp_path / "keep.md"
+    outside.write_text("keep")
+
+    stale = {"2024-03/a.md", "../keep.md", str(outside), "."}
+    assert remove_stale_outputs(out, stale) == 1
+    assert outside.exists() and out.exists()
+    assert not (out / "2024-03").exists()
+
+
+def test_changed_options_reconvert_everything(tmp_path, sample_conversations):
+    export_dir = tmp_path / "export"
+    _write_export(export_dir, sample_conversations)
+    out = tmp_path / "out"
+    runner = CliRunner()
+    assert runner.invoke(cli, ["convert", str(export_dir), "-o", str(out)]).exit_code == 0
+
+    result = runner.invoke(cli, ["convert", str(export_dir), "-o", str(out), "--organize", "flat"])
+
+    assert result.exit_code == 0, result.output
+    assert "Unchanged since last run: 0" in result.output
+    assert sorted(p for p in _read_tree(out) if not p.startswith(("_", "."))) == [
+        "Python_async_patterns.md", "Sourdough_recipe.md",
+    ]
+
+
+def test_convert_uses_scan_cached_by_stats(tmp_path, sample_conversations, monkeypatch):
+    export_dir = tmp_path / "export"
+    _write_export(export_dir, sample_conversations)
+    out = tmp_path / "out"
+    runner = CliRunner()
+    assert runner.invoke(cli, ["convert", str(export_dir), "-o", str(out)]).exit_code == 0
+
+    renamed = dict(sample_conversations[0], title="Async in depth")
+    _write_export(export_dir, [renamed, sample_conversations[1]])
+    stats = runner.invoke(cli, ["stats", str(export_dir)])
+    assert stats.exit_code == 0, stats.output
+
+    # The cached scan replaces streaming the whole export
+    def fail(*args, **kwargs):
+        raise AssertionError("convert should have used the cached scan")
+
+    monkeypatch.setattr(app, "decode_elements", fail)
+    result = runner.invoke(cli, ["convert", str(export_dir), "-o", str(out)])
+
+    assert result.exit_code == 0, result.output
+    assert "Unchanged since last run: 1" in result.output
+    files = _read_tree(out)
+    assert "2024-03/Async_in_depth.md" in files
+    assert "2024-03/Python_async_patterns.md" not in files
+    assert "2024-02/Sourdough_recipe.md" in files
+
+    # Without the cache the export is streamed again, to the same result
+    monkeypatch.undo()
+    no_cache = runner.invoke(cli, ["--cache-size", "0", "convert", str(export_dir), "-o", str(out)])
+    assert no_cache.exit_code == 0, no_cache.output
+    assert "Unchanged since last run: 2" in no_cache.output
+    assert _read_tree(out) == files
+
+
+def test_first_convert_uses_scan_cached_by_stats(tmp_path, sample_conversations, monkeypatch):
+    export_dir = tmp_path / "export"
+    _write_export(export_dir, sample_conversations)
+    runner = CliRunner()
+    assert runner.invoke(cli, ["stats", str(export_dir)]).exit_code == 0
+
+    def fail(*args, **kwargs):
+        raise AssertionError("convert should have used the cached scan")
+
+    monkeypatch.setattr(app, "decode_elements", fail)
+    cached = runner.invoke(cli, ["convert", str(export_dir), "-o", str(tmp_path / "cached")])
+    monkeypatch.undo()
+    streamed = runner.invoke(
+        cli, ["--cache-size", "0", "convert", str(export_dir), "-o", str(tmp_path / "streamed")],
+    )
+
+    assert cached.exit_code == 0, cached.output
+    assert streamed.exit_code == 0, streamed.output
+    assert _read_tree(tmp_path / "cached") == _read_tree(tmp_path / "streamed")
+
+
+def test_convert_reports_write_errors(tmp_path, sample_zip_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "2024-03").write_text("a file where a month folder should go")
+
+    result = CliRunner().invoke(cli, ["convert", str(sample_zip_path), "-o", str(out)])
+
+    assert result.exit_code == 1
+    assert "Could not write" in result.output
+
+
+def test_convert_reports_truncated_export(tmp_path, sample_conversations):
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    (export_dir / "conversations.json").write_text(json.dumps(sample_conversations)[:-40])
+
+    result = CliRunner().invoke(cli, ["convert", str(export_dir), "-o", str(tmp_path / "out")])
+
+    assert result.exit_code == 1
+    assert "Failed to parse conversations.json" in result.output
+
+
+def test_convert_rejects_budgets_too_small_for_headers(tmp_path, sample_zip_path):
+    out = tmp_path / "out"
+    args = ["convert", str(sample_zip_path), "-o", str(out), "--max-bytes", "100"]
+    result = CliRunner().invoke(cli, args)
+    assert result.exit_code == 2
+    assert "--max-bytes" in result.output and not out.exists()
+
+
+def test_convert_skips_conversations_whose_title_leaves_no_room(tmp_path, sample_conversations):
+    long_title = dict(sample_conversations[0], id="conv-long", title="Very long title " * 80)
+    export_dir = tmp_path / "export"
+    _write_export(export_dir, [long_title] + sample_conversations)
+    out = tmp_path / "out"
+    args = ["convert", str(export_dir), "-o", str(out), "--max-file-size", "1000"]
+    result = CliRunner().invoke(cli, args)
+
+    assert result.exit_code == 0, result.output
+    assert "Skipped" in result.output and "conv-long" in result.output
@@ -0,0 +1,105 @@
+"""Tests for export loading and streaming decode."""
+
+import hashlib
+import io
+import json
+
+import pytest
+
+from chatgpt_to_claude.core.extractor import (
+    ExportFormatError,
+    extract_conversations,
+    extract_conversations_json,
+    iter_conversations,
+)
+from chatgpt_to_claude.core.json_stream import iter_array_elements
+from chatgpt_to_claude.core.parser import parse_conversations
+
+
+def test_iter_conversations_from_zip_path(sample_zip_path, sample_conversations):
+    """Streaming from a ZIP yields the same dicts as a full load."""
+    stream = iter_conversations(sample_zip_path)
+    assert list(stream) == sample_conversations
+    assert stream.position == stream.size
+
+
+def test_iter_conversations_from_directory(tmp_path, sample_conversations):
+    """An extracted export folder is streamed from conversations.json."""
+    export_dir = tmp_path / "export" / "nested"
+    export_dir.mkdir(parents=True)
+    (export_dir / "conversations.json").write_text(json.dumps(sample_conversations))
+
+    convs = list(iter_conversations(tmp_path / "export"))
+    assert [c["id"] for c in convs] == ["conv-001", "conv-002"]
+
+
+def test_iter_conversations_from_file_objects(sample_zip_bytes, sample_conversations):
+    """File objects may hold either ZIP data or raw conversations.json."""
+    assert list(iter_conversations(io.BytesIO(sample_zip_bytes))) == sample_conversations
+
+    raw_json = io.BytesIO(json.dumps(sample_conversations).encode())
+    assert list(iter_conversations(raw_json)) == sample_conversations
+
+
+def test_parse_conversations_consumes_stream(sample_zip_path):
+    """The parser accepts a stream directly."""
+    convs = list(parse_conversations(iter_conversations(sample_zip_path)))
+    assert [c.title for c in convs] == ["Python async patterns", "Sourdough recipe"]
+
+
+def test_missing_conversations_json_raises_eagerly(tmp_path):
+    """A missing conversations.json is reported before iteration starts."""
+    with pytest.raises(ExportFormatError):
+        iter_conversations(tmp_path)
+
+
+def test_malformed_json_raises_export_format_error():
+    stream = iter_conversations(io.BytesIO(b'[{"id": "a"}, {"id": '))
+    with pytest.raises(ExportFormatError):
+        list(stream)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 64, 1 << 20])
+def test_array_scanner_handles_chunk_boundaries(chunk_size):
+    """Escapes, brackets inside strings and multi-byte text split anywhere."""
+    elements = [
+        {"text": 'quote \\" and ]} brackets [{', "n": [1, 2, {"x": None}]},
+        {"emoji": "\U0001f600 é中", "trailing_backslash": "\\"},
+        [],
+        {},
+        [{"nested": ["]", "[", "\\\\"]}],
+    ]
+    raw = json.dumps(elements, ensure_ascii=False, indent=1).encode()
+
+    found = list(iter_array_elements(io.BytesIO(raw), chunk_size))
+    assert [json.loads(chunk) for _, chunk in found] == elements
+    for offset, chunk in found:
+        assert raw[offset:offset + len(chunk)] == chunk
+
+
+@pytest.mark.parametrize("raw", [b"", b"{}", b"[{}", b"[{} {}]", b"[{},]", b"[1]"])
+def test_array_scanner_rejects_malformed_input(raw):
+    with pytest.raises(ValueError):
+        list(iter_array_elements(io.BytesIO(raw), 2))
+
+
+def test_extract_conversations_unchanged(sample_zip_path, sample_conversations):
+    assert extract_conversations(sample_zip_path) == sample_conversations
+
+
+def test_extract_conversations_json_to_disk(tmp_path, sample_zip_bytes, sample_conversations):
+    """The upload's conversations.json is decompressed to a file and hashed."""
+    dest = tmp_path / "conversations.json"
+    hasher = hashlib.sha256()
+    written = extract_conversations_json(io.BytesIO(sample_zip_bytes), dest, hasher=hasher)
+    data = dest.read_bytes()
+    assert written == len(data)
+    assert json.loads(data) == sample_conversations
+    assert hasher.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+def test_extract_conversations_json_enforces_limit(tmp_path, sample_zip_bytes):
+    dest = tmp_path / "conversations.json"
+    with pytest.raises(ExportFormatError, match="limit"):
+        extract_conversations_json(io.BytesIO(sample_zip_bytes), dest, max_bytes=100)
+    assert not dest.exists()
@@ -0,0 +1,79 @@
+"""Tests for the byte-offset conversation index."""
+
+import io
+import json
+import zipfile
+
+import pytest
+
+from chatgpt_to_claude.core import indexer
+from chatgpt_to_claude.core.indexer import (
+    IndexedExport,
+    build_index,
+    load_or_build_index,
+    sidecar_path,
+)
+
+
+@pytest.fixture
+def export_dir(tmp_path, sample_conversations):
+    path = tmp_path / "export"
+    path.mkdir()
+    (path / "conversations.json").write_text(json.dumps(sample_conversations, indent=2))
+    return path
+
+
+def test_index_records_offsets_and_metadata(export_dir):
+    raw = (export_dir / "conversations.json").read_bytes()
+    index = build_index(export_dir)
+
+    assert [e.id for e in index.entries] == ["conv-001", "conv-002"]
+    first = index.get("conv-001")
+    assert first.title == "Python async patterns"
+    assert first.create_time is not None
+    assert json.loads(raw[first.offset:first.offset + first.length])["id"] == "conv-001"
+
+
+def test_sidecar_is_written_and_reused(export_dir, monkeypatch):
+    index = load_or_build_index(export_dir)
+    assert sidecar_path(export_dir).exists()
+
+    def fail(_source):
+        raise AssertionError("index should have been loaded from the sidecar")
+
+    monkeypatch.setattr(indexer, "build_index", fail)
+    assert load_or_build_index(export_dir).entries == index.entries
+
+
+def test_stale_sidecar_is_rebuilt(export_dir, sample_conversations):
+    load_or_build_index(export_dir)
+    (export_dir / "conversations.json").write_text(json.dumps(sample_conversations[1:]))
+
+    index = load_or_build_index(export_dir)
+    assert [e.id for e in index.entries] == ["conv-002"]
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_random_access_from_zip(tmp_path, sample_conversations, compression):
+    zip_path = tmp_path / "export.zip"
+    with zipfile.ZipFile(zip_path, "w", compression) as zf:
+        zf.writestr("conversations.json", json.dumps(sample_conversations))
+
+    with IndexedExport(zip_path, cache_dir=tmp_path / "cache") as export:
+        assert export.get_raw("conv-002")["title"] == "Sourdough recipe"
+        assert export.get_raw("conv-001")["title"] == "Python async patterns"
+        assert export.get_raw("missing") is None
+
+
+def test_select_streams_in_export_order(export_dir):
+    with IndexedExport(export_dir) as export:
+        selected = export.select(["conv-002", "conv-001", "missing"])
+        assert len(selected) == 2
+        assert [c["id"] for c in selected] == ["conv-001", "conv-002"]
+        assert selected.position == selected.size
+
+
+def test_random_access_from_file_object(sample_zip_bytes):
+    export = IndexedExport(io.BytesIO(sample_zip_bytes))
+    assert export.index.fingerprint is None
+    assert export.get_raw("conv-001")["id"] == "conv-001"
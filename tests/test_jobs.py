@@ -0,0 +1,120 @@
+"""Tests for background conversion jobs."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from chatgpt_to_claude.web.jobs import CANCELLED, DONE, FAILED, JobManager, JobQueueFull
+
+
+class GatedSession:
+    """Stands in for ConversionSession; each conversation waits for a gate."""
+
+    def __init__(self, session_id="s1", conversations=3, fail=False):
+        self.session_id = session_id
+        self.conversations = conversations
+        self.fail = fail
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def stream_result(self, spool=False, progress=None):
+        progress.start(self.conversations)
+        for _ in range(self.conversations):
+            self.started.set()
+            assert self.gate.wait(5)
+            if self.fail:
+                raise OSError("disk full")
+            progress.advance()
+            yield b"x" * 10
+
+
+@pytest.fixture
+def make_manager():
+    managers = []
+
+    def make(**kwargs):
+        managers.append(JobManager(**kwargs))
+        return managers[-1]
+
+    yield make
+    for manager in managers:
+        manager.shutdown()
+
+
+def _finish(job, timeout=5.0):
+    version = None
+    while not job.finished:
+        version = job.wait(version, timeout)
+    return job
+
+
+def test_job_runs_to_completion(make_manager):
+    manager = make_manager(workers=1)
+    session = GatedSession()
+    session.gate.set()
+    job = _finish(manager.submit(session))
+    assert job.status == DONE
+    assert job.conversations_processed == job.conversations_total == 3
+    assert job.bytes_written == 30
+    assert manager.active_job("s1") is None
+
+
+def test_running_job_can_be_cancelled(make_manager):
+    manager = make_manager(workers=1)
+    session = GatedSession()
+    job = manager.submit(session)
+    assert session.started.wait(5)
+    job.cancel()
+    session.gate.set()
+    assert _finish(job).status == CANCELLED
+    assert job.conversations_processed == 0
+
+
+def test_failure_is_reported(make_manager):
+    manager = make_manager(workers=1)
+    session = GatedSession(fail=True)
+    session.gate.set()
+    job = _finish(manager.submit(session))
+    assert job.status == FAILED
+    assert job.error == "disk full"
+
+
+def test_queue_is_bounded(make_manager):
+    manager = make_manager(workers=1, max_queued=1)
+    session = GatedSession("a")
+    job = manager.submit(session)
+    with pytest.raises(JobQueueFull):
+        manager.submit(GatedSession("b"))
+    session.gate.set()
+    assert _finish(job).status == DONE
+
+
+def test_new_job_for_a_session_cancels_the_previous_one(make_manager):
+    manager = make_manager(workers=1)
+    old = GatedSession("a")
+    old_job = manager.submit(old)
+    assert old.started.wait(5)
+
+    new = GatedSession("a")
+    new.gate.set()
+    new_job = manager.submit(new)
+    assert manager.active_job("a") is new_job
+    old.gate.set()
+    assert _finish(old_job).status == CANCELLED
+    assert _finish(new_job).status == DONE
+
+
+def test_shutdown_cancels_unfinished_jobs_and_stops_workers(make_manager):
+    manager = make_manager(workers=1)
+    running = GatedSession("a")
+    running_job = manager.submit(running)
+    queued_job = manager.submit(GatedSession("b"))
+    assert running.started.wait(5)
+
+    threading.Timer(0.05, running.gate.set).start()
+    manager.shutdown()
+    assert running_job.status == queued_job.status == CANCELLED
+    with pytest.raises(RuntimeError):
+        manager.submit(GatedSession("c"))
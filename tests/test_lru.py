@@ -0,0 +1,38 @@
+"""Tests for the byte-bounded LRU used by the web caches."""
+
+from chatgpt_to_claude.web.lru import ByteLRU
+
+
+def test_evicts_least_recently_used_over_budget():
+    cache = ByteLRU(10, len)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    assert cache.get("a") == "aaaa"  # "b" is now least recently used
+    cache.put("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa" and cache.get("c") == "cccc"
+    assert cache.bytes == 8 and len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_replacing_and_oversized_values():
+    cache = ByteLRU(10, len)
+    cache.put("a", "aaaa")
+    cache.put("a", "aaaaaa")
+    assert cache.bytes == 6
+
+    cache.put("big", "x" * 11)
+    assert cache.get("big") is None
+    assert cache.pop("a") == "aaaaaa"
+    assert cache.bytes == 0 and len(cache) == 0
+
+
+def test_discard_where_drops_matching_keys():
+    cache = ByteLRU(100, len)
+    for key in [("s1", "a"), ("s1", "b"), ("s2", "a")]:
+        cache.put(key, "xxxx")
+    assert cache.discard_where(lambda key: key[0] == "s1") == 2
+    assert len(cache) == 1 and cache.bytes == 4
+    assert cache.get(("s2", "a")) == "xxxx"
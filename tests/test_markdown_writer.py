@@ -1,7 +1,15 @@
 """Tests for Markdown generation."""
 
+import io
+import json
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
 from chatgpt_to_claude.core.parser import parse_single_conversation
-from chatgpt_to_claude.core.markdown_writer import conversation_to_markdown
+from chatgpt_to_claude.core.markdown_writer import conversation_to_markdown, write_markdown
 
 
 def test_basic_markdown_output(sample_conversations):
@@ -40,3 +48,84 @@ def test_empty_conversation_produces_empty_string():
     conv = parse_single_conversation(raw)
     md = conversation_to_markdown(conv)
     assert md == ""
+
+
+TRICKY_TITLES = [
+    "Python async patterns",
+    "Don't panic!",
+    "yes", "No", "null", "~", "true",
+    "123", "1.5e3", "0x1F", "2024-03-10", "12:30",
+    "key: value", "note #1", "# heading", "- list item", "? question", "[draft] plan",
+    "{braces}", "&anchor", "*alias", "!tag", "|pipe", ">folded", "%percent", "@at", "`tick`",
+    "'single'", '"double"', "back\\slash", "trailing space ", " leading space", "",
+    "line\nbreak", "tab\tinside", "bell\x07", "nel\x85", "ls ps ", "bom﻿",
+    "noncharacters \ufffe\uffff",
+    "日本語のタイトル", "Ünïcödé title", "emoji 🎉 party", "mixed: 中文 # 😀",
+    "a" * 200 + " long words " * 20,
+]
+
+
+def test_frontmatter_round_trips_through_safe_load(sample_conversations):
+    """The frontmatter emitter must load back exactly what PyYAML would."""
+    yaml = pytest.importorskip("yaml")
+    conv = parse_single_conversation(sample_conversations[0])
+
+    for title in TRICKY_TITLES:
+        conv.title = title
+        conv.model_slugs = {"gpt-4", "o1-preview", title or "x"}
+        md = conversation_to_markdown(conv)
+        frontmatter = md.split("---\n")[1]
+
+        expected = {
+            "title": title,
+            "source": "chatgpt-export",
+            "created": conv.created_at.isoformat(),
+            "updated": conv.updated_at.isoformat(),
+            "models": sorted(conv.model_slugs),
+            "message_count": len(conv.messages),
+        }
+        assert yaml.safe_load(frontmatter) == expected, repr(title)
+
+
+def test_frontmatter_matches_yaml_dump_for_plain_titles(sample_conversations):
+    yaml = pytest.importorskip("yaml")
+    conv = parse_single_conversation(sample_conversations[0])
+    meta = {
+        "title": conv.title,
+        "source": "chatgpt-export",
+        "created": conv.created_at.isoformat(),
+        "updated": conv.updated_at.isoformat(),
+        "models": sorted(conv.model_slugs),
+        "message_count": len(conv.messages),
+    }
+    expected = yaml.dump(meta, default_flow_style=False, allow_unicode=True).strip()
+
+    assert conversation_to_markdown(conv).startswith(f"---\n{expected}\n---\n")
+
+
+def test_rendering_does_not_import_yaml():
+    code = (
+        "import sys, json\n"
+        "from chatgpt_to_claude.core.parser import parse_single_conversation\n"
+        "from chatgpt_to_claude.core.markdown_writer import conversation_to_markdown\n"
+        "conv = parse_single_conversation(json.loads(sys.argv[1]))\n"
+        "conversation_to_markdown(conv)\n"
+        "assert 'yaml' not in sys.modules\n"
+    )
+    from tests.conftest import SAMPLE_CONVERSATIONS
+
+    subprocess.run(
+        [sys.executable, "-c", code, json.dumps(SAMPLE_CONVERSATIONS[0])],
+        check=True,
+    )
+
+
+def test_write_markdown_streams_into_zip_member(sample_conversations):
+    conv = parse_single_conversation(sample_conversations[0])
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        with io.TextIOWrapper(zf.open("conv.md", "w"), encoding="utf-8", newline="") as sink:
+            write_markdown(conv, sink)
+
+    with zipfile.ZipFile(buf) as zf:
+        assert zf.read("conv.md").decode("utf-8") == conversation_to_markdown(conv)
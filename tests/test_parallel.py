@@ -0,0 +1,69 @@
+"""Tests for multi-process decoding of conversations.json."""
+
+import io
+import json
+
+import pytest
+
+from chatgpt_to_claude.core.extractor import ExportFormatError, iter_conversations
+from chatgpt_to_claude.core.parallel import parse_conversations_parallel
+from chatgpt_to_claude.core.parser import parse_conversations
+from chatgpt_to_claude.core.pipeline import ConvertOptions, render_conversations_parallel
+
+
+def _many_conversations(sample_conversations, copies=20):
+    convs = []
+    for i in range(copies):
+        for conv in sample_conversations:
+            convs.append(dict(conv, id=f"{conv['id']}-{i}", title=f"{conv['title']} {i}"))
+    return convs
+
+
+@pytest.mark.parametrize("metadata_only", [False, True])
+def test_parallel_matches_serial_order(tmp_path, sample_conversations, metadata_only):
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    convs = _many_conversations(sample_conversations)
+    (export_dir / "conversations.json").write_text(json.dumps(convs))
+
+    serial = list(parse_conversations(iter_conversations(export_dir), metadata_only=metadata_only))
+    reader = parse_conversations_parallel(
+        export_dir, jobs=2, metadata_only=metadata_only, batch_bytes=2048,
+    )
+    assert list(reader) == serial
+    assert reader.position == reader.size
+
+
+def test_parallel_reads_zip(sample_zip_path):
+    titles = [c.title for c in parse_conversations_parallel(sample_zip_path, jobs=2)]
+    assert titles == ["Python async patterns", "Sourdough recipe"]
+
+
+def test_parallel_reports_malformed_json():
+    reader = parse_conversations_parallel(io.BytesIO(b'[{"id": "a"}, {"id": }]'), jobs=2)
+    with pytest.raises(ExportFormatError):
+        list(reader)
+
+
+def test_workers_send_back_rendered_markdown_only(tmp_path, sample_conversations):
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    (export_dir / "conversations.json").write_text(json.dumps(sample_conversations))
+
+    rendered = list(render_conversations_parallel(export_dir, ConvertOptions(), jobs=2))
+    parts = [part for r in rendered for _path, part in r.parts]
+    assert parts and all(part.conversation is None for part in parts)
+    assert "async/await" in parts[0].markdown
+
+
+def test_workers_receive_known_hashes_once(tmp_path, sample_conversations):
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    (export_dir / "conversations.json").write_text(json.dumps(sample_conversations))
+    first = list(render_conversations_parallel(export_dir, ConvertOptions(), jobs=2))
+    known = {r.content_hash: r.summary.id for r in first}
+
+    reader = render_conversations_parallel(export_dir, ConvertOptions(), jobs=2, known=known)
+    assert "known" not in reader.worker.keywords
+    assert reader.initargs == (known,)
+    assert all(r.unchanged and not r.parts for r in reader)
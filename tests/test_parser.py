@@ -1,6 +1,15 @@
 """Tests for conversation parsing and tree traversal."""
 
-from chatgpt_to_claude.core.parser import parse_conversations, parse_single_conversation
+import json
+
+import pytest
+
+from chatgpt_to_claude.core import parser
+from chatgpt_to_claude.core.parser import (
+    MalformedConversationError,
+    parse_conversations,
+    parse_single_conversation,
+)
 from chatgpt_to_claude.core.models import AuthorRole, Conversation, ConversationMeta
 
 
@@ -29,6 +38,22 @@ def test_parse_conversations_metadata_only(sample_conversations):
     assert m1.title == "Python async patterns"
     assert m1.message_count == 4  # 2 user + 2 assistant
     assert "gpt-4" in m1.model_slugs
+    assert m1.messages_by_role == {"user": 2, "assistant": 2}
+    assert m1.model_counts == {"gpt-4": 2}
+    assert m1.content_types == {"text": 4}
+    assert (m1.first_message_time, m1.last_message_time) == (1710081000.0, 1710081180.0)
+
+
+def test_metadata_statistics_match_full_parse(sample_conversations):
+    """Statistics from the metadata scan agree with a full parse."""
+    from chatgpt_to_claude.core.statistics import compute_statistics
+
+    from_meta = compute_statistics(parse_conversations(sample_conversations, metadata_only=True))
+    from_full = compute_statistics(parse_conversations(sample_conversations))
+
+    assert from_meta.total_messages == from_full.total_messages
+    assert from_meta.models_used == from_full.models_used
+    assert from_meta.messages_by_role == from_full.messages_by_role
 
 
 def test_message_ordering(sample_conversations):
@@ -85,3 +110,196 @@ def test_system_messages_filtered():
     conv = parse_single_conversation(raw)
     assert len(conv.messages) == 1
     assert conv.messages[0].author_role == AuthorRole.USER
+
+
+def test_parsed_models_are_compact(sample_conversations):
+    """Messages and parts use slots, and model slugs are interned."""
+    raw = sample_conversations[0]
+    first = parse_single_conversation(raw)
+    second = parse_single_conversation(json.loads(json.dumps(raw)))  # distinct strings
+    msg = first.messages[1]
+
+    assert not hasattr(first, "__dict__")
+    assert not hasattr(msg, "__dict__")
+    assert not hasattr(msg.content_parts[0], "__dict__")
+    assert msg.model_slug is second.messages[1].model_slug
+
+
+def test_current_node_selects_visible_branch():
+    """The branch ending at current_node wins over the last child."""
+    def node(node_id, parent, children, text):
+        return {
+            "id": node_id,
+            "message": {
+                "id": node_id,
+                "author": {"role": "assistant" if node_id.startswith("a") else "user"},
+                "content": {"content_type": "text", "parts": [text]},
+            },
+            "parent": parent,
+            "children": children,
+        }
+
+    raw = {
+        "id": "branchy",
+        "title": "Edited",
+        "current_node": "a1",
+        "mapping": {
+            "root": {"id": "root", "message": None, "parent": None, "children": ["u1"]},
+            "u1": node("u1", "root", ["a1", "a2"], "question"),
+            "a1": node("a1", "u1", [], "answer the user kept"),
+            "a2": node("a2", "u1", [], "regenerated answer"),
+        },
+    }
+
+    conv = parse_single_conversation(raw)
+    assert [m.id for m in conv.messages] == ["u1", "a1"]
+
+    del raw["current_node"]
+    assert [m.id for m in parse_single_conversation(raw).messages] == ["u1", "a2"]
+
+
+def _tree_node(node_id, parent, children):
+    return {
+        "id": node_id,
+        "message": {
+            "id": node_id,
+            "author": {"role": "user" if node_id.startswith("u") else "assistant"},
+            "content": {"content_type": "text", "parts": [f"text of {node_id}"]},
+        },
+        "parent": parent,
+        "children": children,
+    }
+
+
+def test_all_branches_cover_every_node_once():
+    """Each message appears in exactly one of the displayed path or a branch."""
+    raw = {
+        "id": "tree",
+        "title": "Tree",
+        "current_node": "a3",
+        "mapping": {
+            "root": {"id": "root", "message": None, "parent": None, "children": ["u1"]},
+            "u1": _tree_node("u1", "root", ["a1", "a1b"]),
+            "a1": _tree_node("a1", "u1", ["u2", "u2b"]),
+            "a1b": _tree_node("a1b", "u1", []),
+            "u2": _tree_node("u2", "a1", ["a3"]),
+            "a3": _tree_node("a3", "u2", []),
+            "u2b": _tree_node("u2b", "a1", ["a4", "a4b"]),
+            "a4": _tree_node("a4", "u2b", []),
+            "a4b": _tree_node("a4b", "u2b", []),
+        },
+    }
+
+    conv = next(parse_conversations([raw], all_branches=True))
+    assert [m.id for m in conv.messages] == ["u1", "a1", "u2", "a3"]
+    branches = {b.number: b for b in conv.branches}
+    described = [(b.parent, b.fork_index, [m.id for m in b.messages]) for b in conv.branches]
+    assert described == [
+        (0, 1, ["a1b"]),            # regenerated first answer
+        (0, 2, ["u2b", "a4b"]),     # edited second question, latest answer
+        (2, 1, ["a4"]),             # earlier answer to the edited question
+    ]
+    assert branches[3].parent == 2
+
+    # Without the option nothing extra is collected
+    assert parse_single_conversation(raw).branches == []
+
+
+def test_all_branches_is_linear_in_nodes():
+    """A complete binary tree has 2^depth leaves but is walked once per node."""
+    depth = 14
+    mapping = {"root": {"id": "root", "message": None, "parent": None, "children": ["n"]}}
+    frontier = ["n"]
+    mapping["n"] = _tree_node("un", "root", [])
+    mapping["n"]["id"] = "n"
+    for level in range(depth):
+        next_frontier = []
+        for node_id in frontier:
+            for side in "ab":
+                child = node_id + side
+                role = "a" if level % 2 == 0 else "u"
+                mapping[child] = _tree_node(role + child, node_id, [])
+                mapping[node_id]["children"].append(child)
+                next_frontier.append(child)
+        frontier = next_frontier
+
+    raw = {"id": "bin", "title": "Binary", "mapping": mapping}
+    conv = next(parse_conversations([raw], all_branches=True))
+    total = len(conv.messages) + sum(len(b.messages) for b in conv.branches)
+    assert total == len(mapping) - 1
+    assert len(conv.branches) == 2 ** depth - 1
+
+
+def _chain(length, cyclic_to=None):
+    """root -> n0 -> n1 ... ; optionally the last node points back."""
+    mapping = {"root": {"id": "root", "message": None, "parent": None, "children": ["n0"]}}
+    for i in range(length):
+        children = [f"n{i + 1}"] if i + 1 < length else []
+        if cyclic_to is not None and i + 1 == length:
+            children = [cyclic_to]
+        role = "u" if i % 2 == 0 else "a"
+        parent = "root" if i == 0 else f"n{i - 1}"
+        mapping[f"n{i}"] = dict(_tree_node(role + str(i), parent, children), id=f"n{i}")
+    return mapping
+
+
+ADVERSARIAL_MAPPINGS = {
+    "parent cycle": ({
+        "x": dict(_tree_node("ux", "y", []), id="x"),
+        "y": dict(_tree_node("ay", "x", ["x"]), id="y"),
+    }, "x"),
+    "self parent": ({"x": dict(_tree_node("ux", "x", []), id="x")}, "x"),
+    "children cycle": (_chain(5, cyclic_to="n1"), None),
+}
+
+
+@pytest.mark.parametrize("name", ADVERSARIAL_MAPPINGS)
+def test_cyclic_trees_are_rejected(name):
+    mapping, current_node = ADVERSARIAL_MAPPINGS[name]
+    raw = {"id": "bad", "title": "Bad", "mapping": mapping, "current_node": current_node}
+
+    with pytest.raises(MalformedConversationError, match="cycle"):
+        parse_single_conversation(raw)
+
+
+def test_cycle_off_the_displayed_path_is_rejected():
+    mapping = _chain(4)
+    # An abandoned regeneration whose child points back into the main path
+    mapping["n0"]["children"].insert(0, "loop")
+    mapping["loop"] = dict(_tree_node("aloop", "n0", ["n1"]), id="loop")
+    raw = {"id": "bad", "title": "Bad", "mapping": mapping, "current_node": "n3"}
+
+    assert len(parse_single_conversation(raw).messages) == 4
+    with pytest.raises(MalformedConversationError, match="cycle"):
+        next(parse_conversations([raw], all_branches=True))
+
+
+def test_depth_and_time_guards(monkeypatch):
+    raw = {"id": "deep", "title": "Deep", "mapping": _chain(60)}
+    assert len(parse_single_conversation(raw).messages) == 60
+
+    monkeypatch.setattr(parser, "MAX_TREE_DEPTH", 50)
+    with pytest.raises(MalformedConversationError, match="deeper than 50"):
+        parse_single_conversation(raw)
+
+    monkeypatch.setattr(parser, "MAX_TREE_DEPTH", 100_000)
+    monkeypatch.setattr(parser, "TIME_BUDGET", -1.0)
+    monkeypatch.setattr(parser, "_CLOCK_INTERVAL", 1)
+    with pytest.raises(MalformedConversationError, match="time budget"):
+        parse_single_conversation(raw)
+
+
+def test_malformed_conversations_are_reported_and_skipped(sample_conversations):
+    mapping, current_node = ADVERSARIAL_MAPPINGS["parent cycle"]
+    bad = {"id": "bad", "title": "Bad", "mapping": mapping, "current_node": current_node}
+    not_a_tree = {"id": "junk", "title": "Junk", "mapping": {"x": "not a node"}}
+    errors = []
+
+    convs = list(parse_conversations(
+        [sample_conversations[0], bad, not_a_tree, sample_conversations[1]],
+        on_error=lambda raw, e: errors.append((raw["id"], str(e))),
+    ))
+
+    assert [c.id for c in convs] == [sample_conversations[0]["id"], sample_conversations[1]["id"]]
+    assert [conv_id for conv_id, _ in errors] == ["bad", "junk"]
+    assert "'bad' (Bad): cycle in message tree" in errors[0][1]
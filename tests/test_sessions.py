@@ -0,0 +1,135 @@
+"""Tests for the web session store."""
+
+from __future__ import annotations
+
+import io
+import time
+
+import pytest
+
+from chatgpt_to_claude.web.processing import ConversionSession
+from chatgpt_to_claude.web import sessions as sessions_module
+from chatgpt_to_claude.web.sessions import SessionStore, SessionStoreFull
+
+
+@pytest.fixture
+def make_session(sample_zip_bytes):
+    sessions = []
+
+    def make():
+        session = ConversionSession(io.BytesIO(sample_zip_bytes))
+        sessions.append(session)
+        return session
+
+    yield make
+    for session in sessions:
+        session.close()
+
+
+def test_least_recently_used_session_is_spilled_and_reloaded(make_session):
+    first, second = make_session(), make_session()
+    store = SessionStore(max_bytes=first.memory_bytes + second.memory_bytes // 2)
+    store.add(first)
+    preview = first.preview_conversation("conv-001")
+    store.add(second)
+
+    assert first.spilled and not second.spilled
+    assert first.metadata is None
+    assert store.resident_bytes() == second.memory_bytes
+
+    # Using the first session loads it back and spills the other one
+    assert store.get(first.session_id) is first
+    assert not first.spilled and second.spilled
+    assert first.preview_conversation("conv-001") == preview
+    assert [m["id"] for m in first.get_metadata_dicts()][0] == "conv-001"
+    assert store.stats()["spills"] == 2
+
+
+def test_without_spilling_sessions_are_evicted(make_session):
+    first, second = make_session(), make_session()
+    store = SessionStore(max_bytes=first.memory_bytes, spill=False)
+    store.add(first)
+    store.add(second)
+
+    assert store.get(first.session_id) is None
+    assert not first.workdir.exists()
+    assert store.get(second.session_id) is second
+    assert store.stats()["evictions"] == 1
+
+
+def test_sessions_are_spilled_outside_the_store_lock(make_session, monkeypatch):
+    first, second = make_session(), make_session()
+    store = SessionStore(max_bytes=first.memory_bytes)
+    store.add(first)
+
+    spill = first.spill
+    locked = []
+    monkeypatch.setattr(first, "spill", lambda: locked.append(store._lock.locked()) or spill())
+    store.add(second)
+    assert locked == [False] and first.spilled
+
+
+def test_busy_sessions_are_not_spilled(make_session):
+    first, second = make_session(), make_session()
+    store = SessionStore(max_bytes=1)
+    store.add(first)
+    with first.in_use():
+        store.add(second)
+        assert not first.spilled
+    assert store.stats()["sessions"] == 2
+
+
+def test_sessions_expire_without_being_accessed(make_session):
+    session = make_session()
+    store = SessionStore(max_age=0.1)
+    store.add(session)
+
+    deadline = time.monotonic() + 5
+    while len(store) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(store) == 0
+    assert not session.workdir.exists()
+    assert store.stats()["expirations"] == 1
+
+
+def test_disk_budget_closes_least_recently_used_sessions(make_session):
+    first, second, third = make_session(), make_session(), make_session()
+    store = SessionStore(max_disk_bytes=2 * first.disk_bytes())
+    store.add(first)
+    store.add(second)
+    store.get(first.session_id)  # second is now least recently used
+    store.add(third)
+
+    assert store.get(second.session_id) is None
+    assert not second.workdir.exists()
+    assert store.get(first.session_id) is first and store.get(third.session_id) is third
+    assert store.stats()["evictions"] == 1
+
+
+def test_upload_is_refused_when_busy_sessions_fill_the_disk_budget(make_session):
+    first, second = make_session(), make_session()
+    store = SessionStore(max_disk_bytes=first.disk_bytes())
+    store.add(first)
+    with first.in_use():
+        with pytest.raises(SessionStoreFull):
+            store.add(second)
+    assert not second.workdir.exists()
+    assert store.get(first.session_id) is first and len(store) == 1
+
+
+def test_busy_sessions_expire_once_idle(make_session, monkeypatch):
+    monkeypatch.setattr(sessions_module, "EXPIRY_RETRY", 0.05)
+    session = make_session()
+    store = SessionStore(max_age=0.05)
+    store.add(session)
+
+    with session.in_use():
+        time.sleep(0.3)
+        assert store.get(session.session_id) is session
+        assert session.workdir.exists() and not session.spilled
+        assert session.preview_conversation("conv-001") is not None
+
+    deadline = time.monotonic() + 5
+    while len(store) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(store) == 0 and not session.workdir.exists()
@@ -0,0 +1,253 @@
+"""Tests for conversation splitting."""
+
+import io
+from datetime import datetime, timezone
+
+import pytest
+
+from chatgpt_to_claude.core import markdown_writer, splitter
+from chatgpt_to_claude.core.markdown_writer import conversation_to_markdown
+from chatgpt_to_claude.core.models import (
+    AuthorRole,
+    ContentPart,
+    ContentType,
+    Conversation,
+    Message,
+    SizeUnit,
+)
+from chatgpt_to_claude.core.splitter import SplitBudgetError, maybe_split
+from chatgpt_to_claude.core.tokens import estimate_tokens, utf8_size
+
+
+def _long_conversation(count=60, text_size=700):
+    messages = [
+        Message(
+            id=f"m{i}",
+            author_role=AuthorRole.USER if i % 2 == 0 else AuthorRole.ASSISTANT,
+            content_parts=[ContentPart(ContentType.TEXT, text=f"{i} " + "x" * (text_size + i * 7))],
+            model_slug=None if i % 2 == 0 else "gpt-4o",
+        )
+        for i in range(count)
+    ]
+    return Conversation(
+        id="long",
+        title="A long conversation",
+        create_time=datetime(2024, 5, 1, tzinfo=timezone.utc).timestamp(),
+        update_time=datetime(2024, 5, 2, tzinfo=timezone.utc).timestamp(),
+        messages=messages,
+        model_slugs={"gpt-4o"},
+    )
+
+
+def test_small_conversation_is_not_split():
+    conv = _long_conversation(count=3)
+    parts = maybe_split(conv, max_size=100_000)
+
+    assert len(parts) == 1
+    assert parts[0].conversation is conv
+    assert parts[0].markdown == conversation_to_markdown(conv)
+
+
+@pytest.mark.parametrize("include_frontmatter", [True, False])
+@pytest.mark.parametrize("max_size", [2_000, 5_000, 12_000])
+def test_parts_fit_and_match_full_render(max_size, include_frontmatter):
+    conv = _long_conversation()
+    parts = maybe_split(conv, max_size=max_size, include_frontmatter=include_frontmatter)
+
+    assert len(parts) > 1
+    assert [m.id for p in parts for m in p.conversation.messages] == [m.id for m in conv.messages]
+    for num, part in enumerate(parts, start=1):
+        assert part.conversation.title == f"A long conversation (Part {num})"
+        assert len(part.markdown) <= max_size
+        assert part.markdown == conversation_to_markdown(
+            part.conversation, include_frontmatter=include_frontmatter,
+        )
+
+    # Parts are not needlessly small: each could not have taken the next message
+    for part, following in zip(parts, parts[1:]):
+        grown = splitter._make_part(
+            conv, part.conversation.messages + following.conversation.messages[:1], 1,
+        )
+        assert len(conversation_to_markdown(grown, include_frontmatter)) > max_size - 60
+
+
+def test_each_message_is_rendered_once(monkeypatch):
+    calls = []
+    original = splitter.render_message
+
+    def counting(message, include_model=True):
+        calls.append(message.id)
+        return original(message, include_model)
+
+    monkeypatch.setattr(splitter, "render_message", counting)
+    conv = _long_conversation()
+    conv.messages[5].content_parts[0].text += "\n\n" + "y " * 20_000  # broken into pieces
+    parts = maybe_split(conv, max_size=5_000)
+    for part in parts:
+        part.write_to(io.StringIO())
+
+    assert sorted(calls) == sorted(m.id for m in conv.messages)
+
+
+def test_pieces_of_a_broken_message_match_their_own_rendering():
+    conv = _long_conversation(count=8)
+    conv.messages[5].content_parts[0].text += "\n\n```python\n" + "x = 1\n" * 3_000 + "```"
+    parts = maybe_split(conv, max_size=4_000)
+    assert sum(m.id == "m5" for part in parts for m in part.conversation.messages) > 2
+    for part in parts:
+        header_count = len(part.sections) - len(part.conversation.messages)
+        for message, section in zip(part.conversation.messages, part.sections[header_count:]):
+            assert section == markdown_writer.render_message(message)
+
+
+# Prose, code, accented, Cyrillic, CJK and emoji heavy messages
+CORPUS = [
+    "The quick brown fox jumps over the lazy dog. " * 40,
+    "```python\ndef handler(event, context):\n    return {'status': 200}\n```\n" * 25,
+    "Café déjà vu, naïve façade, crème brûlée. " * 40,
+    "Привет, как дела? Это тестовое сообщение. " * 40,
+    "这是一个用于测试拆分的中文段落。日本語の文章も含まれています。" * 30,
+    "Great job! 🎉🚀👍 Let's ship it 😀🔥 " * 40,
+]
+
+
+def _corpus_conversation():
+    messages = [
+        Message(
+            id=f"m{i}",
+            author_role=AuthorRole.USER if i % 2 == 0 else AuthorRole.ASSISTANT,
+            content_parts=[ContentPart(ContentType.TEXT, text=text)],
+        )
+        for i, text in enumerate(CORPUS * 4)
+    ]
+    return Conversation(id="corpus", title="Mixed scripts 混合", messages=messages)
+
+
+def test_token_estimates_for_corpus():
+    # English prose is close to 4 chars per token
+    prose = CORPUS[0]
+    assert len(prose) / 5 < estimate_tokens(prose) < len(prose) / 3
+    # CJK and emoji take at least one token per character
+    assert estimate_tokens(CORPUS[4]) >= len(CORPUS[4])
+    emoji = "🎉🚀👍😀🔥"
+    assert estimate_tokens(emoji) >= 2 * len(emoji)
+    # Per-section estimates never undercount the joined text
+    assert sum(map(estimate_tokens, CORPUS)) + len(CORPUS) - 1 >= estimate_tokens("\n".join(CORPUS))
+
+
+@pytest.mark.parametrize(
+    ("unit", "measure", "max_size"),
+    [
+        (SizeUnit.CHARS, len, 6_000),
+        (SizeUnit.BYTES, utf8_size, 6_000),
+        (SizeUnit.TOKENS, estimate_tokens, 4_000),
+    ],
+)
+def test_corpus_parts_fit_budget_without_waste(unit, measure, max_size):
+    conv = _corpus_conversation()
+    parts = maybe_split(conv, max_size=max_size, unit=unit)
+
+    assert len(parts) > 2
+    for part in parts:
+        assert measure(part.markdown) <= max_size
+    for part, following in zip(parts, parts[1:]):
+        grown = part.markdown + "\n" + following.markdown.split("\n## ", 1)[1]
+        assert measure(grown) > max_size - 40
+
+
+def test_byte_budget_splits_more_than_char_budget_for_cjk():
+    conv = _corpus_conversation()
+    by_chars = maybe_split(conv, max_size=6_000, unit=SizeUnit.CHARS)
+    by_bytes = maybe_split(conv, max_size=6_000, unit=SizeUnit.BYTES)
+
+    assert len(by_bytes) > len(by_chars)
+    assert max(utf8_size(p.markdown) for p in by_chars) > 6_000
+
+
+def _single_message_conversation(parts):
+    return Conversation(
+        id="big",
+        title="Pasted log",
+        messages=[
+            Message(
+                id="q",
+                author_role=AuthorRole.USER,
+                content_parts=[ContentPart(ContentType.TEXT, text="Why?")],
+            ),
+            Message(id="big-msg", author_role=AuthorRole.ASSISTANT, content_parts=parts),
+        ],
+    )
+
+
+def _fence_lines(markdown):
+    return [line for line in markdown.split("\n") if line.startswith("```")]
+
+
+def test_oversized_message_is_split_at_paragraphs():
+    paragraphs = [f"Paragraph {i}. " + "word " * 200 for i in range(600)]  # ~600 KB
+    text = "\n\n".join(paragraphs)
+    conv = _single_message_conversation([ContentPart(ContentType.TEXT, text=text)])
+    parts = maybe_split(conv, max_size=20_000)
+
+    assert len(parts) > 25
+    text = ""
+    for part in parts:
+        assert len(part.markdown) <= 20_000
+        assert part.markdown.endswith("word \n")  # never cut mid-paragraph
+        text += part.markdown
+    assert all(f"Paragraph {i}. " in text for i in range(600))
+
+
+def test_cut_inside_code_fence_reopens_it():
+    code = "\n".join(f"print({i})  # " + "x" * 60 for i in range(3000))
+    conv = _single_message_conversation([
+        ContentPart(ContentType.TEXT, text="Here is the script:"),
+        ContentPart(ContentType.CODE, text=code, language="python"),
+        ContentPart(ContentType.EXECUTION_OUTPUT, text="\n".join(["ok"] * 2000)),
+    ])
+    parts = maybe_split(conv, max_size=10_000)
+
+    assert len(parts) > 10
+    printed = []
+    for part in parts:
+        assert len(part.markdown) <= 10_000
+        fences = _fence_lines(part.markdown)
+        assert len(fences) % 2 == 0
+        printed += [line for line in part.markdown.split("\n") if line.startswith("print(")]
+        if fences and "print(" in part.markdown:
+            assert fences[0] == "```python"
+    assert printed == code.split("\n")
+
+
+def test_single_huge_line_is_hard_wrapped():
+    blob = "z" * 50_000
+    conv = _single_message_conversation([ContentPart(ContentType.TEXT, text=blob)])
+    parts = maybe_split(conv, max_size=4_000, unit=SizeUnit.BYTES)
+
+    assert all(utf8_size(p.markdown) <= 4_000 for p in parts)
+    assert sum(p.markdown.count("z") for p in parts) == 50_000
+
+
+def test_hard_wrap_measures_each_character_a_bounded_number_of_times():
+    line = "é" * 200_000
+    measured = []
+
+    def measure(text):
+        measured.append(len(text))
+        return utf8_size(text)
+
+    lines, sizes, _open = splitter._hard_wrap([line], [utf8_size(line)], [None], 4_000, measure)
+
+    assert "".join(lines) == line
+    assert all(size == utf8_size(piece) < 4_000 for piece, size in zip(lines, sizes))
+    assert sum(measured) <= 3 * len(line)
+
+
+def test_budget_without_room_for_content_is_rejected():
+    conv = _long_conversation(count=4)
+    with pytest.raises(SplitBudgetError):
+        maybe_split(conv, max_size=100, unit=SizeUnit.BYTES)
+
+    conv.title = "Long title " * 40
+    with pytest.raises(SplitBudgetError):
+        maybe_split(conv, max_size=1_000)
@@ -0,0 +1,62 @@
+"""Tests for the bounded hand-off between conversion stages."""
+
+import threading
+import time
+
+import pytest
+
+from chatgpt_to_claude.core.stages import BoundedStage
+
+
+def test_items_arrive_in_order_and_are_counted():
+    stage = BoundedStage("read", range(1000), maxsize=4)
+    assert list(stage) == list(range(1000))
+    stats = stage.stats()
+    assert (stats.name, stats.items, stats.capacity) == ("read", 1000, 4)
+
+
+def test_errors_are_raised_where_they_happened():
+    def source():
+        yield 1
+        yield 2
+        raise ValueError("truncated")
+
+    received = []
+    with pytest.raises(ValueError, match="truncated"):
+        for item in BoundedStage("read", source()):
+            received.append(item)
+    assert received == [1, 2]
+
+
+def test_producer_runs_ahead_by_at_most_maxsize():
+    produced = []
+
+    def source():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    stage = BoundedStage("read", source(), maxsize=3)
+    iterator = iter(stage)
+    assert next(iterator) == 0
+    time.sleep(0.1)  # let the producer fill the queue
+    # One item consumed, three queued, one blocked in put()
+    assert len(produced) <= 1 + 3 + 1
+    iterator.close()
+    assert not stage._thread.is_alive()
+
+
+def test_closing_early_closes_the_source():
+    closed = threading.Event()
+
+    def source():
+        try:
+            for i in range(10_000):
+                yield i
+        finally:
+            closed.set()
+
+    for item in BoundedStage("read", source(), maxsize=2):
+        if item == 5:
+            break
+    assert closed.wait(1)
@@ -0,0 +1,59 @@
+"""Tests for epoch timestamp helpers and lazy model datetimes."""
+
+import random
+from datetime import datetime, timezone
+
+from chatgpt_to_claude.core.models import Conversation
+from chatgpt_to_claude.core.parser import parse_conversations
+from chatgpt_to_claude.core.timestamps import (
+    date_key,
+    epoch_to_datetime,
+    month_heading,
+    month_key,
+    parse_epoch,
+    year_key,
+)
+
+
+def test_date_keys_match_strftime():
+    rng = random.Random(0)
+    epochs = [0.0, -1.0, 86399.999, 1710081000.0] + [rng.uniform(-3e9, 5e9) for _ in range(2000)]
+    for epoch in epochs:
+        dt = datetime.fromtimestamp(epoch, tz=timezone.utc)
+        assert date_key(epoch) == dt.strftime("%Y-%m-%d")
+        assert month_key(epoch) == dt.strftime("%Y-%m")
+        assert year_key(epoch) == dt.strftime("%Y")
+        assert month_heading(epoch) == dt.strftime("%B %Y")
+
+
+def test_parse_epoch_rejects_invalid_values():
+    assert parse_epoch("1710081000") == 1710081000.0
+    for bad in [None, "soon", float("nan"), float("inf"), 1e20, {}]:
+        assert parse_epoch(bad) is None
+
+
+def test_datetimes_are_lazy_and_cached(sample_conversations):
+    meta = next(parse_conversations(sample_conversations, metadata_only=True))
+    assert meta._created_at is None  # nothing built while parsing
+
+    created = meta.created_at
+    assert created == datetime(2024, 3, 10, 14, 30, tzinfo=timezone.utc)
+    assert meta.created_at is created
+
+    conv = Conversation(id="x", title="x", create_time=0.0)
+    assert conv.created_at == datetime(1970, 1, 1, tzinfo=timezone.utc)  # epoch 0 is a date
+    conv.created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert conv.create_time == datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def test_assigning_the_epoch_invalidates_the_cached_datetime():
+    conv = Conversation(id="x", title="x", create_time=0.0)
+    assert conv.created_at.year == 1970
+    conv.create_time = 1710081000.0
+    assert conv.created_at == datetime(2024, 3, 10, 14, 30, tzinfo=timezone.utc)
+    conv.create_time = None
+    assert conv.created_at is None
+
+
+def test_unrepresentable_epoch_has_no_datetime():
+    assert epoch_to_datetime(1e20) is None
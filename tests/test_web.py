@@ -0,0 +1,250 @@
+"""Tests for the web UI's upload, convert and download flow."""
+
+from __future__ import annotations
+
+import io
+import json
+import time
+import zipfile
+
+import pytest
+
+from chatgpt_to_claude.web.app import create_app
+from chatgpt_to_claude.web.archive import stream_zip
+
+_apps = []
+
+
+@pytest.fixture(autouse=True)
+def close_sessions():
+    yield
+    while _apps:
+        app = _apps.pop()
+        app.extensions["jobs"].shutdown()
+        app.extensions["sessions"].close()
+
+
+def _client(**config):
+    app = create_app({"TESTING": True, **config})
+    _apps.append(app)
+    return app.test_client()
+
+
+def _session(client, session_id):
+    return client.application.extensions["sessions"].get(session_id)
+
+
+def _upload(client, zip_bytes) -> str:
+    resp = client.post(
+        "/api/upload",
+        data={"file": (io.BytesIO(zip_bytes), "export.zip")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    return resp.get_json()["session_id"]
+
+
+def _convert(client, session_id, **options):
+    return client.post("/api/convert", json={"session_id": session_id, **options})
+
+
+def _wait_for_job(client, job_id, timeout=10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").get_json()
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_convert_job_reports_progress_then_serves_result(sample_zip_bytes, sample_conversations):
+    client = _client()
+    session_id = _upload(client, sample_zip_bytes)
+    resp = _convert(client, session_id)
+    assert resp.status_code == 202
+    job = _wait_for_job(client, resp.get_json()["job_id"])
+
+    assert job["status"] == "done"
+    assert job["conversations_processed"] == job["conversations_total"] == len(sample_conversations)
+    assert job["bytes_written"] == _session(client, session_id).result_path.stat().st_size
+
+    download = client.get(f"/api/download/{session_id}")
+    assert download.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(download.data)) as zf:
+        assert "claude_import/_INDEX.md" in zf.namelist()
+    download.close()
+
+
+def test_skipped_conversations_are_reported(sample_conversations):
+    cyclic = {
+        "id": "conv-cyclic",
+        "title": "Cyclic",
+        "current_node": "a",
+        "mapping": {
+            "a": {"id": "a", "message": None, "parent": "b", "children": []},
+            "b": {"id": "b", "message": None, "parent": "a", "children": ["a"]},
+        },
+    }
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("conversations.json", json.dumps([cyclic] + sample_conversations))
+
+    client = _client()
+    session_id = _upload(client, buf.getvalue())
+    job = _wait_for_job(client, _convert(client, session_id).get_json()["job_id"])
+    assert job["status"] == "done"
+    assert job["skipped"] == 1 and "conv-cyclic" in job["skipped_errors"][0]
+
+    download = client.get(f"/api/download/{session_id}")
+    with zipfile.ZipFile(io.BytesIO(download.data)) as zf:
+        index = zf.read("claude_import/_INDEX.md").decode("utf-8")
+    download.close()
+    assert "## Skipped" in index and "conv-cyclic" in index
+
+
+def test_job_event_stream_ends_with_final_status(sample_zip_bytes):
+    client = _client()
+    session_id = _upload(client, sample_zip_bytes)
+    job_id = _convert(client, session_id).get_json()["job_id"]
+
+    body = client.get(f"/api/jobs/{job_id}/events").get_data(as_text=True)
+    events = [
+        json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")
+    ]
+    assert events[-1]["status"] == "done"
+    assert all(e["job_id"] == job_id for e in events)
+
+
+def test_unknown_job_is_not_found():
+    client = _client()
+    assert client.get("/api/jobs/nope").status_code == 404
+    assert client.post("/api/jobs/nope/cancel").status_code == 404
+
+
+def test_download_serves_the_finished_jobs_zip(sample_zip_bytes):
+    client = _client()
+    session_id = _upload(client, sample_zip_bytes)
+    resp = _convert(client, session_id, conversation_ids=["conv-001"])
+    assert _wait_for_job(client, resp.get_json()["job_id"])["status"] == "done"
+
+    resp = client.get(f"/api/download/{session_id}")
+    assert resp.status_code == 200
+    assert "attachment" in resp.headers["Content-Disposition"]
+
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as zf:
+        names = zf.namelist()
+        assert zf.testzip() is None
+        markdown = zf.read("claude_import/2024-03/Python_async_patterns.md").decode("utf-8")
+    resp.close()
+    assert names == [
+        "claude_import/2024-03/Python_async_patterns.md",
+        "claude_import/_INDEX.md",
+        "claude_import/_UPLOAD_GUIDE.md",
+    ]
+    assert "async/await" in markdown
+
+
+def test_result_is_reused_for_redownloads(sample_zip_bytes, monkeypatch):
+    client = _client()
+    session_id = _upload(client, sample_zip_bytes)
+    session = _session(client, session_id)
+    _wait_for_job(client, _convert(client, session_id).get_json()["job_id"])
+
+    first = client.get(f"/api/download/{session_id}")
+    spooled = session.result_path
+    assert spooled is not None and spooled.read_bytes() == first.data
+    first.close()
+
+    def no_reconvert(*args):
+        raise AssertionError("the result should be served from disk")
+
+    monkeypatch.setattr(session, "_archive_entries", no_reconvert)
+    second = client.get(f"/api/download/{session_id}")
+    assert second.data == spooled.read_bytes()
+    second.close()
+
+    # A new conversion invalidates the spooled archive
+    session.convert_selected(organize="flat")
+    assert session.result_path is None and not spooled.exists()
+
+
+def test_failed_job_has_nothing_to_download(sample_zip_bytes, monkeypatch):
+    client = _client()
+    session_id = _upload(client, sample_zip_bytes)
+
+    def broken(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(_session(client, session_id), "_archive_entries", broken)
+    job = _wait_for_job(client, _convert(client, session_id).get_json()["job_id"])
+    assert job["status"] == "failed"
+
+    resp = client.get(f"/api/download/{session_id}")
+    assert resp.status_code == 410
+    assert "failed" in resp.get_json()["error"]
+
+
+def test_upload_is_extracted_to_a_session_directory(sample_zip_bytes):
+    client = _client()
+    session = _session(client, _upload(client, sample_zip_bytes))
+    assert (session.workdir / "conversations.json").is_file()
+    assert session.preview_conversation("conv-001").startswith("---")
+
+    session.close()
+    assert not session.workdir.exists()
+
+
+def test_upload_over_extraction_limit_is_rejected(sample_zip_bytes):
+    client = _client(MAX_EXTRACTED_LENGTH=100)
+    resp = client.post(
+        "/api/upload",
+        data={"file": (io.BytesIO(sample_zip_bytes), "export.zip")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 400
+    assert "limit" in resp.get_json()["error"]
+
+
+def test_convert_rejects_unknown_organize_mode(sample_zip_bytes):
+    client = _client()
+    session_id = _upload(client, sample_zip_bytes)
+    assert _convert(client, session_id, organize="weekly").status_code == 400
+    assert client.get(f"/api/download/{session_id}").status_code == 404
+
+
+def test_stream_zip_yields_chunks_as_members_complete():
+    body = "".join(f"line {i} {i * 7919 % 104729}\n" for i in range(20_000))
+    chunks = list(stream_zip((f"dir/file{i}.md", body) for i in range(8)))
+    assert len(chunks) > 1
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.namelist() == [f"dir/file{i}.md" for i in range(8)]
+        assert zf.read("dir/file7.md").decode("utf-8") == body
+
+
+def test_previews_are_cached_and_counted(sample_zip_bytes, monkeypatch):
+    client = _client()
+    session_id = _upload(client, sample_zip_bytes)
+    url = f"/api/preview/{session_id}/conv-001"
+
+    first = client.get(url).get_json()["markdown"]
+    session = _session(client, session_id)
+    monkeypatch.setattr(session.export, "get_raw", lambda conv_id: pytest.fail("re-decoded"))
+    assert client.get(url).get_json()["markdown"] == first
+
+    stats = client.get("/api/metrics").get_json()["preview_cache"]
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes"] >= len(first)
+
+
+def test_closing_a_session_drops_its_previews(sample_zip_bytes):
+    client = _client()
+    kept, removed = _upload(client, sample_zip_bytes), _upload(client, sample_zip_bytes)
+    for session_id in (kept, removed):
+        client.get(f"/api/preview/{session_id}/conv-001")
+
+    client.application.extensions["sessions"].remove(removed)
+    previews = client.application.extensions["previews"]
+    assert len(previews) == 1
+    assert previews.get((kept, "conv-001")) is not None
@@ -0,0 +1,75 @@
+"""Tests for the write-behind output writer."""
+
+import io
+import threading
+import time
+
+import pytest
+
+from chatgpt_to_claude.core.splitter import SplitPart
+from chatgpt_to_claude.core.writer import OutputWriteError, OutputWriter
+
+
+def _part(text):
+    return SplitPart(conversation=None, sections=[text])
+
+
+def test_writes_files_and_creates_each_directory_once(tmp_path):
+    made = []
+
+    def make_dirs(path):
+        made.append(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+    with OutputWriter(threads=3, max_pending=2, make_dirs=make_dirs) as writer:
+        for i in range(20):
+            writer.write(tmp_path / f"month{i % 2}" / f"{i}.md", _part(f"file {i}"))
+
+    assert sorted(made) == [tmp_path / "month0", tmp_path / "month1"]
+    assert writer.files_written == 20
+    assert (tmp_path / "month1" / "7.md").read_text(encoding="utf-8") == "file 7"
+
+
+@pytest.mark.parametrize("threads", [0, 4])
+def test_first_failed_write_in_submission_order_is_raised(tmp_path, threads):
+    later_failed = threading.Event()
+
+    def opener(path):
+        if path.name == "1.md":
+            # Fails only after a later write has already failed
+            later_failed.wait(timeout=2 if threads else 0)
+            raise PermissionError(13, "Permission denied")
+        if path.name == "3.md":
+            later_failed.set()
+            raise OSError(28, "No space left on device")
+        return io.StringIO()
+
+    writer = OutputWriter(threads=threads, opener=opener, make_dirs=lambda path: None)
+    with pytest.raises(OutputWriteError) as excinfo:
+        with writer:
+            for i in range(6):
+                writer.write(tmp_path / f"{i}.md", _part("x"))
+
+    assert excinfo.value.path == tmp_path / "1.md"
+    assert "Permission denied" in str(excinfo.value)
+
+
+def test_pending_writes_are_bounded(tmp_path):
+    release = threading.Event()
+    seen = []
+
+    def opener(path):
+        release.wait(timeout=2)
+        return io.StringIO()
+
+    writer = OutputWriter(threads=2, max_pending=3, opener=opener, make_dirs=lambda path: None)
+    with writer:
+        for i in range(3):
+            writer.write(tmp_path / f"{i}.md", _part("x"))
+            seen.append(writer.pending)
+        threading.Timer(0.05, release.set).start()
+        start = time.perf_counter()
+        writer.write(tmp_path / "3.md", _part("x"))  # waits for room
+        assert time.perf_counter() - start >= 0.03
+
+    assert seen == [1, 2, 3]